@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse, the library behind compose-parse.py
+#
+# Nothing is downloaded or parsed at import time; the databases load
+# themselves on first use. A typical session:
+#
+#	from composeparse import *
+#	sources = SourceFiles(quiet = True)
+#	keysyms = KeysymDatabase(sources)
+#	sequences = SequenceSet(keysyms, quiet = True)
+#	ComposeParser(keysyms).parse([sources.fetch(URL_COMPOSE)], sequences)
+#	GTKTableEmitter(keysyms).emit(sequences)
+
+__version__ = '1.4'
+
+from composeparse.sources	import SourceFiles, SourceError, URL_COMPOSE, \
+				   FILENAME_COMPOSE_LOOKASIDE, FILENAME_COMPOSE_WIN32
+from composeparse.fetch		import Fetcher, FetchError
+from composeparse.keysyms	import KeysymDatabase, KeysymError
+from composeparse.parser	import ComposeParser, ComposeError
+from composeparse.sequences	import SequenceSet
+from composeparse.unicodedatatxt	import UnicodeDatabase, UnicodeDataModule, UnicodeDataFile, \
+				   DecompositionTable
+from composeparse.incremental	import IncrementalParser
+from composeparse.regression	import OldSequences, RegressionReport
+from composeparse.emitters	import GTKTableEmitter, MultiTableEmitter, \
+				   Win32TableEmitter, DafsaTableEmitter, PerfectHashEmitter, \
+				   AlgorithmicListEmitter
+from composeparse.dafsa		import Dafsa, DafsaDecoder, DafsaError
+from composeparse.perfecthash	import PerfectHash, PerfectHashLookup, PerfectHashError
+from composeparse.multitable	import MultiTable, MultiTableLookup, MultiTableError
+from composeparse.lookup	import ComposeTableCompact, CompactLookup, LookupReport, \
+				   LOOKUP_NONE, LOOKUP_PREFIX, LOOKUP_MATCH
+from composeparse.batch		import generate_locales
+from composeparse.cli		import main
+
+__all__ = [ 'SourceFiles', 'SourceError', 'URL_COMPOSE',
+	    'FILENAME_COMPOSE_LOOKASIDE', 'FILENAME_COMPOSE_WIN32',
+	    'Fetcher', 'FetchError',
+	    'KeysymDatabase', 'KeysymError', 'ComposeParser', 'ComposeError',
+	    'SequenceSet', 'UnicodeDatabase', 'UnicodeDataModule', 'UnicodeDataFile',
+	    'DecompositionTable', 'IncrementalParser',
+	    'OldSequences', 'RegressionReport',
+	    'GTKTableEmitter', 'MultiTableEmitter', 'Win32TableEmitter',
+	    'DafsaTableEmitter', 'PerfectHashEmitter', 'AlgorithmicListEmitter',
+	    'Dafsa', 'DafsaDecoder', 'DafsaError',
+	    'PerfectHash', 'PerfectHashLookup', 'PerfectHashError',
+	    'MultiTable', 'MultiTableLookup', 'MultiTableError',
+	    'ComposeTableCompact', 'CompactLookup', 'LookupReport',
+	    'LOOKUP_NONE', 'LOOKUP_PREFIX', 'LOOKUP_MATCH', 'generate_locales', 'main' ]
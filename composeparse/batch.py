@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/batch.py
+#
+# Generates the compose tables of all the locales of an nls/ tree at once,
+# one locale per worker process.
+
+from os			import walk, makedirs
+from os.path		import join, isdir, isfile, relpath
+from multiprocessing	import Pool, cpu_count
+from time		import time
+
+from composeparse.sources	import FILENAME_COMPOSE_LOOKASIDE
+from composeparse.keysyms	import KeysymError
+from composeparse.parser	import ComposeParser, ComposeError
+from composeparse.sequences	import SequenceSet
+from composeparse.emitters	import GTKTableEmitter
+from composeparse.output	import OutputFile
+from composeparse.composition	import oracle as default_oracle
+
+""" The names a Compose file goes by in the nls/ tree of libX11 """
+COMPOSE_FILENAMES = ('Compose', 'Compose.pre')
+
+""" The header written for each locale, under its own directory """
+FILENAME_GTK_HEADER = 'gtkimcontextsimpleseqs.h'
+
+def find_compose_files(directory):
+	""" Returns the sorted list of (locale, filename) of the Compose files """
+	""" under directory, the locale being the path of the directory that """
+	""" holds the file. Where both Compose and Compose.pre exist, Compose wins. """
+	found = {}
+	for (dirpath, dirnames, filenames) in walk(directory):
+		dirnames.sort()
+		for name in COMPOSE_FILENAMES:
+			if name in filenames:
+				locale = relpath(dirpath, directory)
+				if locale == '.':
+					locale = 'default'
+				found[locale] = join(dirpath, name)
+	return sorted(found.items())
+
+""" The keysym database, the resolved include units and the CompositionOracle """
+""" of the worker processes. The parent loads them before starting the pool; """
+""" with fork(), the workers share their pages copy-on-write. """
+worker_keysyms = None
+worker_units = None
+worker_oracle = None
+
+def init_worker(keysyms, units, oracle):
+	global worker_keysyms, worker_units, worker_oracle
+	worker_keysyms = keysyms
+	worker_units = units
+	worker_oracle = oracle
+
+def generate_locale(args):
+	""" Parses the Compose file of a locale and writes its header. Runs in a """
+	""" worker. Returns a summary dictionary; errors are returned, not raised. """
+	(locale, filename, outputdir, options) = args
+	summary = { 'locale': locale, 'filename': filename, 'error': None }
+	start = time()
+	try:
+		filenames = [filename]
+		if options['lookaside'] and isfile(FILENAME_COMPOSE_LOOKASIDE):
+			filenames.append(FILENAME_COMPOSE_LOOKASIDE)
+		parser = ComposeParser(worker_keysyms, localedir = options['localedir'],
+				localefile = join(options['localedir'], locale, 'Compose'),
+				units = worker_units, oracle = worker_oracle)
+		sequences = SequenceSet(worker_keysyms, quiet = True)
+		parser.parse(filenames, sequences)
+		(num_entries, counter_multikey, num_first_keysyms, zeroes) = sequences.statistics()
+
+		localedir = join(outputdir, locale)
+		if not isdir(localedir):
+			try:
+				makedirs(localedir)
+			except OSError:
+				if not isdir(localedir):
+					raise
+		headername = join(localedir, FILENAME_GTK_HEADER)
+		header = OutputFile(headername)
+		try:
+			GTKTableEmitter(worker_keysyms, options['expanded'], options['numeric']).emit(sequences, header)
+		except:
+			header.discard()
+			raise
+		header.close()
+		worker_oracle.save()
+
+		summary.update({ 'header': headername,
+				 'sequences': num_entries,
+				 'algorithmic': len(sequences.algorithmic),
+				 'multikey': counter_multikey,
+				 'duplicates': sequences.duplicates,
+				 'multisequences': len(parser.multisequences),
+				 'bytes': num_entries * 2 * 6 - zeroes * 2 + num_first_keysyms * 2 * 5 })
+	except (KeysymError, ComposeError), e:
+		summary['error'] = str(e)
+	except (IOError, OSError), e:
+		summary['error'] = "I/O error(%s): %s" % (e.errno, e.strerror)
+	summary['seconds'] = time() - start
+	return summary
+
+def generate_locales(keysyms, directory, outputdir = '.', jobs = None,
+		     expanded = False, numeric = False, lookaside = False, oracle = None):
+	""" Writes the header of each locale under directory (an nls/ tree) to """
+	""" outputdir/<locale>/gtkimcontextsimpleseqs.h, using jobs processes """
+	""" (default: one per core). Returns the list of the locale summaries. """
+	if oracle is None:
+		oracle = default_oracle
+	compose_files = find_compose_files(directory)
+	if jobs is None:
+		jobs = cpu_count()
+	options = { 'expanded': expanded, 'numeric': numeric, 'lookaside': lookaside,
+		    'localedir': directory }
+	work = [ (locale, filename, outputdir, options) for (locale, filename) in compose_files ]
+
+	""" Load the databases and the files that locales include (typically """
+	""" en_US.UTF-8) once, here, so that the workers inherit them """
+	keysyms.load()
+	units = {}
+	preloader = ComposeParser(keysyms, localedir = directory, units = units, oracle = oracle)
+	for (locale, filename) in compose_files:
+		try:
+			preloader.preload_includes([filename])
+		except (KeysymError, ComposeError, IOError):
+			pass	# The worker of the locale reports it.
+	if jobs <= 1 or len(work) <= 1:
+		init_worker(keysyms, units, oracle)
+		return map(generate_locale, work)
+	pool = Pool(min(jobs, len(work)), init_worker, (keysyms, units, oracle))
+	try:
+		summaries = pool.map(generate_locale, work, 1)
+	finally:
+		pool.close()
+		pool.join()
+	return summaries
+
+def print_summary(summaries, seconds, jobs):
+	""" Prints one line per locale, then the totals """
+	print "%-30s %9s %11s %9s %10s %9s %10s %8s" % ("Locale", "Sequences", "Algorithmic",
+		"Multi_key", "Duplicates", "Multiple", "Bytes", "Seconds")
+	total_sequences = 0
+	total_bytes = 0
+	failed = 0
+	for summary in summaries:
+		if summary['error'] is not None:
+			failed += 1
+			print "%-30s ERROR: %s" % (summary['locale'], summary['error'])
+			continue
+		total_sequences += summary['sequences']
+		total_bytes += summary['bytes']
+		print "%-30s %9d %11d %9d %10d %9d %10d %8.2f" % (summary['locale'], summary['sequences'],
+			summary['algorithmic'], summary['multikey'], summary['duplicates'], summary['multisequences'],
+			summary['bytes'], summary['seconds'])
+	print
+	print "Number of locales                                          :", len(summaries)
+	print "  of which failed                                          :", failed
+	print "Number of table sequences, all locales                     :", total_sequences
+	print "Size of the tables, all locales (in bytes)                 :", total_bytes
+	print "Worker processes                                           :", jobs
+	print "Wall time (in seconds)                                     : %.2f" % seconds
+	return failed
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/benchmark.py
+#
+# Times each stage of the pipeline over synthetic inputs of several sizes,
+# and writes the results as JSON, so that versions can be compared offline.
+#
+#	python -m composeparse.benchmark --sizes=1000,10000,100000 --output=bench.json
+
+from os			import chdir, getcwd, devnull, times
+from os.path		import join, abspath
+from random		import Random
+from shutil		import rmtree
+from tempfile		import mkdtemp
+from time		import time, strftime, gmtime
+from unicodedata	import normalize, decomposition, name as unicodename
+
+import sys
+import codecs
+import getopt
+import json
+import platform
+
+import composeparse
+from composeparse.sources	import SourceFiles
+from composeparse.keysyms	import KeysymDatabase
+from composeparse.parser	import ComposeParser
+from composeparse.sequences	import SequenceSet
+from composeparse.unicodedatatxt	import UnicodeDatabase, UnicodeDataFile
+from composeparse.regression	import OldSequences
+from composeparse.composition	import CompositionOracle
+from composeparse.emitters	import GTKTableEmitter
+from composeparse.lookup	import ComposeTableCompact, CompactLookup, table_streams
+
+""" The dead keys of the synthetic inputs: gdkkeysyms.h value, combining character """
+DEAD_KEYS = [
+	('dead_grave',		0xfe50, 0x0300),
+	('dead_acute',		0xfe51, 0x0301),
+	('dead_circumflex',	0xfe52, 0x0302),
+	('dead_tilde',		0xfe53, 0x0303),
+	('dead_macron',		0xfe54, 0x0304),
+	('dead_breve',		0xfe55, 0x0306),
+	('dead_abovedot',	0xfe56, 0x0307),
+	('dead_diaeresis',	0xfe57, 0x0308),
+	('dead_abovering',	0xfe58, 0x030A),
+	('dead_doubleacute',	0xfe59, 0x030B),
+	('dead_caron',		0xfe5a, 0x030C),
+	('dead_cedilla',	0xfe5b, 0x0327),
+	('dead_ogonek',		0xfe5c, 0x0328),
+	('dead_belowdot',	0xfe60, 0x0323),
+	('dead_hook',		0xfe61, 0x0309),
+	('dead_horn',		0xfe62, 0x031B),
+]
+
+""" The letters, named after themselves as in gdkkeysyms.h """
+LETTERS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+""" The synthetic keysyms that make up the Multi_key sequences. Their value """
+""" is their Unicode value, from the CJK block so that nothing composes. """
+NUM_SYNTHETIC_KEYSYMS = 1024
+FIRST_SYNTHETIC_KEYSYM = 0x4E00
+
+""" The second keysym of a Multi_key sequence comes from a group reserved for """
+""" the length of the sequence, so that no sequence is a prefix of another. """
+SECOND_KEYSYM_GROUP = 64
+
+""" Codepoints that the Multi_key and dead key table sequences produce """
+FIRST_RESULT = 0x3400
+NUM_RESULTS = 0x19B5
+
+""" Sequence length mixes: weights of the Multi_key sequences of 2 to 5 keysyms """
+MIXES = {
+	'short':	(0.20, 0.60, 0.15, 0.05),
+	'mixed':	(0.05, 0.35, 0.40, 0.20),
+	'long':		(0.00, 0.10, 0.40, 0.50),
+}
+
+""" Shares of the sequences that are algorithmic, that are dead key sequences """
+""" in the table and that repeat an earlier line (half of them conflicting) """
+ALGORITHMIC_SHARE = 0.15
+DEADKEY_SHARE = 0.10
+DUPLICATE_SHARE = 0.01
+
+""" Shares of the table sequences that are in GTKOLDSEQUENCES.txt, and of old """
+""" sequences that are no longer in the Compose file """
+OLD_SHARE = 0.10
+OLD_ONLY_SHARE = 0.05
+
+STAGES = [ 'database_load', 'database_load_cached', 'parse', 'classify',
+	   'index', 'sort_uniq', 'gtk', 'lookup', 'regression', 'unicode_statistics' ]
+
+def synthetic_keysym(i):
+	return "bk%04x" % i
+
+def algorithmic_combinations():
+	""" Returns the (dead keys, letter, composed character) that NFC composes, """
+	""" with one or two dead keys """
+	combinations = []
+	for letter in LETTERS:
+		for dead in DEAD_KEYS:
+			for second in [ None ] + DEAD_KEYS:
+				deads = [ dead ]
+				if second is not None:
+					if second == dead:
+						continue
+					deads.append(second)
+				marks = "".join([ unichr(d[2]) for d in reversed(deads) ])
+				composed = normalize('NFC', unicode(letter) + marks)
+				if len(composed) == 1:
+					combinations.append(([ d[0] for d in deads ], letter, composed))
+	return combinations
+
+def index_sequence(index, length):
+	""" Returns the Multi_key sequence of length keysyms numbered index """
+	group = length - 2
+	rest = []
+	for i in range(length - 2):
+		rest.append(synthetic_keysym(index % NUM_SYNTHETIC_KEYSYMS))
+		index /= NUM_SYNTHETIC_KEYSYMS
+	second = synthetic_keysym(group * SECOND_KEYSYM_GROUP + index)
+	return [ 'Multi_key', second ] + rest
+
+def sequence_capacity(length):
+	return SECOND_KEYSYM_GROUP * NUM_SYNTHETIC_KEYSYMS ** (length - 2)
+
+def compose_line(sequence, codepoint):
+	return "%s\t: \"%s\"\tU%04X\n" % (" ".join([ "<%s>" % ks for ks in sequence ]),
+		unichr(codepoint).encode('utf-8'), codepoint)
+
+def write_compose(filename, size, mix, rng):
+	""" Writes a Compose file of size lines. Returns the table sequences with """
+	""" their codepoints, and the algorithmic combinations, for the old table """
+	weights = MIXES[mix]
+	num_algorithmic = int(size * ALGORITHMIC_SHARE)
+	num_deadkey = int(size * DEADKEY_SHARE)
+	num_duplicates = int(size * DUPLICATE_SHARE)
+	num_multikey = size - num_algorithmic - num_deadkey - num_duplicates
+
+	counts = []
+	remaining = num_multikey
+	for length in range(2, 6):
+		if length == 5:
+			count = remaining
+		else:
+			count = min(int(num_multikey * weights[length - 2]), sequence_capacity(length), remaining)
+		counts.append(count)
+		remaining -= count
+
+	table = []
+	for length in range(2, 6):
+		for index in rng.sample(xrange(sequence_capacity(length)), counts[length - 2]):
+			table.append((index_sequence(index, length), FIRST_RESULT + rng.randrange(NUM_RESULTS)))
+	deadkeys = [ (dead[0], synthetic_keysym(i)) for dead in DEAD_KEYS
+			for i in range(NUM_SYNTHETIC_KEYSYMS) ]
+	for (dead, keysym) in rng.sample(deadkeys, min(num_deadkey, len(deadkeys))):
+		table.append(([ dead, keysym ], FIRST_RESULT + rng.randrange(NUM_RESULTS)))
+
+	combinations = algorithmic_combinations()
+	lines = [ compose_line(sequence, codepoint) for (sequence, codepoint) in table ]
+	for i in range(num_algorithmic):
+		(deads, letter, composed) = combinations[i % len(combinations)]
+		lines.append(compose_line(deads + [ letter ], ord(composed)))
+	for i in range(num_duplicates):
+		(sequence, codepoint) = table[rng.randrange(len(table))]
+		if i % 2:
+			codepoint = FIRST_RESULT + rng.randrange(NUM_RESULTS)
+		lines.append(compose_line(sequence, codepoint))
+	rng.shuffle(lines)
+
+	composefile = open(filename, 'w')
+	composefile.write("XCOMM Synthetic Compose file, %d lines, %s mix\n\n" % (size, mix))
+	composefile.writelines(lines)
+	composefile.close()
+	return (table, combinations)
+
+def write_keysyms(directory, size):
+	""" Writes keysyms.txt and gdkkeysyms.h. Keysyms that no sequence uses """
+	""" are added in proportion to size, so that the databases grow too. """
+	keysymstxt = open(join(directory, 'keysyms.txt'), 'w')
+	gdkkeysymsh = open(join(directory, 'gdkkeysyms.h'), 'w')
+	keysymstxt.write("# Synthetic keysyms.txt\n")
+	gdkkeysymsh.write("#ifndef __GDK_KEYSYMS_H__\n#define __GDK_KEYSYMS_H__\n\n")
+	gdkkeysymsh.write("#define GDK_Multi_key 0xff20\n")
+	for (dead, value, unival) in DEAD_KEYS:
+		keysymstxt.write("0x%04x U%04X . # %s\n" % (value, unival, dead))
+		gdkkeysymsh.write("#define GDK_%s 0x%04x\n" % (dead, value))
+	for letter in LETTERS:
+		keysymstxt.write("0x%04x U%04X . # %s\n" % (ord(letter), ord(letter), letter))
+		gdkkeysymsh.write("#define GDK_%s 0x%04x\n" % (letter, ord(letter)))
+	for i in range(NUM_SYNTHETIC_KEYSYMS):
+		value = FIRST_SYNTHETIC_KEYSYM + i
+		keysymstxt.write("0x%04x U%04X . # %s\n" % (value, value, synthetic_keysym(i)))
+		gdkkeysymsh.write("#define GDK_%s 0x%04x\n" % (synthetic_keysym(i), value))
+	for i in range(size / 10):
+		value = 0x1100000 + i
+		keysymstxt.write("0x%07x U%06X . # bkfiller%d\n" % (value, value, i))
+		gdkkeysymsh.write("#define GDK_bkfiller%d 0x%07x\n" % (i, value))
+	gdkkeysymsh.write("\n#endif /* __GDK_KEYSYMS_H__ */\n")
+	keysymstxt.close()
+	gdkkeysymsh.close()
+
+def write_unicodedata(filename, size):
+	""" Writes the first codepoints of the Basic Multilingual Plane, as many """
+	""" as size calls for, in the format of UnicodeData.txt. Decompositions """
+	""" that refer to codepoints outside the file are left out. """
+	limit = min(0x10000, max(0x1000, size / 4))
+	codepoints = {}
+	for codepoint in range(limit):
+		if 0xD800 <= codepoint <= 0xDFFF:
+			continue
+		name = unicodename(unichr(codepoint), '')
+		if name != '':
+			codepoints[codepoint] = name
+	def complete(codepoint):
+		for item in decomposition(unichr(codepoint)).split():
+			if item[0] == '<':
+				continue
+			component = int(item, 16)
+			if not codepoints.has_key(component) or not complete(component):
+				return False
+		return True
+	unicodedatatxt = open(filename, 'w')
+	for codepoint in sorted(codepoints):
+		decomposed = ''
+		if complete(codepoint):
+			decomposed = decomposition(unichr(codepoint))
+		unicodedatatxt.write("%04X;%s;;0;;%s;;;;;;;\n" % (codepoint, codepoints[codepoint], decomposed))
+	unicodedatatxt.close()
+
+def write_gtkoldsequences(filename, table, combinations, rng):
+	""" Writes some of the table sequences and of the algorithmic ones as the """
+	""" old GTK+ table, together with sequences that are not in the Compose file """
+	old = rng.sample(table, int(len(table) * OLD_SHARE))
+	present = set([ tuple(sequence) for (sequence, codepoint) in table ])
+	for i in range(int(len(table) * OLD_ONLY_SHARE)):
+		length = rng.randrange(3, 6)
+		sequence = index_sequence(rng.randrange(sequence_capacity(length)), length)
+		if tuple(sequence) not in present:
+			old.append((sequence, FIRST_RESULT + rng.randrange(NUM_RESULTS)))
+	for (deads, letter, composed) in combinations[:len(old) / 10]:
+		old.append((deads + [ letter ], ord(composed)))
+	gtkoldsequences = open(filename, 'w')
+	for (sequence, codepoint) in old:
+		padded = sequence + [ 'EMPTY' ] * (5 - len(sequence))
+		gtkoldsequences.write("%s\t%04X\n" % ("\t".join(padded), codepoint))
+	gtkoldsequences.close()
+
+def generate_inputs(directory, size, mix = 'mixed', seed = 0):
+	""" Writes the synthetic inputs for size sequences to directory, under """
+	""" the names the script downloads them as. Same arguments, same files. """
+	rng = Random("%s-%d-%s" % (seed, size, mix))
+	(table, combinations) = write_compose(join(directory, 'Compose'), size, mix, rng)
+	write_keysyms(directory, size)
+	write_unicodedata(join(directory, 'UnicodeData.txt'), size)
+	write_gtkoldsequences(join(directory, 'GTKOLDSEQUENCES.txt'), table, combinations, rng)
+
+class StageTimer(object):
+	""" Records the wall and CPU (user and system) time of each stage """
+	def __init__(self):
+		self.stages = {}
+
+	def __call__(self, stage, function, *args):
+		wall = time()
+		cputimes = times()
+		result = function(*args)
+		cputimesnow = times()
+		self.stages[stage] = { 'wall': time() - wall,
+			'cpu': cputimesnow[0] + cputimesnow[1] - cputimes[0] - cputimes[1] }
+		return result
+
+def silently(function, *args):
+	""" Runs function with stdout going nowhere """
+	stdout = sys.stdout
+	sys.stdout = codecs.getwriter('utf-8')(open(devnull, 'w'))
+	try:
+		return function(*args)
+	finally:
+		sys.stdout.close()
+		sys.stdout = stdout
+
+def run_stages(directory):
+	""" Runs the pipeline over the inputs in directory. Returns the timer """
+	""" and the counts of what went through the stages. """
+	timer = StageTimer()
+	oracle = CompositionOracle()	# Each size composes from scratch.
+	cwd = getcwd()
+	chdir(directory)
+	try:
+		def load(nocache):
+			sources = SourceFiles(quiet = True, nocache = nocache)
+			keysyms = KeysymDatabase(sources)
+			keysyms.load()
+			unicodedb = UnicodeDatabase(UnicodeDataFile(sources), oracle)
+			unicodedb.load()
+			oldsequences = OldSequences(keysyms, sources, oracle)
+			oldsequences.load()
+			return (keysyms, unicodedb, oldsequences)
+		silently(timer, 'database_load', load, True)
+		silently(load, False)
+		(keysyms, unicodedb, oldsequences) = silently(timer, 'database_load_cached', load, False)
+
+		parser = ComposeParser(keysyms, oracle = oracle)
+		def parse():
+			return list(parser.filter_compose_entries(parser.collect_multisequences(
+				parser.expand_compose_files(['Compose']))))
+		entries = timer('parse', parse)
+		classified = timer('classify', lambda: list(parser.classify_compose_entries(entries)))
+
+		sequences = SequenceSet(keysyms, quiet = True)
+		def index():
+			for (entry, algorithmic) in classified:
+				if algorithmic is not None:
+					sequences.add_algorithmic(algorithmic)
+				else:
+					sequences.add(entry.sequence + [entry.codepoint])
+		timer('index', index)
+		def sort_uniq():
+			return (sequences.table(), sequences.algorithmic_table())
+		(table, algorithmic_uniqued) = timer('sort_uniq', sort_uniq)
+
+		nowhere = open(devnull, 'wb')
+		timer('gtk', GTKTableEmitter(keysyms).emit, sequences, nowhere)
+		nowhere.close()
+		def lookup():
+			# The larger sizes take more cells than 16-bit offsets address.
+			(data, n_index_size) = GTKTableEmitter(keysyms).compact(sequences, wide_offsets = True)
+			expected = sequences.values_table()
+			engine = CompactLookup(ComposeTableCompact(data, n_index_size))
+			return engine.replay(table_streams(expected), expected)
+		lookups = timer('lookup', lookup)
+		silently(timer, 'regression', oldsequences.report, sequences)
+		timer('unicode_statistics', unicodedb.statistics)
+	finally:
+		chdir(cwd)
+
+	counts = { 'entries': len(entries),
+		   'table': len(table),
+		   'algorithmic': len(sequences.algorithmic),
+		   'algorithmic_uniqued': len(algorithmic_uniqued),
+		   'duplicates': sequences.duplicates,
+		   'lookup_keystrokes': lookups.keystrokes,
+		   'lookup_comparisons': lookups.comparisons,
+		   'keysym_lookups': keysyms.lookups }
+	return (timer, counts)
+
+def run_benchmark(sizes, mixes, seed = 0, workdir = None):
+	""" Generates the inputs for each size and mix, runs the stages over them """
+	""" and returns the results, ready for JSON """
+	runs = []
+	for mix in mixes:
+		for size in sizes:
+			directory = mkdtemp(prefix = 'composeparse-bench-', dir = workdir)
+			try:
+				generate_inputs(directory, size, mix, seed)
+				(timer, counts) = run_stages(directory)
+			finally:
+				rmtree(directory)
+			runs.append({ 'size': size, 'mix': mix, 'seed': seed,
+				      'counts': counts, 'stages': timer.stages,
+				      'total': { 'wall': sum([ s['wall'] for s in timer.stages.values() ]),
+						 'cpu': sum([ s['cpu'] for s in timer.stages.values() ]) } })
+	return { 'version': composeparse.__version__,
+		 'python': platform.python_version(),
+		 'platform': platform.platform(),
+		 'date': strftime("%Y-%m-%dT%H:%M:%SZ", gmtime()),
+		 'stages': STAGES,
+		 'runs': runs }
+
+def print_runs(results):
+	""" Prints the wall time of each stage, one line per run """
+	print "%-8s %8s" % ("Mix", "Size"),
+	for stage in STAGES:
+		print "%10s" % stage[:10],
+	print
+	for run in results['runs']:
+		print "%-8s %8d" % (run['mix'], run['size']),
+		for stage in STAGES:
+			print "%10.3f" % run['stages'][stage]['wall'],
+		print
+
+def usage():
+	print """python -m composeparse.benchmark available parameters:
+	    --sizes=N,...	numbers of sequences of the synthetic Compose files (default: 1000,10000,100000)
+	    --mixes=MIX,...	sequence length mixes, of %s (default: mixed)
+	    --seed=N		seed of the generator (default: 0)
+	-o, --output=FILE	write the results as JSON to FILE (default: benchmark.json)
+	    --workdir=DIR	generate the inputs under DIR (default: the temporary directory)
+	-q, --quiet		do not print the table of results
+	""" % ", ".join(sorted(MIXES))
+
+def main(argv = None):
+	if argv is None:
+		argv = sys.argv[1:]
+	try:
+		opts, args = getopt.getopt(argv, "ho:q",
+			[ "help", "sizes=", "mixes=", "seed=", "output=", "workdir=", "quiet" ])
+		sizes = [ 1000, 10000, 100000 ]
+		mixes = [ 'mixed' ]
+		seed = 0
+		output = 'benchmark.json'
+		workdir = None
+		quiet = False
+		for o, a in opts:
+			if o in ("-h", "--help"):
+				usage()
+				return 0
+			if o == "--sizes":
+				sizes = map(int, a.split(','))
+			if o == "--mixes":
+				mixes = a.split(',')
+				for mix in mixes:
+					if not MIXES.has_key(mix):
+						raise ValueError(mix)
+			if o == "--seed":
+				seed = int(a)
+			if o in ("-o", "--output"):
+				output = a
+			if o == "--workdir":
+				workdir = abspath(a)
+			if o in ("-q", "--quiet"):
+				quiet = True
+	except (getopt.GetoptError, ValueError):
+		usage()
+		return 2
+
+	results = run_benchmark(sizes, mixes, seed, workdir)
+	outputfile = open(output, 'w')
+	json.dump(results, outputfile, indent = 1, sort_keys = True)
+	outputfile.write("\n")
+	outputfile.close()
+	if not quiet:
+		print_runs(results)
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
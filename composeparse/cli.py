@@ -0,0 +1,513 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/cli.py
+#
+# The command line of compose-parse.py.
+
+from os.path		import isfile, isdir, join
+from multiprocessing	import cpu_count
+from time		import time
+
+import sys
+import getopt
+
+from composeparse.sources	import SourceFiles, SourceError, URL_COMPOSE, URL_KEYSYMSTXT, \
+				   URL_GDKKEYSYMSH, URL_GTKOLDSEQUENCES, \
+				   FILENAME_COMPOSE_LOOKASIDE, FILENAME_COMPOSE_WIN32, read_checksums
+from composeparse.fetch		import FetchError, FETCH_CACHEDIR
+from composeparse.keysyms	import KeysymDatabase, KeysymError
+from composeparse.parser	import ComposeParser, ComposeError
+from composeparse.sequences	import SequenceSet
+from composeparse.unicodedatatxt	import UnicodeDatabase, UnicodeDataFile, unicodedata_url
+from composeparse.regression	import OldSequences
+from composeparse.composition	import CompositionOracle, FILENAME_ORACLE
+from composeparse.incremental	import IncrementalParser, FILENAME_INCREMENTAL
+from composeparse.emitters	import GTKTableEmitter, MultiTableEmitter, \
+				   Win32TableEmitter, DafsaTableEmitter, PerfectHashEmitter, \
+				   AlgorithmicListEmitter
+from composeparse.dafsa		import Dafsa, DafsaDecoder, DafsaError
+from composeparse.perfecthash	import PerfectHash, PerfectHashError
+from composeparse.multitable	import MultiTable, MultiTableError
+from composeparse.lookup	import ComposeTableCompact, CompactLookup, table_streams
+from composeparse.batch		import generate_locales, print_summary
+from composeparse.instrument	import Profiler
+from composeparse.output	import OutputFile
+
+def usage():
+	print """compose-parse available parameters:
+	-a, --algorithmic	show sequences saved with algorithmic optimisation
+	-d, --dafsa		show the entries that go to GTK+ as a minimized prefix automaton (gtkimcontextsimpledafsa.h)
+	-e, --gtk-expanded	when used with --gtk, create file that repeats first column; not usable in GTK+
+	-g, --gtk		show entries that go to GTK+
+	-h, --help		this craft
+        -m, --multiple		shows compose sequences that result to >1 unicode characters
+	-n, --numeric		when used with --gtk, create file with numeric values only
+        -p, --plane1		show plane1 compose sequences
+            --plane1-table      with --gtk, keep the sequences with keysyms or codepoints past 0xFFFF, in a second, 32-bit table
+	-q, --quiet   	 	do not show verbose output (default is verbose)
+        -r, --regression	shows compose sequences that used to exist in pre-update, but are not found in Xorg's Compose.
+            --regression-json=FILE with --regression, write the sequences added, removed and changed to FILE, as JSON
+	-s, --statistics	show overall statistics (both algorithmic, non-algorithmic); with --dafsa, --perfect-hash,
+				--multiple or --replay, also those of the structures they build
+	-u, --unicodedatatxt	show compose sequences derived from the Unicode character database
+            --unicode-version=V with --unicodedatatxt or --statistics, read UnicodeData.txt of Unicode V (e.g. 5.0.0) from unicode.org
+                                instead of the unicodedata module of Python
+	-w, --warnings		show some non-fatal warnings, and each duplicate sequence (useful for maintainer)
+            --win32             process gtk-win32-sequences.txt and produce gtkimcontextsimplewin32seqs.h
+            --perfect-hash      show the entries that go to GTK+ as a minimal perfect hash (gtkimcontextsimplehash.h)
+            --replay=N          look up each sequence of the table N times, as GTK+ would, and report the answers and comparisons
+            --incremental       parse again only the lines of the Compose files that changed since the last run, and
+                                print the sequences of the table that changed (state kept in the cache directory)
+            --no-cache          parse the downloaded files and normalize again, ignoring the *.cache files
+            --cache-dir=DIR     keep the downloaded files, their parsed contents and the answers of normalization under DIR (default: compose-parse.cache)
+            --refresh           revalidate the cached files with their servers, however recently checked
+            --mirror=DIR        read the input files from DIR instead of downloading them (offline)
+            --checksums=FILE    check the input files against the SHA-1s in FILE (lines of a SHA-1 and a URL or file name)
+            --batch=DIR         write gtkimcontextsimpleseqs.h for each locale with a Compose file under DIR (an nls/ tree)
+            --output-dir=DIR    with --batch, write the headers under DIR/<locale>/ (default: current directory)
+        -j, --jobs=N            with --batch, use N worker processes (default: one per core)
+        -o, --output=FILE       write the tables (--gtk, --dafsa, --perfect-hash, --multiple, --win32, --algorithmic) to FILE instead of stdout
+            --profile           print the time, memory and operation counts of each stage to stderr
+            --profile-json=FILE write the same profile to FILE, as JSON
+
+	Default is to show statistics.
+	"""
+
+def main(argv = None):
+	""" Runs compose-parse.py with the arguments argv (default: sys.argv[1:]) """
+	""" Returns the exit status """
+	if argv is None:
+		argv = sys.argv[1:]
+	try: 
+		opts, args = getopt.getopt(argv, "adeghj:mno:pqrsuw", 
+			[ "algorithmic", "dafsa", "gtk-expanded", "gtk", "help", "multiple",
+			  "numeric", "plane1", "quiet", "regression", 
+			  "stats", "statistics", "unicodedatatxt", "warnings", "win32",
+			  "no-cache", "batch=", "output-dir=", "jobs=", "profile", "profile-json=", "output=", "perfect-hash", "replay=", "plane1-table", "regression-json=",
+			  "cache-dir=", "refresh", "mirror=", "checksums=", "unicode-version=", "incremental"])
+	except: 
+		usage()
+		return 2
+
+	opt_algorithmic = False
+	opt_dafsa = False
+	opt_gtkexpanded = False
+	opt_gtk = False
+	opt_multiple = False
+	opt_numeric = False
+	opt_plane1 = False
+	opt_quiet = False
+	opt_regression = False
+	opt_regressionjson = None
+	opt_statistics = False
+	opt_unicodedatatxt = False
+	opt_warnings = False
+	opt_win32 = False
+	opt_nocache = False
+	opt_batch = None
+	opt_outputdir = "."
+	opt_jobs = None
+	opt_profile = False
+	opt_profilejson = None
+	opt_output = None
+	opt_perfecthash = False
+	opt_replay = 0
+	opt_plane1table = False
+	opt_cachedir = FETCH_CACHEDIR
+	opt_refresh = False
+	opt_mirror = None
+	opt_checksums = {}
+	opt_unicodeversion = None
+	opt_incremental = False
+
+	no_options = True
+
+	for o, a in opts:
+		if o in ("-a", "--algorithmic"):
+			opt_algorithmic = True
+			no_options = False
+		if o in ("-d", "--dafsa"):
+			opt_dafsa = True
+			no_options = False
+		if o in ("-e", "--gtk-expanded"):
+			opt_gtkexpanded = True
+			no_options = False
+		if o in ("-g", "--gtk"):
+			opt_gtk = True
+			no_options = False
+		if o in ("-h", "--help"):
+			usage()
+			return 0
+		if o in ("-m", "--multiple"):
+			opt_multiple = True
+			no_options = False
+		if o in ("-n", "--numeric"):
+			opt_numeric = True
+			no_options = False
+		if o in ("-p", "--plane1"):
+			opt_plane1 = True
+			no_options = False
+		if o in ("-q", "--quiet"):
+			opt_quiet = True
+			no_options = False
+		if o in ("-r", "--regression"):
+			opt_regression = True
+			no_options = False
+		if o in ("-s", "--statistics"):
+			opt_statistics = True
+		if o in ("-u", "--unicodedatatxt"):
+			opt_unicodedatatxt = True
+			no_options = False
+		if o in ("-w", "--warnings"):
+			opt_warnings = True
+		if o == "--win32":
+			opt_win32 = True
+			no_options = False
+		if o == "--no-cache":
+			opt_nocache = True
+		if o == "--batch":
+			opt_batch = a
+			no_options = False
+		if o == "--output-dir":
+			opt_outputdir = a
+		if o in ("-j", "--jobs"):
+			try:
+				opt_jobs = int(a)
+			except ValueError:
+				usage()
+				return 2
+		if o == "--profile":
+			opt_profile = True
+		if o == "--regression-json":
+			opt_regressionjson = a
+		if o == "--profile-json":
+			opt_profilejson = a
+		if o in ("-o", "--output"):
+			opt_output = a
+		if o == "--perfect-hash":
+			opt_perfecthash = True
+			no_options = False
+		if o == "--plane1-table":
+			opt_plane1table = True
+		if o == "--cache-dir":
+			opt_cachedir = a
+		if o == "--unicode-version":
+			opt_unicodeversion = a
+		if o == "--refresh":
+			opt_refresh = True
+		if o == "--incremental":
+			opt_incremental = True
+		if o == "--mirror":
+			opt_mirror = a
+		if o == "--checksums":
+			try:
+				opt_checksums = read_checksums(a)
+			except (IOError, SourceError), e:
+				print >> sys.stderr, "ERROR:", e
+				return -1
+		if o == "--replay":
+			try:
+				opt_replay = int(a)
+			except ValueError:
+				usage()
+				return 2
+			no_options = False
+
+	if no_options:
+		opt_statistics = True
+
+	sources = SourceFiles(opt_quiet, opt_nocache, opt_cachedir, opt_mirror, opt_refresh, opt_checksums)
+	""" Download what the options need at once; each file is parsed as """
+	""" soon as it is in, while the others still download """
+	urls = [ URL_KEYSYMSTXT, URL_GDKKEYSYMSH ]
+	if not opt_win32 and opt_batch is None:
+		urls.append(URL_COMPOSE)
+	if opt_unicodeversion is not None and (opt_unicodedatatxt or opt_statistics):
+		urls.append(unicodedata_url(opt_unicodeversion))
+	if opt_regression:
+		urls.append(URL_GTKOLDSEQUENCES)
+	sources.prefetch(urls)
+	keysyms = KeysymDatabase(sources)
+	oracle = CompositionOracle()
+	parser = ComposeParser(keysyms, opt_warnings, opt_plane1, plane1table = opt_plane1table, oracle = oracle)
+	sequences = None
+	out = None
+
+	profiler = None
+	if opt_profile or opt_profilejson is not None:
+		profiler = Profiler()
+		profiler.install()
+		sources.fetch = profiler.wrap('download', sources.fetch)
+		sources.load = profiler.wrap('database cache', sources.load)
+		parser.profiler = profiler
+	def timed(name, function, *args):
+		""" Runs function(*args), as the stage name when profiling """
+		if profiler is None:
+			return function(*args)
+		return profiler.call(name, function, *args)
+
+	if not opt_nocache:
+		oracle.open(join(opt_cachedir, FILENAME_ORACLE))
+
+	try:
+		out = OutputFile(opt_output)
+		keysyms.load()
+		print >> sys.stderr
+
+		if opt_win32:
+			""" Process the compose sequences in gtk-win32-sequences.txt
+			""" 
+			if not isfile(FILENAME_COMPOSE_WIN32):
+				if not opt_quiet:
+					print >> sys.stderr, "Did not find the win32 compose file %s. Exiting..." % (FILENAME_COMPOSE_WIN32)
+				return -1
+
+			win32_sequences = SequenceSet(keysyms, opt_quiet, opt_warnings)
+			for (entry, algorithmic) in parser.entries([FILENAME_COMPOSE_WIN32], filtered = False):
+				if algorithmic is not None:
+					win32_sequences.add_algorithmic(algorithmic)
+					print >> sys.stderr, "INFO: Sequence was normalised, thus not including:", entry.sequence
+					continue
+				sequence = entry.sequence + [entry.codepoint]
+				win32_sequences.add(sequence, keep_duplicate = "Multi_key" not in sequence)
+			win32_sequences.print_duplicates()
+			Win32TableEmitter().emit(win32_sequences, out)
+			out.close()
+			return 0
+
+		if opt_batch is not None:
+			""" Generate the table of every locale under the nls/ tree """
+			if not isdir(opt_batch):
+				if not opt_quiet:
+					print >> sys.stderr, "Did not find the directory %s. Exiting..." % (opt_batch)
+				return -1
+			start = time()
+			summaries = generate_locales(keysyms, opt_batch, opt_outputdir, opt_jobs,
+					opt_gtkexpanded, opt_numeric, isfile(FILENAME_COMPOSE_LOOKASIDE), oracle)
+			if opt_jobs is None:
+				opt_jobs = cpu_count()
+			if print_summary(summaries, time() - start, opt_jobs):
+				return -1
+			return 0
+
+		""" Grab the compose file from upstream """
+		filename_compose = sources.fetch(URL_COMPOSE)
+
+		""" Look if there is a lookaside compose file in the current
+		    directory, and if so, merge with upstream Compose file.
+		"""
+		filenames_compose = [filename_compose]
+		if isfile(FILENAME_COMPOSE_LOOKASIDE):
+			filenames_compose.append(FILENAME_COMPOSE_LOOKASIDE)
+		elif not opt_quiet:
+			print >> sys.stderr, "Did not find the lookaside compose file %s. Continuing..." % (FILENAME_COMPOSE_LOOKASIDE)
+
+		sequences = SequenceSet(keysyms, opt_quiet, opt_warnings)
+		if opt_incremental and not opt_nocache:
+			incremental = IncrementalParser(parser, join(opt_cachedir, FILENAME_INCREMENTAL))
+			timed('parse (incremental)', incremental.parse, filenames_compose, sequences)
+			if not opt_quiet:
+				incremental.print_summary()
+			if not timed('incremental state', incremental.save) and not opt_quiet:
+				print >> sys.stderr, "Could not write cache file %s" % incremental.filename
+		else:
+			timed('parse', parser.parse, filenames_compose, sequences)
+		sequences.print_duplicates()
+
+		if opt_gtk or opt_dafsa or opt_perfecthash or opt_replay or opt_regression or opt_statistics:
+			timed('sort/uniq', sequences.table)
+		algorithmic_uniqued = timed('sort/uniq (algorithmic)', sequences.algorithmic_table)
+
+		if opt_algorithmic:
+			timed('output --algorithmic', AlgorithmicListEmitter().emit, algorithmic_uniqued, out)
+			out.flush()
+
+		if opt_gtk:
+			timed('output --gtk', GTKTableEmitter(keysyms, opt_gtkexpanded, opt_numeric, opt_plane1table).emit, sequences, out)
+			out.flush()
+
+		dafsa = None
+		if opt_dafsa:
+			dafsa = timed('prefix automaton', Dafsa, sequences)
+			timed('prefix automaton round-trip', dafsa.verify)
+			timed('output --dafsa', DafsaTableEmitter().emit, dafsa, out)
+			out.flush()
+
+		perfecthash = None
+		if opt_perfecthash:
+			perfecthash = timed('perfect hash', PerfectHash, sequences)
+			timed('perfect hash verification', perfecthash.verify)
+			timed('output --perfect-hash', PerfectHashEmitter().emit, perfecthash, out)
+			out.flush()
+
+		multitable = None
+		if opt_multiple:
+			multitable = timed('multiple table', MultiTable, parser, keysyms)
+			timed('multiple table verification', multitable.verify)
+
+		lookups = []
+		if opt_replay:
+			tables = [ ('gtk_compose_seqs_compact', sequences, 'H') ]
+			if opt_plane1table:
+				(narrow, wide) = sequences.split_wide()
+				tables = [ ('gtk_compose_seqs_compact', narrow, 'H'),
+					   ('gtk_compose_seqs_compact_32bit', wide, 'I') ]
+			for (name, part, typecode) in tables:
+				(data, n_index_size) = GTKTableEmitter(keysyms).compact(part, typecode)
+				expected = part.values_table()
+				engine = CompactLookup(ComposeTableCompact(data, n_index_size, name = name))
+				lookups.append(timed('lookup replay', engine.replay,
+					table_streams(expected, opt_replay), expected))
+			if not opt_statistics:
+				for report in lookups:
+					report.print_report(opt_quiet)
+
+		if opt_unicodeversion is not None:
+			unicodedb = UnicodeDatabase(UnicodeDataFile(sources, unicodedata_url(opt_unicodeversion)), oracle)
+		else:
+			unicodedb = UnicodeDatabase(oracle = oracle)
+		if opt_unicodedatatxt:
+			timed('unicode statistics', unicodedb.statistics)
+
+		if opt_regression:
+			timed('regression', OldSequences(keysyms, sources, oracle).report, sequences, opt_regressionjson)
+
+		if opt_multiple:
+			timed('output --multiple', MultiTableEmitter().emit, multitable, out)
+			if not opt_statistics:
+				out.close()
+				return 0
+
+		if opt_statistics:
+			timed('output --statistics', print_statistics, sequences, algorithmic_uniqued, unicodedb, keysyms, dafsa, perfecthash, lookups, multitable, parser.plane1_dropped, opt_quiet)
+		out.close()
+	except (KeysymError, ComposeError, SourceError, FetchError, DafsaError, PerfectHashError, MultiTableError), e:
+		print >> sys.stderr, "ERROR:", e
+		return -1
+	except IOError, (errno, strerror):
+		print >> sys.stderr, "I/O error(%s): %s" % (errno, strerror)
+		return -1
+	finally:
+		if out is not None:
+			out.discard()	# Unless closed: what failed leaves no file.
+		if not oracle.save() and not opt_quiet:
+			print >> sys.stderr, "Could not write cache file %s" % oracle.filename
+		if profiler is not None:
+			profiler.uninstall()
+			report_profile(profiler, keysyms, sequences, oracle, opt_profile, opt_profilejson)
+	return 0
+
+def report_profile(profiler, keysyms, sequences, oracle, table, jsonfilename):
+	""" Adds the counters kept by the databases, then prints the profile """
+	""" as a table to stderr, and/or writes it as JSON to jsonfilename """
+	profiler.count('Keysym lookups', keysyms.lookups)
+	profiler.count('Keysym lookups answered from the cache', keysyms.hits)
+	profiler.count('HTTP requests', keysyms.sources.fetcher.requests)
+	profiler.count('Cached files revalidated', keysyms.sources.fetcher.revalidated)
+	if sequences is not None:
+		profiler.count('Duplicate checks', len(sequences.sequenceindex) + sequences.duplicates)
+		profiler.count('Duplicates found', sequences.duplicates)
+	profiler.count('Compositions answered from memory', oracle.hits)
+	profiler.count('Compositions answered from the cache file', oracle.disk_hits)
+	profiler.count('Compositions worked out', oracle.misses)
+	if table:
+		profiler.print_table()
+	if jsonfilename is not None:
+		profiler.write_json(jsonfilename)
+
+def print_statistics(sequences, algorithmic_uniqued, unicodedb, keysyms, dafsa, perfecthash, lookups,
+		multitable, plane1_dropped, quiet):
+	(num_entries, counter_multikey, num_first_keysyms, zeroes) = sequences.statistics()
+	num_algorithmic = len(sequences.algorithmic)
+	num_algorithmic_greek = sequences.algorithmic_greek(algorithmic_uniqued)
+
+	print
+	print "Total number of compose sequences (from file)              :", num_entries + num_algorithmic
+	print "  of which can be expressed algorithmically                :", num_algorithmic
+	print "  of which cannot be expressed algorithmically             :", num_entries 
+	print "    of which have Multi_key                                :", counter_multikey
+	print 
+	print "Algorithmic (stats for Xorg Compose file)"
+	print "Number of sequences off due to algo from file (len(array)) :", num_algorithmic
+	print "Number of sequences off due to algo (uniq(sort(array)))    :", len(algorithmic_uniqued)
+	print "  of which are for Greek                                   :", num_algorithmic_greek
+	print 
+	unicodedb.print_statistics()
+	print "Not algorithmic (stats from Xorg Compose file)"
+	print "Number of sequences                                        :", num_entries 
+	print "Flat array looks like                                      :", num_entries, "rows of 6 integers (2 bytes per int, or 12 bytes per row)"
+	print "Flat array would have taken up (in bytes)                  :", num_entries * 2 * 6, "bytes from the GTK+ library"
+	print "Number of items in flat array                              :", num_entries * 6
+	print "  of which are zeroes                                      :", zeroes, "or ", (100 * zeroes) / (num_entries * 6), " per cent"
+	print "Number of different first items                            :", num_first_keysyms
+	print "Number of max bytes (if using flat array)                  :", num_entries * 2 * 6
+	print "Number of savings                                          :", zeroes * 2 - num_first_keysyms * 2 * 5
+	print 
+	print "Memory needs if both algorithmic+optimised table in latest Xorg compose file"
+	print "                                                           :", num_entries * 2 * 6 - zeroes * 2 + num_first_keysyms * 2 * 5
+	print
+	compact = sequences.compact_cells() * 2
+	(narrow, wide) = sequences.split_wide()
+	print "Plane 1 (--plane1-table)"
+	print "Number of sequences with a keysym or codepoint past 0xFFFF :", len(wide)
+	print "Number of sequences dropped for their plane 1 keysyms      :", plane1_dropped
+	print "Size with 16-bit cells only, plane 1 cut (in bytes)        :", compact
+	print "Size with 32-bit cells throughout (in bytes)               :", compact * 2
+	print "Size with a 16-bit table and a 32-bit one (in bytes)       :", narrow.compact_cells() * 2 + wide.compact_cells() * 4
+	print "  of which for the 32-bit table                            :", wide.compact_cells() * 4
+	print
+	for report in lookups:
+		report.print_report(quiet)
+		print
+	if dafsa is not None:
+		keystrokes = 0
+		decoder = DafsaDecoder(dafsa.units)
+		for keys in dafsa.sequences:
+			decoder.lookup(keys)
+			keystrokes += len(keys)
+		print "Prefix automaton (--dafsa)"
+		print "Number of states (trie, before minimization)               :", dafsa.trie_states
+		print "Number of states (minimized)                               :", len(dafsa.states)
+		print "  of which are laid out                                    :", dafsa.laid_out
+		print "Number of transitions                                      :", dafsa.edges
+		print "Size of the automaton (in bytes)                           :", dafsa.size(), "as", dafsa.ctype()
+		print "Size of gtk_compose_seqs_compact (in bytes)                :", compact
+		if compact > 0:
+			print "  the automaton takes                                      :", (100 * dafsa.size()) / compact, "per cent of it"
+		if keystrokes > 0:
+			print "Keysym comparisons per keystroke (average)                 : %.2f" % (float(decoder.comparisons) / keystrokes)
+		print
+	if perfecthash is not None:
+		print "Perfect hash (--perfect-hash)"
+		print "Number of sequences (slots)                                :", perfecthash.slots
+		print "Number of buckets                                          :", perfecthash.buckets
+		print "Seed of the hash functions                                 :", perfecthash.seed
+		print "Displacements tried                                        :", perfecthash.tries
+		print "Build time (in seconds)                                    : %.3f" % perfecthash.build_time
+		print "Size of the hash (in bytes)                                :", perfecthash.size()
+		print "  of which displacements                                   :", len(perfecthash.displacements) * perfecthash.displacements.itemsize
+		print "  of which keysyms                                         :", len(perfecthash.keys) * perfecthash.keys.itemsize
+		print "  of which codepoints                                      :", len(perfecthash.values) * perfecthash.values.itemsize
+		print "Size of gtk_compose_seqs_compact (in bytes)                :", compact
+		print "Size of the flat array (in bytes)                          :", num_entries * 2 * 6
+		print
+	if multitable is not None:
+		print "Multiple characters (--multiple)"
+		print "Number of sequences                                        :", len(multitable.sequences)
+		print "  of which have a result that another also has             :", len(multitable.sequences) - multitable.distinct_results
+		print "Size of the sorted table (in bytes)                        :", multitable.size()
+		print "  of which index                                           :", len(multitable.index) * multitable.index.itemsize
+		print "  of which rows                                            :", len(multitable.rows) * multitable.rows.itemsize
+		print "  of which results                                         :", len(multitable.results) * multitable.results.itemsize
+		print "Size of the table padded to the longest (in bytes)         :", multitable.padded_size(), \
+			"(%d keysyms and %d characters a row)" % (multitable.maxseqlen, multitable.maxvallen)
+		print
+	print "Old implementation in GTK+"
+	print "Number of sequences in old gtkimcontextsimple.c            :", 691
+	print "The existing (old) implementation in GTK+ used to take up  :", 691 * 2 * 12, "bytes"
+	print
+	print "Keysym lookups"
+	print "Number of lookups                                          :", keysyms.lookups
+	print "  of which were answered from the cache                    :", keysyms.hits
+	print "  of which were found in gdkkeysyms.h/keysyms.txt          :", keysyms.database_hits
+	print "  of which were in Uxxxx/0xXXXX notation                   :", keysyms.hex_hits
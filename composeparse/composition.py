@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/composition.py
+#
+# Works out whether a compose sequence can be produced algorithmically,
+# that is by Unicode normalization (NFC) of its base character and dead keys.
+#
+# The answers go through a CompositionOracle, which works each out once and
+# can keep them in a file from run to run. The parsers and databases take
+# one as a parameter; oracle is the one they share by default. An answer is
+# keyed by the version of Unicode of the unicodedata module, the base
+# codepoint and the codepoints of the marks, sorted when their order cannot
+# change the answer.
+
+from unicodedata	import normalize, combining, unidata_version
+from os.path		import dirname
+
+import marshal
+
+from composeparse.fetch		import ensure_directory, write_atomically
+
+""" The file of the oracle, in the cache directory """
+FILENAME_ORACLE = 'compositions.cache'
+
+""" Orders of the marks compose_marks() normalizes, at most """
+COMPOSE_MAXORDERS = 24
+
+def factorial(n): 
+	if n <= 1:
+		return 1
+	else:
+		return n * factorial(n-1)
+
+class CompositionOracle(object):
+	""" Answers questions of normalization, each worked out once. The """
+	""" answers read from filename by open() are in known, those worked """
+	""" out since in added, until save() writes them back. hits counts the """
+	""" answers from added, disk_hits those from known, and misses those """
+	""" that had to be worked out. """
+	def __init__(self, version = unidata_version):
+		self.version = version
+		self.filename = None
+		self.clear()
+
+	def clear(self):
+		""" Forgets the answers, but not the file """
+		self.known = {}
+		self.added = {}
+		self.hits = 0
+		self.disk_hits = 0
+		self.misses = 0
+
+	def open(self, filename):
+		""" Adds the answers kept in filename, and keeps the new ones there """
+		self.filename = filename
+		self.known.update(self.read())
+
+	def read(self):
+		try:
+			oraclefile = open(self.filename, 'rb')
+			try:
+				answers = marshal.load(oraclefile)
+			finally:
+				oraclefile.close()
+			if isinstance(answers, dict):
+				return answers
+		except (IOError, EOFError, ValueError, TypeError):
+			pass
+		return {}
+
+	def save(self):
+		""" Adds the answers worked out since the last save to the file, """
+		""" along with those other processes have added there meanwhile. """
+		""" Returns False if the file could not be written. """
+		if self.filename is None or not self.added:
+			return True
+		answers = self.read()
+		answers.update(self.added)
+		try:
+			ensure_directory(dirname(self.filename) or '.')
+			write_atomically(self.filename, marshal.dumps(answers))
+		except (IOError, OSError):
+			return False
+		self.known.update(self.added)
+		self.added = {}
+		return True
+
+	def answer(self, key, work):
+		""" Returns the answer to key, calling work() for it if unknown """
+		try:
+			answer = self.added[key]
+			self.hits += 1
+			return answer
+		except KeyError:
+			pass
+		try:
+			answer = self.known[key]
+			self.disk_hits += 1
+		except KeyError:
+			answer = work()
+			self.misses += 1
+			self.added[key] = answer
+		return answer
+
+	def compose(self, base, marks):
+		""" Returns the single character that NFC produces from base followed """
+		""" by the marks in some order, or None if no order composes """
+		classes = map(mark_combining_class, marks)
+		codepoints = tuple(map(ord, marks))
+		if None not in classes and len(set(classes)) == len(classes):
+			codepoints = tuple(sorted(codepoints))
+		key = ('compose', self.version, base and ord(base) or None, codepoints)
+		return self.answer(key, lambda: compose_marks(base, marks))
+
+	def recompose(self, codepoints):
+		""" Returns the single character that NFC makes of the sequence of """
+		""" codepoints, in that order, or None """
+		def work():
+			normalized = normalize('NFC', u"".join(map(unichr, codepoints)))
+			if len(normalized) == 1:
+				return normalized
+			return None
+		return self.answer(('recompose', self.version, tuple(codepoints)), work)
+
+oracle = CompositionOracle()
+
+markclasses = {}
+
+def mark_combining_class(mark):
+	""" Returns the canonical combining class of mark, when mark decomposes """
+	""" to a single character with a non-zero class; otherwise None, """
+	""" as canonical ordering never moves mark past its neighbours then. """
+	try:
+		return markclasses[mark]
+	except KeyError:
+		pass
+	markclass = None
+	decomposed = normalize('NFD', mark)
+	if len(decomposed) == 1 and combining(decomposed) != 0:
+		markclass = combining(decomposed)
+	markclasses[mark] = markclass
+	return markclass
+
+def canonical_orders(marks):
+	""" Yields each distinct canonical ordering of marks once, as a list, """
+	""" without going through the permutations canonical ordering makes """
+	""" equal: a mark with a combining class only follows another such mark """
+	""" of a class no higher, and a repeated mark is placed once per place. """
+	""" The orders come in the order of the marks they start with. """
+	classes = dict([ (mark, mark_combining_class(mark)) for mark in marks ])
+	def extend(ordered, remaining, previous):
+		if not remaining:
+			yield ordered
+			return
+		placed = set()
+		for i in range(len(remaining)):
+			mark = remaining[i]
+			markclass = classes[mark]
+			if mark in placed or (markclass is not None and previous is not None and markclass < previous):
+				continue
+			placed.add(mark)
+			for order in extend(ordered + [mark], remaining[:i] + remaining[i + 1:], markclass):
+				yield order
+	return extend([], list(marks), None)
+
+def compose_marks(base, marks):
+	""" CompositionOracle.compose(), without the oracle. """
+	""" All orders of marks with distinct, non-zero combining classes are """
+	""" canonically equivalent, so one normalization decides those. """
+	""" Otherwise the order matters (repeated classes, class 0 or multi- """
+	""" character decompositions), and each distinct canonical ordering is """
+	""" normalized in turn, up to COMPOSE_MAXORDERS of them. """
+	classes = map(mark_combining_class, marks)
+	if None not in classes and len(set(classes)) == len(classes):
+		normalized = normalize('NFC', base + "".join(marks))
+		if len(normalized) == 1:
+			return normalized
+		return None
+	tries = 0
+	for ordered in canonical_orders(marks):
+		normalized = normalize('NFC', base + "".join(ordered))
+		if len(normalized) == 1:
+			return normalized
+		tries += 1
+		if tries == COMPOSE_MAXORDERS:
+			break
+	return None
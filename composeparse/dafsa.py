@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/dafsa.py
+#
+# The table sequences as a minimized prefix automaton (a DAFSA), for --dafsa.
+# Sequences that end the same way, with the same result, share their states,
+# and each state keeps its outgoing keysyms sorted, so that a keystroke is
+# one binary search among the keysyms that may follow.
+#
+# The automaton is serialized as one array of units, the root at 0. A state is
+#
+#	header			number of keysyms << 3 | leaves << 2 | wide << 1 | final
+#	codepoint		if final; two units (high, low) if also wide
+#	keysym, state		for each keysym, in increasing order; state is
+#				the index of the state it leads to or, in a state
+#				with the leaves bit, the codepoint that ends there
+#
+# A state has the leaves bit when each of its keysyms completes a sequence
+# that nothing else extends; the final states past it are then not laid out.
+# The units are guint16, or guint32 if a keysym or an index does not fit.
+
+from array		import array
+
+""" The bits of the header of a state """
+DAFSA_FINAL = 1
+DAFSA_WIDE = 2
+DAFSA_LEAVES = 4
+DAFSA_SHIFT = 3
+
+class DafsaError(Exception):
+	""" Raised when the serialized automaton does not give back the sequences """
+	def __init__(self, keysyms, expected, found):
+		Exception.__init__(self, keysyms, expected, found)
+		self.keysyms = keysyms
+		self.expected = expected
+		self.found = found
+
+	def __str__(self):
+		return "The prefix automaton does not round-trip sequence %(keysyms)s: " \
+			"expected %(expected)s, found %(found)s" \
+		% { 'keysyms': " ".join([ "0x%04X" % k for k in self.keysyms ]),
+		    'expected': self.expected, 'found': self.found }
+
+class Dafsa(object):
+	""" The automaton of the table of a SequenceSet, keyed by the values of """
+	""" the keysyms as found in gdkkeysyms.h (see SequenceSet.values_table) """
+	def __init__(self, sequences):
+		self.sequences = sequences.values_table()
+
+		""" The trie; a state is [ codepoint or None, { keysym: state } ] """
+		root = [ None, {} ]
+		self.trie_states = 1
+		for (keys, codepoint) in self.sequences.iteritems():
+			state = root
+			for key in keys:
+				following = state[1].get(key)
+				if following is None:
+					following = state[1][key] = [ None, {} ]
+					self.trie_states += 1
+				state = following
+			state[0] = codepoint
+
+		""" Merge the states that accept the same endings with the same results """
+		self.states = []
+		register = {}
+		def minimize(state):
+			signature = (state[0], tuple([ (key, minimize(following))
+				for (key, following) in sorted(state[1].iteritems()) ]))
+			number = register.get(signature)
+			if number is None:
+				number = register[signature] = len(self.states)
+				self.states.append(signature)
+			return number
+		minimize(root)
+		self.edges = sum([ len(edges) for (codepoint, edges) in self.states ])
+		self.units = self.serialize()
+
+	def is_leaf(self, number):
+		""" Whether the state completes a sequence, of a codepoint that fits """
+		""" a unit, and leads nowhere """
+		(codepoint, edges) = self.states[number]
+		return not edges and codepoint is not None and codepoint <= 0xFFFF
+
+	def serialize(self):
+		""" Lays out the states that are needed, the root (numbered last) first """
+		states = self.states
+		leaves = [ bool(edges) and not [ following for (key, following) in edges
+				if not self.is_leaf(following) ]
+			for (codepoint, edges) in states ]
+		needed = [ False ] * len(states)
+		needed[-1] = True
+		for number in range(len(states) - 1, -1, -1):
+			if needed[number] and not leaves[number]:
+				for (key, following) in states[number][1]:
+					needed[following] = True
+		order = [ number for number in range(len(states) - 1, -1, -1) if needed[number] ]
+
+		positions = [ 0 ] * len(states)
+		position = 0
+		for number in order:
+			(codepoint, edges) = states[number]
+			positions[number] = position
+			position += 1 + 2 * len(edges)
+			if codepoint is not None:
+				position += 1 + (codepoint > 0xFFFF)
+		largest = max([ position ] +
+			[ len(edges) << DAFSA_SHIFT | 7 for (codepoint, edges) in states ] +
+			[ key for (codepoint, edges) in states for (key, following) in edges ])
+
+		units = array(largest > 0xFFFF and 'I' or 'H')
+		for number in order:
+			(codepoint, edges) = states[number]
+			header = len(edges) << DAFSA_SHIFT
+			if leaves[number]:
+				header |= DAFSA_LEAVES
+			if codepoint is None:
+				units.append(header)
+			elif codepoint > 0xFFFF:
+				units.extend([ header | DAFSA_WIDE | DAFSA_FINAL, codepoint >> 16, codepoint & 0xFFFF ])
+			else:
+				units.extend([ header | DAFSA_FINAL, codepoint ])
+			for (key, following) in edges:
+				if leaves[number]:
+					units.extend([ key, states[following][0] ])
+				else:
+					units.extend([ key, positions[following] ])
+		self.laid_out = len(order)
+		return units
+
+	def size(self):
+		""" Returns the bytes taken by the serialized automaton """
+		return len(self.units) * self.units.itemsize
+
+	def ctype(self):
+		return self.units.itemsize == 2 and 'guint16' or 'guint32'
+
+	def verify(self):
+		""" Decodes the serialized automaton, and checks that it holds exactly """
+		""" the sequences it was built from. Returns the decoder. """
+		decoder = DafsaDecoder(self.units)
+		for (keys, codepoint) in self.sequences.iteritems():
+			found = decoder.lookup(keys)
+			if found != codepoint:
+				raise DafsaError(keys, codepoint, found)
+		for (keys, codepoint) in decoder.items():
+			if self.sequences.get(keys) != codepoint:
+				raise DafsaError(keys, self.sequences.get(keys), codepoint)
+		return decoder
+
+class DafsaDecoder(object):
+	""" Reads a serialized automaton, as gtkimcontextsimple.c would. Counts """
+	""" the keysyms compared against in comparisons. """
+	def __init__(self, units):
+		self.units = units
+		self.comparisons = 0
+
+	def state(self, position):
+		""" Returns the codepoint of the state at position (or None), the """
+		""" position and number of its keysyms, and whether it has the leaves bit. """
+		""" A position below zero is a leaf, of codepoint -position - 1. """
+		if position < 0:
+			return (-position - 1, 0, 0, False)
+		units = self.units
+		header = units[position]
+		leaves = bool(header & DAFSA_LEAVES)
+		if not header & DAFSA_FINAL:
+			return (None, position + 1, header >> DAFSA_SHIFT, leaves)
+		if header & DAFSA_WIDE:
+			return (units[position + 1] << 16 | units[position + 2], position + 3, header >> DAFSA_SHIFT, leaves)
+		return (units[position + 1], position + 2, header >> DAFSA_SHIFT, leaves)
+
+	def step(self, position, keysym):
+		""" Returns the position of the state keysym leads to, or None """
+		units = self.units
+		(codepoint, base, count, leaves) = self.state(position)
+		low = 0
+		high = count
+		while low < high:
+			middle = (low + high) // 2
+			self.comparisons += 1
+			key = units[base + 2 * middle]
+			if key == keysym:
+				if leaves:
+					return -units[base + 2 * middle + 1] - 1
+				return units[base + 2 * middle + 1]
+			if key < keysym:
+				low = middle + 1
+			else:
+				high = middle
+		return None
+
+	def lookup(self, keysyms):
+		""" Returns the codepoint the sequence of keysym values composes, or None """
+		position = 0
+		for keysym in keysyms:
+			position = self.step(position, keysym)
+			if position is None:
+				return None
+		return self.state(position)[0]
+
+	def items(self):
+		""" Yields each sequence, as a tuple of keysym values, with its codepoint """
+		pending = [ ((), 0) ]
+		while pending:
+			(keys, position) = pending.pop()
+			(codepoint, base, count, leaves) = self.state(position)
+			if codepoint is not None:
+				yield (keys, codepoint)
+			for i in range(count - 1, -1, -1):
+				following = self.units[base + 2 * i + 1]
+				if leaves:
+					following = -following - 1
+				pending.append((keys + (self.units[base + 2 * i],), following))
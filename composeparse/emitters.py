@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/emitters.py
+#
+# Writes out the tables: gtkimcontextsimpleseqs.h (--gtk), the table of
+# sequences that produce several characters (--multiple), the win32 table
+# (--win32), the prefix automaton (--dafsa), the perfect hash
+# (--perfect-hash) and the list of algorithmic sequences (--algorithmic).
+
+from re			import match, sub
+from string		import atoi
+from array		import array
+
+import sys
+
+from composeparse.sequences import WIDTHOFCOMPOSETABLE
+
+headerfile_start = """/* GTK - The GIMP Tool Kit
+ * Copyright (C) 2007, 2008, 2009 GNOME Foundation
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the
+ * Free Software Foundation, Inc., 59 Temple Place - Suite 330,
+ * Boston, MA 02111-1307, USA.
+ */
+
+/*
+ * File auto-generated from script found at http://bugzilla.gnome.org/show_bug.cgi?id=321896
+ * using the input files
+ *  Input   : http://gitweb.freedesktop.org/?p=xorg/lib/libX11.git;a=blob_plain;f=nls/en_US.UTF-8/Compose.pre
+ *  Input   : http://www.cl.cam.ac.uk/~mgk25/ucs/keysyms.txt
+ *  Input   : http://www.unicode.org/Public/UNIDATA/UnicodeData.txt
+ *
+ * This table is optimised for space and requires special handling to access the content.
+ * This table is used solely by http://svn.gnome.org/viewcvs/gtk%2B/trunk/gtk/gtkimcontextsimple.c
+ * 
+ * The resulting file is placed at http://svn.gnome.org/viewcvs/gtk%2B/trunk/gtk/gtkimcontextsimpleseqs.h
+ * This file is described in bug report http://bugzilla.gnome.org/show_bug.cgi?id=321896
+ */
+
+/*
+ * Modified by the GTK+ Team and others 2007, 2008, 2009.  See the AUTHORS
+ * file for a list of people on the GTK+ Team.  See the ChangeLog
+ * files for a list of changes.  These files are distributed with
+ * GTK+ at ftp://ftp.gtk.org/pub/gtk/.
+ */
+
+#ifndef __GTK_IM_CONTEXT_SIMPLE_SEQS_H__
+#define __GTK_IM_CONTEXT_SIMPLE_SEQS_H__
+
+/* === These are the original comments of the file; we keep for historical purposes ===
+ *
+ * The following table was generated from the X compose tables include with
+ * XFree86 4.0 using a set of Perl scripts. Contact Owen Taylor <otaylor@redhat.com>
+ * to obtain the relevant perl scripts.
+ *
+ * The following compose letter letter sequences confliced
+ *   Dstroke/dstroke and ETH/eth; resolved to Dstroke (Croation, Vietnamese, Lappish), over
+ *                                ETH (Icelandic, Faroese, old English, IPA)  [ D- -D d- -d ]
+ *   Amacron/amacron and ordfeminine; resolved to ordfeminine                 [ _A A_ a_ _a ]
+ *   Amacron/amacron and Atilde/atilde; resolved to atilde                    [ -A A- a- -a ]
+ *   Omacron/Omacron and masculine; resolved to masculine                     [ _O O_ o_ _o ]
+ *   Omacron/omacron and Otilde/atilde; resolved to otilde                    [ -O O- o- -o ]
+ *
+ * [ Amacron and Omacron are in Latin-4 (Baltic). ordfeminine and masculine are used for
+ *   spanish. atilde and otilde are used at least for Portuguese ]
+ *
+ *   at and Aring; resolved to Aring                                          [ AA ]
+ *   guillemotleft and caron; resolved to guillemotleft                       [ << ]
+ *   ogonek and cedilla; resolved to cedilla                                  [ ,, ]
+ *
+ * This probably should be resolved by first checking an additional set of compose tables
+ * that depend on the locale or selected input method.
+ */
+
+static const guint16 gtk_compose_seqs_compact[] = {"""
+
+headerfile_wide_middle = """};
+
+/* The sequences with a keysym or a codepoint past 0xFFFF, laid out the same
+ * way as gtk_compose_seqs_compact, in 32-bit cells. */
+static const gint gtk_compose_seqs_compact_32bit_index_size = %d;
+
+static const guint32 gtk_compose_seqs_compact_32bit[] = {"""
+
+headerfile_end = """};
+
+#endif /* __GTK_IM_CONTEXT_SIMPLE_SEQS_H__ */
+"""
+
+multipleseqs_file_start = """/* GTK - The GIMP Tool Kit
+ * Copyright (C) 2007, 2008, 2009 GNOME Foundation
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the
+ * Free Software Foundation, Inc., 59 Temple Place - Suite 330,
+ * Boston, MA 02111-1307, USA.
+ */
+
+/* This file is gtkimcontextsimplemultiseqs.h.
+ * This table is for compose sequences that produce two or more characters.
+ * These sequences where extracted from the upstream Compose file from X.Org.
+ * This file was generated with http://svn.gnome.org/svn/gtk+/trunk/gtk/compose-parse.py
+ *
+ * The sequences are grouped by their number of keysyms. For each group,
+ * gtk_compose_seqs_multi_index has the number of keysyms n, the offset of
+ * the first row in gtk_compose_seqs_multi and the number of rows. A row is
+ * n keysyms and the offset of the result in gtk_compose_seqs_multi_results,
+ * where each result is its number of characters followed by the characters.
+ * The rows of a group are sorted by keysyms, so a sequence is found with one
+ * binary search in its group.
+ */
+"""
+
+multipleseqs_array = """static const %s %s[] = {"""
+
+multipleseqs_file_end = """};
+"""
+
+
+
+win32seqs_file_start = """/* GTK - The GIMP Tool Kit
+ * Copyright (C) 2007, 2008, 2009 GNOME Foundation
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the
+ * Free Software Foundation, Inc., 59 Temple Place - Suite 330,
+ * Boston, MA 02111-1307, USA.
+ */
+
+/* This file is gtkimcontextsimplewin32seqs.h.
+ * This table is for compose sequences to be used on Win32 systems.
+ * These sequences where extracted from the file gtk-win32-sequences.txt
+ * This file was generated with http://svn.gnome.org/svn/gtk+/trunk/gtk/compose-parse.py
+ */
+"""
+
+win32seqs_file_middle = """static const guint16 gtk_compose_seqs_win32[] = {"""
+
+win32seqs_file_end = """};
+"""
+
+dafsaseqs_file_start = """/* GTK - The GIMP Tool Kit
+ * Copyright (C) 2007, 2008, 2009 GNOME Foundation
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the
+ * Free Software Foundation, Inc., 59 Temple Place - Suite 330,
+ * Boston, MA 02111-1307, USA.
+ */
+
+/* This file is gtkimcontextsimpledafsa.h.
+ * It holds the same sequences as gtk_compose_seqs_compact, as a minimized
+ * prefix automaton. This file was generated with
+ * http://svn.gnome.org/svn/gtk+/trunk/gtk/compose-parse.py
+ *
+ * The root state is at index 0. A state is laid out as
+ *   header          (number of keysyms << 3) | (leaves << 2) | (wide << 1) | final
+ *   codepoint       if final; two units, high then low, if also wide
+ *   keysym, state   for each keysym that may follow, in increasing order of
+ *                   keysym; state is the index of the state it leads to, or
+ *                   with the leaves bit, the codepoint the sequence composes
+ * A sequence composes the codepoint of the final state it ends in.
+ */
+"""
+
+dafsaseqs_file_middle = """static const %s gtk_compose_dafsa[] = {"""
+
+dafsaseqs_file_end = """};
+"""
+
+hashseqs_file_start = """/* GTK - The GIMP Tool Kit
+ * Copyright (C) 2007, 2008, 2009 GNOME Foundation
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the
+ * Free Software Foundation, Inc., 59 Temple Place - Suite 330,
+ * Boston, MA 02111-1307, USA.
+ */
+
+/* This file is gtkimcontextsimplehash.h.
+ * It holds the same sequences as gtk_compose_seqs_compact, in a minimal
+ * perfect hash. This file was generated with
+ * http://svn.gnome.org/svn/gtk+/trunk/gtk/compose-parse.py
+ *
+ * To look up the keysyms k[0..n-1] of a full sequence:
+ *   hash(k, seed) is FNV-1a over the keysyms as 32-bit words, starting from
+ *   0x811C9DC5 ^ seed, followed by the MurmurHash3 finalizer (fmix32);
+ *   with s = compose_hash_seed,
+ *   d = gtk_compose_hash_displacements[hash(k, 3 * s) % compose_hash_buckets];
+ *   with n = compose_hash_slots, f1 = hash(k, 3 * s + 1) % n and
+ *   f2 = hash(k, 3 * s + 2) % n,
+ *   slot = d < 0 ? -d - 1 : (f1 + (d / n) * f2 + d % n) % n, in guint64;
+ * the sequence is in the table if the compose_hash_width keysyms at
+ * gtk_compose_hash_keys[slot * compose_hash_width] are k, padded with 0,
+ * and it composes gtk_compose_hash_values[slot].
+ */
+"""
+
+hashseqs_file_end = """};
+"""
+
+def convert_UnotationToHex(arg):
+	if isinstance(arg, str):
+		if match('^U[0-9A-F][0-9A-F][0-9A-F][0-9A-F]$', arg):
+			return sub('^U', '0x', arg)
+	return arg
+
+def addprefix_GDK(arg):
+	if match('^0x', arg):
+		return '%(arg)s, ' % { 'arg': arg } 
+	else:
+		return 'GDK_%(arg)s, ' % { 'arg': arg } 
+
+def convert_unotation_to_hex(var):
+	return "0x%04X" % atoi(var[1:], 16)
+
+class GTKTableEmitter(object):
+	""" Emits gtkimcontextsimpleseqs.h: an index of the first keysyms, with """
+	""" the offsets of the rows for each sequence length, then the rows. """
+	""" With plane1table, the sequences that do not fit 16 bits go to a """
+	""" second table of 32-bit cells, gtk_compose_seqs_compact_32bit. """
+	def __init__(self, keysyms, expanded = False, numeric = False, plane1table = False):
+		self.keysyms = keysyms
+		self.expanded = expanded
+		self.numeric = numeric
+		self.plane1table = plane1table
+
+	def index(self, sequences):
+		""" Returns the index of the table: for each first keysym, its name """
+		""" and the offsets of its rows of 2, 3, ... keysyms, and the end """
+		store = sequences.store
+		table = sequences.table()
+		(num_entries, counter_multikey, num_first_keysyms, zeroes) = sequences.statistics()
+
+		compose_table = []
+		start_offset = num_first_keysyms * (WIDTHOFCOMPOSETABLE+1)
+
+		first_keysym = None
+		for row in table:
+			ids = store.row_ids(row)
+			if ids[0] != first_keysym:
+				first_keysym = ids[0]				# Set the first keysym
+				compose_table.append([store.names[first_keysym], 0, 0, 0, 0, 0])
+			compose_table[-1][len(ids)-1] += 1
+
+		ct_index = start_offset
+		for line_num in range(len(compose_table)):
+			for i in range(WIDTHOFCOMPOSETABLE):
+				occurences = compose_table[line_num][i+1]
+				compose_table[line_num][i+1] = ct_index
+				ct_index += occurences * (i+2)
+		return compose_table
+
+	def compact(self, sequences, typecode = 'H', wide_offsets = False):
+		""" Returns gtk_compose_seqs_compact as the compiler lays it out: an """
+		""" array of guint16, values truncated to 16 bits as C would (or of """
+		""" guint32, with typecode 'I'). Also returns the number of first """
+		""" keysyms (n_index_size). The offsets of the index are truncated """
+		""" too, as in the header emit() writes, so that the lookups of a """
+		""" table of more cells than they address go wrong here as well. """
+		""" With wide_offsets, such a table comes in an array of guint32 """
+		""" instead, the keysyms and codepoints still truncated, so that it """
+		""" can be looked up as it would be with wide enough offsets. """
+		store = sequences.store
+		compose_table = self.index(sequences)
+		mask = (1 << 8 * array(typecode).itemsize) - 1
+		offsetmask = mask
+		if wide_offsets and compose_table and compose_table[-1][-1] > mask:
+			typecode = 'I'
+			offsetmask = 0xFFFFFFFF
+		data = array(typecode)
+		for i in compose_table:
+			data.append(self.keysyms.value(i[0]) & mask)
+			data.extend([ offset & offsetmask for offset in i[1:] ])
+		values = store.values
+		codepoints = store.codepoints
+		for row in sequences.table():
+			data.extend([ values[ks] & mask for ks in store.row_ids(row)[1:] ])
+			data.append(codepoints[row] & mask)
+		return (data, len(compose_table))
+
+	def emit(self, sequences, out = None):
+		""" Writes the header for sequences, a SequenceSet, to out (default stdout) """
+		if out is None:
+			out = sys.stdout
+		out.write(headerfile_start + "\n")
+		if self.plane1table:
+			(narrow, wide) = sequences.split_wide()
+			self.emit_table(narrow, out)
+			out.write(headerfile_wide_middle % wide.statistics()[2] + "\n")
+			self.emit_table(wide, out)
+		else:
+			self.emit_table(sequences, out)
+		out.write(headerfile_end + "\n")
+
+	def emit_table(self, sequences, out):
+		""" Writes the index and the rows of the table of sequences """
+		store = sequences.store
+		table = sequences.table()
+		compose_table = self.index(sequences)
+
+		""" The keysyms as they are written, worked out once per keysym; """
+		""" those past 16 bits have no GDK_ name """
+		if self.numeric:
+			written = [ '0x%04X, ' % value for value in store.values ]
+		else:
+			written = [ value > 0xFFFF and '0x%04X, ' % value or addprefix_GDK(convert_UnotationToHex(name))
+				for (name, value) in zip(store.names, store.values) ]
+
+		for i in compose_table:
+			offsets = "".join([ str(x) + ", " for x in i[1:] ])
+			if self.expanded or self.keysyms.value(i[0]) > 0xFFFF:
+				out.write("0x%04X, %s\n" % (self.keysyms.value(i[0]), offsets))
+			elif not match('^0x', i[0]):
+				out.write("GDK_%s, %s\n" % (i[0], offsets))
+			else:
+				out.write("%s, %s\n" % (i[0], offsets))
+		codepoints = store.codepoints
+		if self.numeric:
+			# One space more between the cells, as the print statements had.
+			for row in table:
+				out.write(" ".join([ written[ks] for ks in store.row_ids(row)[1:] ]
+					+ [ '0x%04X, \n' % codepoints[row] ]))
+		elif self.expanded:
+			for row in table:
+				out.write("%s0x%04X, \n" % ("".join([ written[ks] for ks in store.row_ids(row) ]), codepoints[row]))
+		else:
+			for row in table:
+				out.write("%s0x%04X, \n" % ("".join([ written[ks] for ks in store.row_ids(row)[1:] ]), codepoints[row]))
+
+class MultiTableEmitter(object):
+	""" Emits gtkimcontextsimplemultiseqs.h, for the sequences that """
+	""" produce two or more characters """
+	ctypes = { 'H': 'guint16', 'I': 'guint32' }
+
+	def emit_array(self, name, items, cells, out):
+		""" Writes the array items, a row of cells(items) at a time """
+		out.write(multipleseqs_array % (self.ctypes[items.typecode], name) + "\n")
+		i = 0
+		while i < len(items):
+			n = cells(i)
+			out.write(" ".join([ "0x%04X," % item for item in items[i:i + n] ]) + "\n")
+			i += n
+		out.write(multipleseqs_file_end + "\n")
+
+	def emit(self, multitable, out = None):
+		""" Writes the header for multitable, a MultiTable, to out (default stdout) """
+		if out is None:
+			out = sys.stdout
+		out.write(multipleseqs_file_start + "\n")
+		out.write("static const gint compose_multi_max_sequence_len = %d;\n" % multitable.maxseqlen)
+		out.write("static const gint compose_multi_max_codepoint_len = %d;\n" % multitable.maxvallen)
+		out.write("static const gint compose_multi_index_size = %d;\n\n" % multitable.groups)
+		self.emit_array("gtk_compose_seqs_multi_index", multitable.index, lambda i: 3, out)
+		""" One row per line, the groups in order of length """
+		lengths = []
+		for g in range(0, len(multitable.index), 3):
+			lengths.extend([ multitable.index[g] ] * multitable.index[g + 2])
+		rows = iter(lengths)
+		self.emit_array("gtk_compose_seqs_multi", multitable.rows, lambda i: rows.next() + 1, out)
+		results = multitable.results
+		self.emit_array("gtk_compose_seqs_multi_results", results, lambda i: results[i] + 1, out)
+
+class Win32TableEmitter(object):
+	""" Emits gtkimcontextsimplewin32seqs.h, from gtk-win32-sequences.txt """
+	def emit(self, sequences, out = None):
+		""" Writes the header for sequences, a SequenceSet, in the order added, """
+		""" to out (default stdout) """
+		if out is None:
+			out = sys.stdout
+		out.write(win32seqs_file_start + "\n")
+		out.write(win32seqs_file_middle + "\n")
+		padding = [ "%18s" % "" ] * 5
+		for row in sequences.rows():
+			seq = sequences.store.sequence(row)
+			cells = [ "%18s" % ("GDK_%s, " % sym) for sym in seq[:-1] ] + padding[len(seq[:-1]):]
+			cells.append("0x%04d, " % seq[-1])
+			out.write(" ".join(cells) + "\n")
+		out.write(win32seqs_file_end + "\n")
+
+class DafsaTableEmitter(object):
+	""" Emits gtkimcontextsimpledafsa.h, the table sequences as a Dafsa """
+	def emit(self, dafsa, out = None):
+		""" Writes the header for dafsa to out (default stdout), eight units a line """
+		if out is None:
+			out = sys.stdout
+		out.write(dafsaseqs_file_start + "\n")
+		out.write(dafsaseqs_file_middle % dafsa.ctype() + "\n")
+		units = [ "0x%04X," % unit for unit in dafsa.units ]
+		for i in range(0, len(units), 8):
+			out.write(" ".join(units[i:i + 8]) + "\n")
+		out.write(dafsaseqs_file_end + "\n")
+
+class PerfectHashEmitter(object):
+	""" Emits gtkimcontextsimplehash.h, the table sequences as a PerfectHash """
+	ctypes = { 'h': 'gint16', 'i': 'gint32', 'H': 'guint16', 'I': 'guint32' }
+
+	def emit_array(self, name, items, per_line, out):
+		out.write("static const %s %s[] = {\n" % (self.ctypes[items.typecode], name))
+		if items.typecode in 'hi':
+			cells = [ "%6d," % item for item in items ]
+		else:
+			cells = [ "0x%04X," % item for item in items ]
+		for i in range(0, len(cells), per_line):
+			out.write(" ".join(cells[i:i + per_line]) + "\n")
+		out.write(hashseqs_file_end + "\n")
+
+	def emit(self, perfecthash, out = None):
+		""" Writes the header for perfecthash to out (default stdout) """
+		if out is None:
+			out = sys.stdout
+		out.write(hashseqs_file_start + "\n")
+		out.write("static const guint32 compose_hash_seed = %d;\n" % perfecthash.seed)
+		out.write("static const gint compose_hash_buckets = %d;\n" % perfecthash.buckets)
+		out.write("static const gint compose_hash_slots = %d;\n" % perfecthash.slots)
+		out.write("static const gint compose_hash_width = %d;\n\n" % WIDTHOFCOMPOSETABLE)
+		self.emit_array("gtk_compose_hash_displacements", perfecthash.displacements, 8, out)
+		self.emit_array("gtk_compose_hash_keys", perfecthash.keys, WIDTHOFCOMPOSETABLE, out)
+		self.emit_array("gtk_compose_hash_values", perfecthash.values, 8, out)
+
+class AlgorithmicListEmitter(object):
+	""" Lists the sequences that normalization produces, in the format of """
+	""" --unicodedatatxt, so that the two can be compared """
+	def emit(self, algorithmic_uniqued, out = None):
+		if out is None:
+			out = sys.stdout
+		for sequence in algorithmic_uniqued:
+			letter = unichr(sequence[-1])
+			cells = [ u'0x%04X, %s, seq: [ <0x%04X>,' % (sequence[-1], letter, sequence[-2]) ]
+			cells += [ "<0x%04X>," % elem for elem in sequence[:-2] ]
+			# Yeah, verified... We just want to keep the output similar to -u, so we can compare/sort easily 
+			cells.append(u"], recomposed as %s verified\n" % letter)
+			out.write(u" ".join(cells).encode('utf-8'))
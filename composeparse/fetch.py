@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/fetch.py
+#
+# Fetches the input files into a content-addressed cache: the contents of
+# each file go to objects/<SHA-1 of the contents>, and index.json maps each
+# URL to the object it gave last, with the ETag and Last-Modified of the
+# response. An entry older than FETCH_MAXAGE is revalidated with a
+# conditional GET; a 304 keeps the object. Each URL downloads in a thread
+# of its own, so that a file can be parsed while the others still download.
+# With a mirror directory nothing goes to the network: each file is read
+# from there, by the name source_filename() gives it.
+#
+# Processes may share the cache directory: the objects and index.json are
+# replaced by rename, so readers see them whole, and the updates of
+# index.json are serialized by a lock on index.lock (fcntl.flock, where
+# there is fcntl; elsewhere only the threads of one process are).
+
+from os			import rename, makedirs, getpid
+from os.path		import isfile, isdir, join, basename, getmtime
+from urlparse		import urlparse, parse_qs
+from threading		import Thread, Lock, Event
+from email.utils	import formatdate
+from hashlib		import sha1
+from time		import time
+
+import sys
+import json
+import errno
+import urllib2
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+""" The cache directory, relative to the current directory """
+FETCH_CACHEDIR = 'compose-parse.cache'
+
+""" Seconds before a cached file is revalidated """
+FETCH_MAXAGE = 24 * 60 * 60
+
+""" Seconds to wait for a server """
+FETCH_TIMEOUT = 60
+
+class FetchError(Exception):
+	""" Raised when a file can neither be downloaded nor found in the cache, """
+	""" or when its contents do not have the expected checksum """
+	def __init__(self, url, reason):
+		Exception.__init__(self, url, reason)
+		self.url = url
+		self.reason = reason
+
+	def __str__(self):
+		return "Could not fetch %(url)s: %(reason)s" % { 'url': self.url, 'reason': self.reason }
+
+def source_filename(url):
+	""" Returns the name of the file at url: the last segment of its path, """
+	""" or of the f= parameter of a gitweb query """
+	parts = urlparse(url)
+	path = parse_qs(parts.query).get('f', [ parts.path ])[0]
+	return basename(path) or parts.netloc
+
+def ensure_directory(directory):
+	""" Creates directory, unless it exists """
+	try:
+		makedirs(directory)
+	except OSError, e:
+		if e.errno != errno.EEXIST or not isdir(directory):
+			raise
+
+def write_atomically(filename, data):
+	""" Writes data to filename through a temporary file, so that readers """
+	""" (other processes included) see either the old or the new contents """
+	temporary = "%s.%d.tmp" % (filename, getpid())
+	outputfile = open(temporary, 'wb')
+	outputfile.write(data)
+	outputfile.close()
+	rename(temporary, filename)
+
+class ContentCache(object):
+	""" The objects, named by the SHA-1 of their contents, and the index """
+	""" of the URLs they came from """
+	def __init__(self, directory = FETCH_CACHEDIR):
+		self.directory = directory
+		self.lock = Lock()
+
+	def path(self, digest):
+		return join(self.directory, 'objects', digest)
+
+	def read_index(self):
+		try:
+			indexfile = open(join(self.directory, 'index.json'), 'rb')
+			try:
+				return json.load(indexfile)
+			finally:
+				indexfile.close()
+		except (IOError, ValueError):
+			return {}
+
+	def entry(self, url):
+		""" Returns the index entry of url, or None """
+		self.lock.acquire()
+		try:
+			return self.read_index().get(url)
+		finally:
+			self.lock.release()
+
+	def record(self, url, entry):
+		""" Sets the index entry of url """
+		self.lock.acquire()
+		try:
+			ensure_directory(self.directory)
+			lockfile = open(join(self.directory, 'index.lock'), 'a')
+			try:
+				if fcntl is not None:
+					fcntl.flock(lockfile.fileno(), fcntl.LOCK_EX)
+				index = self.read_index()
+				index[url] = entry
+				write_atomically(join(self.directory, 'index.json'),
+					json.dumps(index, indent = 1, sort_keys = True) + "\n")
+			finally:
+				lockfile.close()
+		finally:
+			self.lock.release()
+
+	def store(self, data):
+		""" Adds data as an object, unless there intact. Returns its digest. """
+		digest = sha1(data).hexdigest()
+		if not self.verify(digest):
+			ensure_directory(join(self.directory, 'objects'))
+			write_atomically(self.path(digest), data)
+		return digest
+
+	def has(self, digest):
+		""" Whether the object is there; its name is trusted for its contents """
+		return isfile(self.path(digest))
+
+	def verify(self, digest):
+		""" Whether the object is there, with the contents its name says """
+		try:
+			objectfile = open(self.path(digest), 'rb')
+			try:
+				return sha1(objectfile.read()).hexdigest() == digest
+			finally:
+				objectfile.close()
+		except IOError:
+			return False
+
+class Download(object):
+	""" A file being fetched; wait() returns its local filename """
+	def __init__(self, url):
+		self.url = url
+		self.filename = None
+		self.error = None
+		self.done = Event()
+
+	def wait(self):
+		self.done.wait()
+		if self.error is not None:
+			raise self.error
+		return self.filename
+
+class Fetcher(object):
+	""" Fetches URLs concurrently into a ContentCache, or reads them from """
+	""" a mirror directory. checksums maps a URL, or the name of its file, """
+	""" to the SHA-1 its contents must have. With refresh, every cached """
+	""" file is revalidated. opener is the urllib2 opener to go through. """
+	def __init__(self, cachedir = FETCH_CACHEDIR, mirror = None, refresh = False,
+			checksums = {}, quiet = False, opener = None, maxage = FETCH_MAXAGE):
+		self.cache = ContentCache(cachedir)
+		self.mirror = mirror
+		self.refresh = refresh
+		self.checksums = checksums
+		self.quiet = quiet
+		self.opener = opener or urllib2.build_opener()
+		self.maxage = maxage
+		self.downloads = {}
+		self.lock = Lock()
+		self.requests = 0
+		self.revalidated = 0
+
+	def message(self, *words):
+		if not self.quiet:
+			self.lock.acquire()
+			try:
+				print >> sys.stderr, " ".join([ str(word) for word in words ])
+			finally:
+				self.lock.release()
+
+	def start(self, urls):
+		""" Starts fetching each of urls not asked for yet """
+		self.lock.acquire()
+		try:
+			for url in urls:
+				if url not in self.downloads:
+					download = self.downloads[url] = Download(url)
+					thread = Thread(target = self.run, args = (download,))
+					thread.setDaemon(True)
+					thread.start()
+		finally:
+			self.lock.release()
+
+	def fetch(self, url):
+		""" Returns the name of the local copy of url, once fetched """
+		self.start([url])
+		return self.downloads[url].wait()
+
+	def run(self, download):
+		try:
+			try:
+				download.filename = self.retrieve(download.url)
+			except Exception, e:
+				download.error = e
+		finally:
+			download.done.set()
+
+	def expected(self, url):
+		""" Returns the SHA-1 pinned for url, or None """
+		return self.checksums.get(url, self.checksums.get(source_filename(url)))
+
+	def retrieve(self, url):
+		if self.mirror is not None:
+			return self.mirrored(url)
+		expected = self.expected(url)
+		entry = self.cache.entry(url)
+		if entry is None:
+			entry = self.adopt(url)
+		if entry is not None:
+			""" The contents are hashed again only when they have to be """
+			""" right: on --refresh, or against a pinned checksum """
+			if self.refresh or expected is not None:
+				intact = self.cache.verify(entry['object'])
+			else:
+				intact = self.cache.has(entry['object'])
+			if not intact or expected not in (None, entry['object']):
+				self.message("The cached file for", url, "is not as expected, downloading it again")
+				entry = None
+		if entry is not None and not self.refresh and time() - entry['checked'] < self.maxage:
+			self.message("Using cached file for ", url)
+			return self.cache.path(entry['object'])
+
+		request = urllib2.Request(url)
+		if entry is not None:
+			if entry.get('etag'):
+				request.add_header('If-None-Match', entry['etag'])
+			if entry.get('last_modified'):
+				request.add_header('If-Modified-Since', entry['last_modified'])
+			elif not entry.get('etag'):
+				request.add_header('If-Modified-Since', formatdate(entry['checked'], usegmt = True))
+		self.message("Downloading ", url, "...")
+		self.lock.acquire()
+		self.requests += 1
+		self.lock.release()
+		try:
+			response = self.opener.open(request, timeout = FETCH_TIMEOUT)
+			try:
+				data = response.read()
+				headers = response.info()
+			finally:
+				response.close()
+		except urllib2.HTTPError, e:
+			if e.code == 304 and entry is not None:
+				entry['checked'] = time()
+				self.cache.record(url, entry)
+				self.lock.acquire()
+				self.revalidated += 1
+				self.lock.release()
+				self.message("Cached file is up to date for", url)
+				return self.cache.path(entry['object'])
+			failure = "HTTP error %d" % e.code
+		except urllib2.URLError, e:
+			failure = str(e.reason)
+		except IOError, e:
+			failure = str(e)
+		else:
+			length = headers.getheader('Content-Length')
+			if length is not None and length.isdigit() and int(length) != len(data):
+				failure = "got %d of %s bytes" % (len(data), length)
+			else:
+				digest = sha1(data).hexdigest()
+				if expected is not None and digest != expected:
+					raise FetchError(url, "SHA-1 is %s, expected %s" % (digest, expected))
+				self.cache.store(data)
+				self.cache.record(url, { 'object': digest, 'checked': time(),
+					'etag': headers.getheader('ETag'),
+					'last_modified': headers.getheader('Last-Modified') })
+				self.message("Downloaded", len(data), "bytes from", url)
+				return self.cache.path(digest)
+
+		if entry is not None:
+			self.message("WARNING: Could not revalidate", url, "(%s), using the cached file" % failure)
+			return self.cache.path(entry['object'])
+		raise FetchError(url, failure)
+
+	def adopt(self, url):
+		""" Copies into the cache the copy of url in the current directory, as """
+		""" downloaded before the cache; that copy is left in place. Returns """
+		""" its entry, or None. """
+		filename = source_filename(url)
+		if not isfile(filename):
+			return None
+		localfile = open(filename, 'rb')
+		data = localfile.read()
+		localfile.close()
+		if not data:
+			return None
+		entry = { 'object': self.cache.store(data), 'checked': getmtime(filename),
+			  'etag': None, 'last_modified': None }
+		self.cache.record(url, entry)
+		return entry
+
+	def mirrored(self, url):
+		""" Returns the copy of url in the mirror directory """
+		filename = join(self.mirror, source_filename(url))
+		if not isfile(filename):
+			raise FetchError(url, "%s is not in the mirror directory" % basename(filename))
+		expected = self.expected(url)
+		if expected is not None:
+			mirrorfile = open(filename, 'rb')
+			digest = sha1(mirrorfile.read()).hexdigest()
+			mirrorfile.close()
+			if digest != expected:
+				raise FetchError(url, "SHA-1 of %s is %s, expected %s" % (filename, digest, expected))
+		self.message("Using mirrored file for ", url)
+		return filename
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/incremental.py
+#
+# Regenerates the table from the state the previous run left, for
+# --incremental. What a line of a Compose file turns into (a table sequence,
+# an algorithmic one, a multisequence, an include directive or nothing)
+# depends on the line and on the codepoint the line before it resolved to
+# (see ComposeParser.resolve_compose_entries), so the state keeps it under a
+# fingerprint of both, and only the lines with a new fingerprint go through
+# the parser. The rows of the table are then matched against those of the
+# previous run: the rows kept are renumbered in place in the sorted rows of
+# the previous run, the rows gone are taken out, and the new ones are put in
+# where they sort. Whatever else the lines depend on (the keysyms, the
+# version of Unicode, --plane1-table) is in the settings of the state; when
+# these differ, every line is parsed again.
+#
+# The state, in marshal format, is a dictionary of:
+#
+#	settings	the SHA-1 of the settings
+#	records		fingerprint -> record of each line seen
+#	rows		the fingerprints of the lines of the rows of the table
+#	keys		the sort key of each row (see SequenceStore.row_key)
+#	order		the rows, sorted by key, then by row
+#	table		the rows uniqued out of order (see SequenceSet.table)
+#
+# A record is a tuple of the codepoint the line leaves for the next one, its
+# kind, the sequence to print with --plane1 (or None), then what the kind
+# needs: the path of an include, the keysyms and codepoints of a
+# multisequence, the keysyms and codepoint of a table sequence, or the
+# algorithmic form of a sequence.
+
+from os.path		import realpath, dirname
+from difflib		import SequenceMatcher
+from collections	import OrderedDict
+from bisect		import insort
+from hashlib		import sha1
+
+import sys
+import marshal
+
+from composeparse.parser	import ComposeLine, ComposeInclude
+from composeparse.fetch		import ensure_directory, write_atomically
+
+""" The file of the state, in the cache directory """
+FILENAME_INCREMENTAL = 'incremental.cache'
+
+""" Changes with the layout of the state or of the records """
+INCREMENTAL_VERSION = 1
+
+""" The kinds of records """
+RECORD_NOTHING = 'nothing'
+RECORD_INCLUDE = 'include'
+RECORD_MULTIPLE = 'multiple'
+RECORD_DROPPED = 'dropped'
+RECORD_PLANE1 = 'plane1'
+RECORD_TABLE = 'table'
+RECORD_ALGORITHMIC = 'algorithmic'
+
+def match_rows(old, new):
+	""" Matches the list of fingerprints old against new. Returns, for each """
+	""" item of old, the index of the same item in new or None, and the """
+	""" indexes in new of the items that are not in old. """
+	start = 0
+	while start < len(old) and start < len(new) and old[start] == new[start]:
+		start += 1
+	end = 0
+	while end < len(old) - start and end < len(new) - start and old[-1 - end] == new[-1 - end]:
+		end += 1
+	mapping = range(start) + [ None ] * (len(old) - start - end) + range(len(new) - end, len(new))
+	added = []
+	matcher = SequenceMatcher(None, old[start:len(old) - end], new[start:len(new) - end], autojunk = False)
+	for (tag, i1, i2, j1, j2) in matcher.get_opcodes():
+		if tag == 'equal':
+			mapping[start + i1:start + i2] = range(start + j1, start + j2)
+		else:
+			added.extend(range(start + j1, start + j2))
+	return (mapping, added)
+
+class IncrementalParser(object):
+	""" Parses Compose files through parser, a ComposeParser, from the state """
+	""" of the previous run, kept in filename. The warnings of parser are """
+	""" only given for the lines parsed again. lines counts the lines read, """
+	""" reparsed those that went through parser, and removed, added and """
+	""" changed list the table sequences that differ from the previous run. """
+	def __init__(self, parser, filename):
+		self.parser = parser
+		self.filename = filename
+		self.settings = None
+		self.state = None
+		self.records = {}
+		self.seen = {}
+		self.units = {}
+		self.rows = []
+		self.keys = []
+		self.order = []
+		self.table = None
+		self.lines = 0
+		self.reparsed = 0
+		self.removed = []
+		self.added = []
+		self.changed = []
+
+	def settings_digest(self):
+		""" Returns the SHA-1 of what the lines turn into depends on, but them """
+		(keysymdb, keysymunicodedb) = self.parser.keysyms.load()
+		digest = sha1(repr((INCREMENTAL_VERSION, self.parser.oracle.version, self.parser.plane1table)))
+		digest.update(repr(sorted(keysymdb.iteritems())))
+		digest.update(repr(sorted(keysymunicodedb.iteritems())))
+		return digest.hexdigest()
+
+	def read(self):
+		""" Returns the state in filename, or None if there is none for the """
+		""" settings of this run """
+		try:
+			statefile = open(self.filename, 'rb')
+			try:
+				state = marshal.load(statefile)
+			finally:
+				statefile.close()
+		except (IOError, EOFError, ValueError, TypeError):
+			return None
+		if not isinstance(state, dict) or state.get('settings') != self.settings:
+			return None
+		return state
+
+	def save(self):
+		""" Writes the state of this run to filename. Returns False if the """
+		""" file could not be written. """
+		state = { 'settings': self.settings, 'records': self.seen, 'rows': self.rows,
+			  'keys': self.keys, 'order': self.order, 'table': self.table.tolist() }
+		try:
+			ensure_directory(dirname(self.filename) or '.')
+			write_atomically(self.filename, marshal.dumps(state))
+		except (IOError, OSError):
+			return False
+		return True
+
+	def turn(self, composeline, codepoint):
+		""" Runs composeline through the stages of the parser, after a line """
+		""" that resolved to codepoint. Returns its record. """
+		parser = self.parser
+		self.reparsed += 1
+		tokens = list(parser.tokenize_compose_lines([composeline]))
+		if not tokens:
+			return (codepoint, RECORD_NOTHING, None)
+		if isinstance(tokens[0], ComposeInclude):
+			return (codepoint, RECORD_INCLUDE, None, tokens[0].path)
+		(entry,) = parser.resolve_compose_entries(tokens, codepoint)
+		if entry.codepoint is None:
+			multisequences = parser.multisequences
+			parser.multisequences = OrderedDict()
+			try:
+				list(parser.collect_multisequences([entry]))
+				(multiseq, multicodepoint) = parser.multisequences.values()[0]
+			finally:
+				parser.multisequences = multisequences
+			return (codepoint, RECORD_MULTIPLE, None, multiseq, multicodepoint)
+
+		""" Plane1: is printed from the records, in the order of the lines """
+		plane1 = None
+		if "dead_currency" not in entry.sequence and [ name for name in entry.sequence
+				if parser.keysyms.value(name, entry.filename, entry.linenum) > 0xFFFF ]:
+			plane1 = list(entry.sequence)
+		(printing, dropped) = (parser.plane1, parser.plane1_dropped)
+		parser.plane1 = False
+		try:
+			filtered = list(parser.filter_compose_entries([entry]))
+		finally:
+			parser.plane1 = printing
+		if not filtered:
+			if parser.plane1_dropped != dropped:
+				parser.plane1_dropped = dropped
+				return (entry.codepoint, RECORD_PLANE1, plane1)
+			return (entry.codepoint, RECORD_DROPPED, plane1)
+		((entry, algorithmic),) = parser.classify_compose_entries(filtered)
+		if algorithmic is not None:
+			return (entry.codepoint, RECORD_ALGORITHMIC, plane1, algorithmic)
+		return (entry.codepoint, RECORD_TABLE, plane1, entry.sequence + [entry.codepoint])
+
+	def unit(self, filename):
+		""" Returns the lines of filename, each as (linenum, fingerprint, """
+		""" record); each file is done once """
+		key = realpath(filename)
+		unit = self.units.get(key)
+		if unit is None:
+			unit = self.units[key] = []
+			codepoint = None
+			composefile = open(filename, 'r')
+			linenum = 0
+			for line in composefile:
+				linenum += 1
+				fingerprint = sha1("%s\n%s" % (codepoint, line)).digest()
+				record = self.records.get(fingerprint)
+				if record is None:
+					record = self.turn(ComposeLine(filename, linenum, line), codepoint)
+				self.seen[fingerprint] = record
+				unit.append((linenum, fingerprint, record))
+				codepoint = record[0]
+			composefile.close()
+			self.lines += linenum
+		return unit
+
+	def expand(self, filenames, includers = ()):
+		""" Yields (fingerprint, record) for the lines of filenames, with those """
+		""" of the files they include in place of the directives """
+		for filename in filenames:
+			for (linenum, fingerprint, record) in self.unit(filename):
+				if record[1] != RECORD_INCLUDE:
+					yield (fingerprint, record)
+					continue
+				chain = includers + (realpath(filename),)
+				path = self.parser.follow_include(ComposeInclude(filename, linenum, None, record[3]), chain)
+				if path is None:
+					continue
+				for included in self.expand([path], chain):
+					yield included
+
+	def parse(self, filenames, sequences):
+		""" Parses the Compose files into sequences, a SequenceSet, and sorts """
+		""" its table. Returns sequences. """
+		parser = self.parser
+		self.settings = self.settings_digest()
+		self.state = self.read()
+		if self.state is not None:
+			self.records = self.state['records']
+		for (fingerprint, record) in self.expand(filenames):
+			kind = record[1]
+			if record[2] is not None and parser.plane1:
+				print 'Plane1:', record[2]
+			if kind == RECORD_TABLE:
+				sequences.add(list(record[3]))
+				self.rows.append(fingerprint)
+			elif kind == RECORD_ALGORITHMIC:
+				sequences.add_algorithmic(record[3])
+			elif kind == RECORD_MULTIPLE:
+				(multiseq, multicodepoint) = record[3:]
+				if parser.multisequence_maxseqlen < len(multiseq):
+					parser.multisequence_maxseqlen = len(multiseq)
+				if parser.multisequence_maxvallen < len(multicodepoint):
+					parser.multisequence_maxvallen = len(multicodepoint)
+				parser.multisequences[tuple(multiseq)] = [ list(multiseq), list(multicodepoint) ]
+			elif kind == RECORD_PLANE1:
+				parser.plane1_dropped += 1
+		if self.state is None:
+			self.sort(sequences)
+		else:
+			self.update(sequences, self.state)
+		return sequences
+
+	def sort(self, sequences):
+		""" Sorts the rows of the table of sequences from scratch """
+		store = sequences.store
+		store.resolve(sequences.keysyms)
+		self.keys = [ store.row_key(row, store.values) for row in sequences.rows() ]
+		self.order = sorted(sequences.rows(), key = self.keys.__getitem__)
+		self.table = sequences.sorted = sequences.uniq_rows(self.order)
+
+	def update(self, sequences, state):
+		""" Sorts the rows of the table of sequences from the sorted rows of """
+		""" state: only the rows that are not in both are looked at """
+		store = sequences.store
+		store.resolve(sequences.keysyms)
+		(mapping, added) = match_rows(state['rows'], self.rows)
+		self.keys = [ None ] * len(self.rows)
+		for (old, row) in enumerate(mapping):
+			if row is not None:
+				self.keys[row] = state['keys'][old]
+		for row in added:
+			self.keys[row] = store.row_key(row, store.values)
+		""" The renumbered rows keep their order, as mapping keeps it """
+		keys = self.keys
+		order = [ (keys[mapping[old]], mapping[old]) for old in state['order'] if mapping[old] is not None ]
+		for row in added:
+			insort(order, (keys[row], row))
+		self.order = [ row for (key, row) in order ]
+		self.table = sequences.sorted = sequences.uniq_rows(self.order)
+
+		""" The table sequences that come and go, as names and codepoint """
+		records = state['records']
+		before = set([ mapping[old] for old in state['table'] ])
+		after = set(self.table)
+		removed = [ records[state['rows'][old]][3] for old in state['table']
+			    if mapping[old] not in after ]
+		added = [ store.sequence(row) for row in self.table if row not in before ]
+		""" A row moved in the files is neither """
+		common = set([ tuple(sequence) for sequence in removed ]) & set([ tuple(sequence) for sequence in added ])
+		removed = [ sequence for sequence in removed if tuple(sequence) not in common ]
+		added = [ sequence for sequence in added if tuple(sequence) not in common ]
+		previous = dict([ (tuple(sequence[:-1]), sequence[-1]) for sequence in removed ])
+		self.changed = [ (sequence, previous[tuple(sequence[:-1])]) for sequence in added
+				 if tuple(sequence[:-1]) in previous ]
+		changed = set([ tuple(sequence[:-1]) for (sequence, codepoint) in self.changed ])
+		self.removed = [ sequence for sequence in removed if tuple(sequence[:-1]) not in changed ]
+		self.added = [ sequence for sequence in added if tuple(sequence[:-1]) not in changed ]
+
+	def print_summary(self):
+		""" Prints what this run parsed again and changed to stderr """
+		if self.state is None:
+			print >> sys.stderr, "No state of the previous run in %s for these settings, parsed every line" % self.filename
+		print >> sys.stderr, "Lines of the Compose files                                 :", self.lines
+		print >> sys.stderr, "  of which were parsed again                               :", self.reparsed
+		if self.state is None:
+			return
+		print >> sys.stderr, "Sequences of the table removed                             :", len(self.removed)
+		print >> sys.stderr, "Sequences of the table added                               :", len(self.added)
+		print >> sys.stderr, "Sequences of the table with a new codepoint                :", len(self.changed)
+		for sequence in self.removed:
+			print >> sys.stderr, "REMOVED: 0x%04X for sequence:" % sequence[-1], sequence[:-1]
+		for sequence in self.added:
+			print >> sys.stderr, "ADDED: 0x%04X for sequence:" % sequence[-1], sequence[:-1]
+		for (sequence, codepoint) in self.changed:
+			print >> sys.stderr, "CHANGED: 0x%(a)04X to 0x%(b)04X for sequence:" \
+				% { "a": codepoint, "b": sequence[-1] }, sequence[:-1]
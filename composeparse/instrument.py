@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/instrument.py
+#
+# Timing and counting of the stages of a run, for --profile. Nothing here
+# is used unless a Profiler is created; the stages run unwrapped otherwise.
+
+from os			import times
+from time		import time
+
+import sys
+import json
+
+try:
+	import resource
+except ImportError:
+	resource = None		# Not on Windows; no memory figures then.
+
+import composeparse.composition
+import composeparse.unicodedatatxt
+import composeparse.keysyms
+import composeparse.regression
+
+def peak_memory():
+	""" Returns the peak resident set size of the process so far, in KiB, or None """
+	if resource is None:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	if sys.platform == 'darwin':
+		peak /= 1024	# Bytes there, KiB on Linux.
+	return peak
+
+class ProfileStage(object):
+	""" The totals of a stage: calls, wall and CPU time with and without the """
+	""" stages it called (self), and how much the peak memory of the process """
+	""" grew while it ran (the stages it called included) """
+	def __init__(self, name):
+		self.name = name
+		self.calls = 0
+		self.wall = 0.0
+		self.cpu = 0.0
+		self.child_wall = 0.0
+		self.child_cpu = 0.0
+		self.peak_growth = None
+
+	def as_dict(self):
+		return { 'name': self.name, 'calls': self.calls,
+			 'wall': self.wall, 'cpu': self.cpu,
+			 'self_wall': self.wall - self.child_wall,
+			 'self_cpu': self.cpu - self.child_cpu,
+			 'peak_growth_kib': self.peak_growth }
+
+class Profiler(object):
+	""" Records the stages of a run. A stage entered while another is running """
+	""" is nested: its time is taken off the self time of the outer stage. """
+	""" Generator stages are timed over each of their next() calls, so that """
+	""" the stages of a pipeline are told apart although they interleave. """
+	def __init__(self):
+		self.stages = {}
+		self.order = []
+		self.stack = []
+		self.counters = {}
+		self.patched = []
+
+	def stage(self, name):
+		stage = self.stages.get(name)
+		if stage is None:
+			stage = self.stages[name] = ProfileStage(name)
+			self.order.append(name)
+		return stage
+
+	def enter(self, name):
+		cputimes = times()
+		self.stack.append((self.stage(name), time(), cputimes[0] + cputimes[1], peak_memory()))
+
+	def leave(self):
+		cputimes = times()
+		(stage, wall, cpu, peak) = self.stack.pop()
+		wall = time() - wall
+		cpu = cputimes[0] + cputimes[1] - cpu
+		stage.wall += wall
+		stage.cpu += cpu
+		if peak is not None:
+			stage.peak_growth = (stage.peak_growth or 0) + peak_memory() - peak
+		if self.stack:
+			outer = self.stack[-1][0]
+			outer.child_wall += wall
+			outer.child_cpu += cpu
+
+	def call(self, name, function, *args, **kwargs):
+		""" Runs function(*args, **kwargs) as one call of the stage name """
+		self.enter(name)
+		try:
+			return function(*args, **kwargs)
+		finally:
+			self.leave()
+			self.stages[name].calls += 1
+
+	def wrap(self, name, function):
+		""" Returns function, with each call timed as the stage name """
+		def wrapper(*args, **kwargs):
+			return self.call(name, function, *args, **kwargs)
+		return wrapper
+
+	def iterate(self, name, iterable):
+		""" Yields the items of iterable, timing each next() as the stage name """
+		iterator = iter(iterable)
+		stage = self.stage(name)
+		stage.calls += 1
+		while True:
+			self.enter(name)
+			try:
+				item = iterator.next()
+			except StopIteration:
+				self.leave()
+				return
+			except:
+				self.leave()
+				raise
+			self.leave()
+			yield item
+
+	def count(self, name, n = 1):
+		self.counters[name] = self.counters.get(name, 0) + n
+
+	def patch(self, module, attribute, replacement):
+		self.patched.append((module, attribute, getattr(module, attribute)))
+		setattr(module, attribute, replacement)
+
+	def install(self):
+		""" Wraps the parsers of the input files as stages, and counts the NFC """
+		""" normalizations and the orders of marks tried """
+		for (module, attribute, name) in [
+				(composeparse.keysyms, 'parse_keysymstxt', 'parse keysyms.txt'),
+				(composeparse.keysyms, 'parse_gdkkeysymsh', 'parse gdkkeysyms.h'),
+				(composeparse.unicodedatatxt, 'parse_unicodedatatxt', 'parse UnicodeData.txt'),
+				(composeparse.regression, 'parse_gtkoldsequences', 'parse GTKOLDSEQUENCES.txt') ]:
+			self.patch(module, attribute, self.wrap(name, getattr(module, attribute)))
+
+		normalize = composeparse.composition.normalize
+		def counting_normalize(form, unistr):
+			self.count('NFC normalizations')
+			return normalize(form, unistr)
+		self.patch(composeparse.composition, 'normalize', counting_normalize)
+
+		canonical_orders = composeparse.composition.canonical_orders
+		def counting_orders(marks):
+			for ordered in canonical_orders(marks):
+				self.count('Orders of marks generated')
+				yield ordered
+		self.patch(composeparse.composition, 'canonical_orders', counting_orders)
+
+	def uninstall(self):
+		while self.patched:
+			(module, attribute, original) = self.patched.pop()
+			setattr(module, attribute, original)
+
+	def as_dict(self):
+		return { 'stages': [ self.stages[name].as_dict() for name in self.order ],
+			 'counters': self.counters,
+			 'peak_memory_kib': peak_memory() }
+
+	def write_json(self, filename):
+		outputfile = open(filename, 'w')
+		json.dump(self.as_dict(), outputfile, indent = 1, sort_keys = True)
+		outputfile.write("\n")
+		outputfile.close()
+
+	def print_table(self, out = sys.stderr):
+		""" Prints the stages in the order they first ran, then the counters """
+		print >> out, "%-32s %8s %10s %10s %10s %10s %12s" % ("Stage", "Calls",
+			"Wall (s)", "CPU (s)", "Self wall", "Self CPU", "Peak + (KiB)")
+		for name in self.order:
+			stage = self.stages[name].as_dict()
+			growth = stage['peak_growth_kib']
+			if growth is None:
+				growth = "n/a"
+			print >> out, "%-32s %8d %10.3f %10.3f %10.3f %10.3f %12s" % (name, stage['calls'],
+				stage['wall'], stage['cpu'], stage['self_wall'], stage['self_cpu'], growth)
+		peak = peak_memory()
+		if peak is not None:
+			print >> out, "%-50s : %d" % ("Peak memory of the process (KiB)", peak)
+		print >> out
+		for name in sorted(self.counters):
+			print >> out, "%-50s : %d" % (name, self.counters[name])
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/keysyms.py
+#
+# The keysym databases, from gdkkeysyms.h (GTK+) and keysyms.txt (Markus Kuhn).
+
+from re			import match, split
+from string		import atoi
+
+from composeparse.sources import SourceFiles, SourceError, URL_KEYSYMSTXT, URL_GDKKEYSYMSH
+
+""" Patches applied to the keysym database from gdkkeysyms.h """
+GDKKEYSYMSH_PATCHES = {
+	# This is for a missing keysym from the currently upstream file
+	# 'dead_stroke':		0x338,
+
+	# This is for a missing keysym from the currently upstream file
+	'dead_belowdiaeresis':	0x324,
+	'dead_belowring':	0x325,
+	'dead_belowcomma':	0x326,
+	'dead_belowcircumflex':	0x32d,
+	'dead_belowbreve':	0x32e,
+	'dead_belowtilde':	0x330,
+	'dead_belowmacron':	0x331,
+	# 'KP_Multiply':		0x02a,
+	# 'KP_Add':		0x02b,
+	# 'KP_Separator':	0x02c,
+	# 'KP_Subtract':	0x02d,
+	# 'KP_Decimal':		0x02e,
+	# 'KP_Divide':		0x02f,
+	# 'KP_0':		0x030,
+	# 'KP_1':		0x031,
+	# 'KP_2':		0x032,
+	# 'KP_3':		0x033,
+	# 'KP_4':		0x034,
+	# 'KP_5':		0x035,
+	# 'KP_6':		0x036,
+	# 'KP_7':		0x037,
+	# 'KP_8':		0x038,
+	# 'KP_9':		0x039,
+	# 'KP_Equal':		0x03d,
+
+	# This is^Wwas preferential treatment for Greek
+	# 'dead_tilde':		0x342,
+	# This is^was preferential treatment for Greek
+	# 'combining_tilde':	0x342,
+
+	# Fixing VoidSymbol
+	'VoidSymbol':		0xFFFF,
+}
+
+""" Patches applied to the keysym-to-Unicode database from keysyms.txt """
+KEYSYMSTXT_PATCHES = {
+	# This is for a missing keysym from the currently upstream file
+	'dead_belowdiaeresis':	0x324,
+	'dead_belowring':	0x325,
+	'dead_belowcomma':	0x326,
+	'dead_belowcircumflex':	0x32d,
+	'dead_belowbreve':	0x32e,
+	'dead_belowtilde':	0x330,
+	'dead_belowmacron':	0x331,
+	# 'KP_Multiply':		0x02a,
+	# 'KP_Add':		0x02b,
+	# 'KP_Separator':	0x02c,
+	# 'KP_Subtract':	0x02d,
+	# 'KP_Decimal':		0x02e,
+	# 'KP_Divide':		0x02f,
+	# 'KP_0':		0x030,
+	# 'KP_1':		0x031,
+	# 'KP_2':		0x032,
+	# 'KP_3':		0x033,
+	# 'KP_4':		0x034,
+	# 'KP_5':		0x035,
+	# 'KP_6':		0x036,
+	# 'KP_7':		0x037,
+	# 'KP_8':		0x038,
+	# 'KP_9':		0x039,
+	# 'KP_Equal':		0x03d,
+
+	# This is preferential treatment for Greek
+	# => we get more savings if used for Greek
+	# 'dead_tilde':		0x342,
+	# This is preferential treatment for Greek
+	# 'combining_tilde':	0x342,
+
+	'zerosubscript':	0x2080,
+	'onesubscript':		0x2081,
+	'twosubscript':		0x2082,
+	'threesubscript':	0x2083,
+	'foursubscript':	0x2084,
+	'fivesubscript':	0x2085,
+	'sixsubscript':		0x2086,
+	'sevensubscript':	0x2087,
+	'eightsubscript':	0x2088,
+	'ninesubscript':	0x2089,
+
+	# This is for a missing keysym from Markus Kuhn's db
+	'dead_stroke':		0xFE63,
+	# This is for a missing keysym from Markus Kuhn's db
+	'Oslash':		0x0d8,
+
+	# This is for a missing (recently added) keysym
+	'dead_psili':		0x313,
+	# This is for a missing (recently added) keysym
+	'dead_dasia':		0x314,
+
+	# Allows to import Multi_key sequences
+	'Multi_key':		0xff20,
+
+	# New keysym (no corresponding Unicode character)
+	# 'dead_currency':	0xfe6f,
+}
+
+def parse_gdkkeysymsh(filename_gdkkeysymsh):
+	""" Parses the gdkkeysyms.h file from GTK+/gdk/gdkkeysyms.h """
+	""" Returns keysymdb, with GDKKEYSYMSH_PATCHES applied """
+	gdkkeysymsh = open(filename_gdkkeysymsh, 'r')
+
+	""" Parse the gdkkeysyms.h file and place contents in  keysymdb """
+	linenum_gdkkeysymsh = 0
+	keysymdb = {}
+	for line in gdkkeysymsh.readlines():
+		linenum_gdkkeysymsh += 1
+		line = line.strip()
+		if line == "" or not match('^#define GDK_', line):
+			continue
+		components = split('\s+', line)
+		if len(components) < 3:
+			raise SourceError(filename_gdkkeysymsh, linenum_gdkkeysymsh, line,
+				"Was expecting 3 items in the line")
+		if not match('^GDK_', components[1]):
+			raise SourceError(filename_gdkkeysymsh, linenum_gdkkeysymsh, line,
+				"Was expecting a keysym starting with GDK_")
+		if components[2][:2] == '0x' and match('[0-9a-fA-F]+$', components[2][2:]):
+			unival = atoi(components[2][2:], 16)
+			if unival == 0:
+				continue
+			keysymdb[components[1][4:]] = unival
+		else:
+			raise SourceError(filename_gdkkeysymsh, linenum_gdkkeysymsh, line,
+				"Was expecting a hexadecimal number at the end of the line")
+	gdkkeysymsh.close()
+
+	""" Patch up the keysymdb with some of our own stuff """
+	keysymdb.update(GDKKEYSYMSH_PATCHES)
+
+	return keysymdb
+
+def parse_keysymstxt(filename_keysymstxt):
+	""" Parses the keysyms.txt file that Markus Kuhn maintains """
+	""" This file keeps a record between keysyms <-> unicode chars """
+	keysymstxt = open(filename_keysymstxt, 'r')
+
+	""" Parse the keysyms.txt file and place content in  keysymdb """
+	linenum_keysymstxt = 0
+	keysymdb = {}
+	for line in keysymstxt.readlines():
+		linenum_keysymstxt += 1
+		line = line.strip()
+		if line == "" or match('^#', line):
+			continue
+		components = split('\s+', line)
+		if len(components) < 5:
+			raise SourceError(filename_keysymstxt, linenum_keysymstxt, line,
+				"Was expecting 5 items in the line")
+		if components[1][0] == 'U' and match('[0-9a-fA-F]+$', components[1][1:]):
+			unival = atoi(components[1][1:], 16)
+		if unival == 0:
+			continue
+		keysymdb[components[4]] = unival
+	keysymstxt.close()
+
+	""" Patch up the keysymdb with some of our own stuff """
+	keysymdb.update(KEYSYMSTXT_PATCHES)
+
+	return keysymdb
+
+HEXDIGITS = '0123456789abcdefABCDEF'
+
+def hexkeysymvalue(keysym):
+	""" Returns the value of a keysym written as Uxxxx or 0xXXXX, """
+	""" or None if the keysym is not written in either notation. """
+	if keysym[:1] == 'U':
+		digits = keysym[1:]
+	elif keysym[:2] == '0x':
+		digits = keysym[2:]
+	else:
+		return None
+	if digits == "" or digits.strip(HEXDIGITS) != "":
+		return None
+	return int(digits, 16)
+
+class KeysymError(Exception):
+	""" Raised for a keysym that is neither in the databases nor a hex value """
+	def __init__(self, keysym, file = "n/a", linenum = 0):
+		Exception.__init__(self, keysym, file, linenum)
+		self.keysym = keysym
+		self.file = file
+		self.linenum = linenum
+
+	def __str__(self):
+		return "Unknown keysym %(keysym)s at line %(linenum)d in %(file)s" \
+		% { "keysym": self.keysym, "linenum": self.linenum, "file": self.file }
+
+class KeysymDatabase(object):
+	""" The keysyms, with their values from gdkkeysyms.h and their Unicode """
+	""" values from keysyms.txt. The files are loaded on the first lookup. """
+	""" Resolved names are cached per database, hex notation included. """
+	def __init__(self, sources = None):
+		if sources is None:
+			sources = SourceFiles()
+		self.sources = sources
+		self.databases = None
+		self.caches = ({ "": 0 }, { "": 0 })
+		self.lookups = 0
+		self.hits = 0
+		self.database_hits = 0
+		self.hex_hits = 0
+
+	def load(self):
+		""" Loads keysyms.txt and gdkkeysyms.h, unless already loaded """
+		if self.databases is None:
+			keysymunicodedb = self.sources.load(URL_KEYSYMSTXT, parse_keysymstxt, KEYSYMSTXT_PATCHES)
+			keysymdb = self.sources.load(URL_GDKKEYSYMSH, parse_gdkkeysymsh, GDKKEYSYMSH_PATCHES)
+			self.databases = (keysymdb, keysymunicodedb)
+		return self.databases
+
+	@property
+	def keysymdatabase(self):
+		""" The keysym values, as found in gdkkeysyms.h """
+		return self.load()[0]
+
+	@property
+	def keysymunicodedatabase(self):
+		""" The keysym Unicode values, as found in keysyms.txt """
+		return self.load()[1]
+
+	def resolve(self, which, keysym, file = "n/a", linenum = 0):
+		self.lookups += 1
+		cache = self.caches[which]
+		try:
+			value = cache[keysym]
+			self.hits += 1
+			return value
+		except KeyError:
+			pass
+		value = self.load()[which].get(keysym)
+		if value is not None:
+			self.database_hits += 1
+		else:
+			value = hexkeysymvalue(keysym)
+			if value is None:
+				raise KeysymError(keysym, file, linenum)
+			self.hex_hits += 1
+		cache[keysym] = value
+		return value
+
+	def value(self, keysym, file = "n/a", linenum = 0):
+		""" Value of keysym, as found in gdkkeysyms.h """
+		""" Use file and linenum to when reporting errors """
+		return self.resolve(0, keysym, file, linenum)
+
+	def unicodevalue(self, keysym, file = "n/a", linenum = 0):
+		""" Unicode value of keysym, as found in keysyms.txt """
+		""" Use file and linenum to when reporting errors """
+		return self.resolve(1, keysym, file, linenum)
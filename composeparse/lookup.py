@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/lookup.py
+#
+# Reads gtk_compose_seqs_compact back the way gtkimcontextsimple.c does
+# (check_compact_table), so that lookups can be checked and measured here
+# instead of after GTK+ ships. Used by --replay and --statistics.
+
+from random		import Random
+
+import sys
+
+from composeparse.sequences	import WIDTHOFCOMPOSETABLE
+
+""" The answers to a keystroke """
+LOOKUP_NONE = 'none'
+LOOKUP_PREFIX = 'prefix'
+LOOKUP_MATCH = 'match'
+
+class ComposeTableCompact(object):
+	""" The GtkComposeTableCompact of gtkimcontextsimple.c: data is the """
+	""" array of guint16, as GTKTableEmitter.compact() returns it """
+	def __init__(self, data, n_index_size, max_seq_len = WIDTHOFCOMPOSETABLE,
+			n_index_stride = WIDTHOFCOMPOSETABLE + 1, name = 'gtk_compose_seqs_compact'):
+		self.name = name
+		self.data = data
+		self.max_seq_len = max_seq_len
+		self.n_index_size = n_index_size
+		self.n_index_stride = n_index_stride
+
+	def size(self):
+		""" Returns the bytes taken by data """
+		return len(self.data) * self.data.itemsize
+
+class CompactLookup(object):
+	""" Answers keystrokes from a ComposeTableCompact, as check_compact_table() """
+	""" does. A keystroke that completes a sequence commits its codepoint and """
+	""" empties the compose buffer; one that matches nothing empties it too. """
+	""" comparisons counts the calls of the comparison functions of bsearch(3), """
+	""" whose probes (those of glibc) are repeated here inline. """
+	def __init__(self, table):
+		self.table = table
+		self.compose_buffer = []
+		self.comparisons = 0
+
+	def reset(self):
+		self.compose_buffer = []
+
+	def check(self, keysyms):
+		""" Looks up the compose buffer keysyms. Returns LOOKUP_NONE, LOOKUP_PREFIX """
+		""" or LOOKUP_MATCH, and the codepoint of the match (or None) """
+		table = self.table
+		data = table.data
+		stride = table.n_index_stride
+		n_compose = len(keysyms)
+		if n_compose == 0 or n_compose > table.max_seq_len:
+			return (LOOKUP_NONE, None)
+
+		""" compare_seq_index: the first keysym against the index rows """
+		first = keysyms[0]
+		seq_index = None
+		low = 0
+		high = table.n_index_size
+		while low < high:
+			middle = (low + high) // 2
+			self.comparisons += 1
+			keysym = data[middle * stride]
+			if first < keysym:
+				high = middle
+			elif first > keysym:
+				low = middle + 1
+			else:
+				seq_index = middle * stride
+				break
+		if seq_index is None:
+			return (LOOKUP_NONE, None)
+		if n_compose == 1:
+			return (LOOKUP_PREFIX, None)
+
+		""" compare_seq: the other keysyms against the rows of each length """
+		rest = list(keysyms[1:])
+		width = len(rest)
+		for i in range(n_compose - 1, table.max_seq_len):
+			row_stride = i + 1
+			start = data[seq_index + i]
+			end = data[seq_index + i + 1]
+			if end - start <= 0:
+				continue
+			low = 0
+			high = (end - start) // row_stride
+			while low < high:
+				middle = (low + high) // 2
+				self.comparisons += 1
+				row = start + middle * row_stride
+				item = data[row:row + width].tolist()
+				if rest < item:
+					high = middle
+				elif rest > item:
+					low = middle + 1
+				elif i != n_compose - 1:
+					return (LOOKUP_PREFIX, None)
+				else:
+					return (LOOKUP_MATCH, data[row + row_stride - 1])
+		return (LOOKUP_NONE, None)
+
+	def feed(self, keysym):
+		""" Adds keysym to the compose buffer, and looks the buffer up """
+		self.compose_buffer.append(keysym)
+		(result, codepoint) = self.check(self.compose_buffer)
+		if result != LOOKUP_PREFIX:
+			self.compose_buffer = []
+		return (result, codepoint)
+
+	def replay(self, streams, expected = None):
+		""" Feeds each stream (a sequence of keysym values) from an empty compose """
+		""" buffer. With expected, a dictionary of the sequences of the table to """
+		""" their codepoints (see SequenceSet.values_table), checks that each """
+		""" stream found there is a prefix up to its last keysym, then a match """
+		""" of its codepoint. Returns a LookupReport. """
+		report = LookupReport(self.table.name)
+		mismatched = set()
+		for stream in streams:
+			self.reset()
+			comparisons = self.comparisons
+			answers = [ self.feed(keysym) for keysym in stream ]
+			report.add(stream, answers, self.comparisons - comparisons)
+			if expected is not None and stream in expected:
+				wanted = [ (LOOKUP_PREFIX, None) ] * (len(stream) - 1) + [ (LOOKUP_MATCH, expected[stream]) ]
+				if answers != wanted and stream not in mismatched:
+					mismatched.add(stream)
+					report.mismatches.append((stream, expected[stream], answers))
+		return report
+
+def table_streams(expected, repeat = 1, seed = 0):
+	""" Yields the sequences of expected, repeat times over, each time in a """
+	""" different order drawn from seed """
+	streams = sorted(expected)
+	generator = Random(seed)
+	for i in xrange(repeat):
+		generator.shuffle(streams)
+		for stream in streams:
+			yield stream
+
+class LookupReport(object):
+	""" What a replay found: the answers to the keystrokes, the comparisons """
+	""" they took, and the sequences that did not come back as expected """
+	def __init__(self, name = 'gtk_compose_seqs_compact'):
+		self.name = name
+		self.streams = 0
+		self.keystrokes = 0
+		self.answers = { LOOKUP_NONE: 0, LOOKUP_PREFIX: 0, LOOKUP_MATCH: 0 }
+		self.comparisons = 0
+		self.max_comparisons = 0
+		self.mismatches = []
+
+	def add(self, stream, answers, comparisons):
+		self.streams += 1
+		self.keystrokes += len(answers)
+		for (result, codepoint) in answers:
+			self.answers[result] += 1
+		self.comparisons += comparisons
+		self.max_comparisons = max(self.max_comparisons, comparisons)
+
+	def comparisons_per_keystroke(self):
+		if self.keystrokes == 0:
+			return 0.0
+		return float(self.comparisons) / self.keystrokes
+
+	def print_report(self, quiet = False):
+		print "Lookup in", self.name
+		print "Number of keystroke sequences replayed                     :", self.streams
+		print "Number of keystrokes                                       :", self.keystrokes
+		print "  of which were a prefix                                   :", self.answers[LOOKUP_PREFIX]
+		print "  of which were a complete match                           :", self.answers[LOOKUP_MATCH]
+		print "  of which matched nothing                                 :", self.answers[LOOKUP_NONE]
+		print "Comparisons (average per keystroke)                        : %.2f" % self.comparisons_per_keystroke()
+		print "Comparisons (most for one sequence)                        :", self.max_comparisons
+		print "Sequences not found as in the Compose file                 :", len(self.mismatches)
+		if not quiet:
+			for (stream, codepoint, answers) in self.mismatches:
+				print >> sys.stderr, "WARNING: Lookup of sequence", " ".join([ "0x%04X" % k for k in stream ]), \
+					"expected 0x%04X, got" % codepoint, answers
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/multitable.py
+#
+# The sequences that produce more than one character, for --multiple, laid
+# out to be binary searched. The sequences are grouped by their number of
+# keysyms; a row of a group of n keysyms takes n + 1 cells, the keysyms and
+# the offset of the result in a pool of results. The rows of a group are
+# sorted by keysyms, so that a sequence is one binary search in its group.
+# Each result is in the pool once, as its length followed by its codepoints.
+
+from composeparse.perfecthash	import smallest_array
+
+class MultiTableError(Exception):
+	""" Raised when the table does not give back the sequences """
+	def __init__(self, message):
+		Exception.__init__(self, message)
+		self.message = message
+
+	def __str__(self):
+		return self.message
+
+class MultiTable(object):
+	""" The table of the multisequences that a ComposeParser collected """
+	def __init__(self, parser, keysyms):
+		self.sequences = {}
+		for (names, codepoints) in parser.multisequences.itervalues():
+			keys = tuple([ keysyms.value(name) for name in names ])
+			self.sequences[keys] = tuple([ int(codepoint[1:], 16) for codepoint in codepoints ])
+		self.maxseqlen = parser.multisequence_maxseqlen
+		self.maxvallen = parser.multisequence_maxvallen
+
+		results = {}
+		pool = []
+		index = []
+		rows = []
+		for length in sorted(set([ len(keys) for keys in self.sequences ])):
+			group = sorted([ keys for keys in self.sequences if len(keys) == length ])
+			index.extend([ length, len(rows), len(group) ])
+			for keys in group:
+				result = self.sequences[keys]
+				offset = results.get(result)
+				if offset is None:
+					offset = results[result] = len(pool)
+					pool.append(len(result))
+					pool.extend(result)
+				rows.extend(keys)
+				rows.append(offset)
+		self.groups = len(index) // 3
+		self.index = smallest_array('HI', index)
+		self.rows = smallest_array('HI', rows)
+		self.results = smallest_array('HI', pool)
+		self.distinct_results = len(results)
+
+	def size(self):
+		""" Returns the bytes taken by the index, the rows and the pool """
+		return sum([ len(a) * a.itemsize for a in (self.index, self.rows, self.results) ])
+
+	def padded_size(self):
+		""" Returns the bytes the table of rows padded to the longest sequence """
+		""" and the longest result takes, in guint16 """
+		return len(self.sequences) * (self.maxseqlen + self.maxvallen) * 2
+
+	def verify(self):
+		""" Looks up every sequence through MultiTableLookup. Returns it. """
+		lookup = MultiTableLookup(self.index, self.rows, self.results)
+		for (keys, result) in self.sequences.iteritems():
+			found = lookup.lookup(keys)
+			if found != result:
+				raise MultiTableError("The table of multiple characters does not give back sequence %s: expected %s, found %s"
+					% (" ".join([ "0x%04X" % k for k in keys ]), result, found))
+		return lookup
+
+class MultiTableLookup(object):
+	""" Looks up full sequences in the arrays of a MultiTable, as C would """
+	def __init__(self, index, rows, results):
+		self.index = index
+		self.rows = rows
+		self.results = results
+		self.comparisons = 0
+
+	def lookup(self, keysyms):
+		""" Returns the tuple of codepoints the sequence of keysym values """
+		""" composes, or None """
+		keysyms = list(keysyms)
+		n = len(keysyms)
+		for g in range(0, len(self.index), 3):
+			(length, start, count) = self.index[g:g + 3]
+			if length != n:
+				continue
+			low = 0
+			high = count
+			while low < high:
+				middle = (low + high) // 2
+				self.comparisons += 1
+				row = start + middle * (n + 1)
+				item = self.rows[row:row + n].tolist()
+				if keysyms < item:
+					high = middle
+				elif keysyms > item:
+					low = middle + 1
+				else:
+					offset = self.rows[row + n]
+					return tuple(self.results[offset + 1:offset + 1 + self.results[offset]])
+		return None
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/output.py
+#
+# Where the tables go: stdout, or a file that is only put in place once it
+# has been written in full.
+
+from os			import rename, remove
+from os.path		import isfile
+
+import sys
+
+""" Bytes gathered before they are handed to the stream in one write """
+BUFFERSIZE = 1 << 16
+
+class OutputFile(object):
+	""" A buffered stream for the tables. With a filename, the output goes to """
+	""" filename.tmp, which close() renames to filename, so that readers never """
+	""" see a partial file; discard() drops it instead. Without, it goes to """
+	""" stdout, and flush() should be called before anything else prints. """
+	def __init__(self, filename = None):
+		self.filename = filename
+		if filename is None:
+			self.stream = sys.stdout
+		else:
+			self.stream = open(filename + '.tmp', 'wb')
+		self.chunks = []
+		self.size = 0
+
+	def write(self, data):
+		self.chunks.append(data)
+		self.size += len(data)
+		if self.size >= BUFFERSIZE:
+			self.flush()
+
+	def flush(self):
+		if self.chunks:
+			self.stream.write("".join(self.chunks))
+			self.chunks = []
+			self.size = 0
+		self.stream.flush()
+
+	def close(self):
+		""" Writes out what is left; puts the file in place """
+		self.flush()
+		if self.filename is not None and not self.stream.closed:
+			self.stream.close()
+			if sys.platform == 'win32' and isfile(self.filename):
+				remove(self.filename)	# rename() does not replace there.
+			rename(self.filename + '.tmp', self.filename)
+
+	def discard(self):
+		""" Drops the output, leaving any earlier file at filename as it was """
+		self.chunks = []
+		self.size = 0
+		if self.filename is not None and not self.stream.closed:
+			self.stream.close()
+			remove(self.filename + '.tmp')
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/parser.py
+#
+# Parses Compose files (the X.Org format) through a pipeline of generators.
+
+from re			import findall, match, split, sub
+from collections	import namedtuple, OrderedDict
+from os			import environ
+from os.path		import isfile, join, realpath
+
+import sys
+
+from composeparse.keysyms	import hexkeysymvalue
+from composeparse.composition	import oracle as default_oracle
+
+""" The Compose files are parsed by a pipeline of generators, each stage """
+""" passing on entries that carry the file name and line number they came from. """
+ComposeLine = namedtuple('ComposeLine', 'filename linenum line')
+ComposeEntry = namedtuple('ComposeEntry', 'filename linenum line sequence unichar value codepoint')
+ComposeInclude = namedtuple('ComposeInclude', 'filename linenum line path')
+
+""" Where libX11 installs the locale Compose files; %S in include directives """
+SYSTEM_LOCALEDIR = '/usr/share/X11/locale'
+
+""" The placeholder for SYSTEM_LOCALEDIR in the Compose.pre files of libX11 """
+LOCALEDATADIR_PLACEHOLDER = 'X11_LOCALEDATADIR'
+
+class ComposeError(Exception):
+	""" Raised for a line of a Compose file that we cannot handle """
+	def __init__(self, message, filename = "n/a", linenum = 0):
+		Exception.__init__(self, message, filename, linenum)
+		self.message = message
+		self.filename = filename
+		self.linenum = linenum
+
+	def __str__(self):
+		return "Invalid line %(linenum)d in %(filename)s: %(message)s" \
+		% { "linenum": self.linenum, "filename": self.filename, "message": self.message }
+
+def rename_combining(seq):
+	filtered_sequence = []
+	for ks in seq:
+		if findall('^combining_', ks):
+			filtered_sequence.append(sub('^combining_', 'dead_', ks))
+		else:
+			filtered_sequence.append(ks)
+	return filtered_sequence
+
+class ComposeParser(object):
+	""" Parses Compose files into a SequenceSet. The sequences that produce """
+	""" more than one character are kept apart, in multisequences. Those """
+	""" with plane 1 keysyms are dropped, and counted, unless plane1table. """
+	""" Include directives are followed as libX11 does: %H is $HOME, %S the """
+	""" locale directory (localedir) and %L the Compose file of the locale """
+	""" (localefile). The included lines take the place of the directive, """
+	""" so a later definition of a sequence overrides an earlier one. """
+	""" Each included file is tokenized and resolved once into a unit, kept """
+	""" in units; pass the same dictionary to parsers that read the same """
+	""" files. The files given to parse() are streamed, and not kept. """
+	""" Normalization is answered by oracle, a CompositionOracle. """
+	def __init__(self, keysyms, warnings = False, plane1 = False,
+		     localedir = SYSTEM_LOCALEDIR, localefile = None, units = None,
+		     plane1table = False, oracle = None):
+		if oracle is None:
+			oracle = default_oracle
+		self.keysyms = keysyms
+		self.oracle = oracle
+		self.warnings = warnings
+		self.plane1 = plane1
+		self.plane1table = plane1table
+		self.plane1_dropped = 0
+		self.localedir = localedir
+		if localefile is None:
+			localefile = join(localedir, 'en_US.UTF-8', 'Compose')
+		self.localefile = localefile
+		if units is None:
+			units = {}
+		self.units = units
+		self.multisequences = OrderedDict()
+		self.multisequence_maxseqlen = 0
+		self.multisequence_maxvallen = 0
+		self.profiler = None
+
+	def stage(self, name, entries):
+		""" Returns the pipeline stage entries, timed by the profiler if any """
+		if self.profiler is None:
+			return entries
+		return self.profiler.iterate(name, entries)
+
+	def read_compose_files(self, filenames):
+		""" Pipeline stage: yields each line of the Compose files, in turn """
+		for filename in filenames:
+			composefile = open(filename, 'r')
+			linenum = 0
+			for line in composefile:
+				linenum += 1
+				yield ComposeLine(filename, linenum, line)
+			composefile.close()
+
+	def tokenize_compose_lines(self, composelines):
+		""" Pipeline stage: splits each line into its keysyms, its string """
+		""" and its optional keysym value; skips comments and empty lines. """
+		""" Include directives are passed on as ComposeInclude. """
+		for composeline in composelines:
+			line = composeline.line.strip()
+			if line == "" or match("^XCOMM", line) or match("^#", line):
+				continue
+
+			include = match('^include\s+"([^"]*)"', line)
+			if include:
+				yield ComposeInclude(composeline.filename, composeline.linenum,
+						line, include.group(1))
+				continue
+
+			components = split(':', line)
+			if len(components) != 2:
+				raise ComposeError("No sequence/value pair found",
+					composeline.filename, composeline.linenum)
+			(seq, val) = components
+			seq = seq.strip()
+			val = val.strip()
+			raw_sequence = map(intern, findall('\w+', seq))
+			values = split('\s+', val)
+			unichar_temp = split('"', values[0])
+			unichar = unichar_temp[1]
+			try:
+				value = values[1]
+			except IndexError:
+				value = None
+			yield ComposeEntry(composeline.filename, composeline.linenum, line,
+					raw_sequence, unichar, value, None)
+
+	def resolve_compose_entries(self, entries, codepoint = None):
+		""" Pipeline stage: works out the codepoint of each entry. Entries that """
+		""" produce more than one character are passed on without a codepoint. """
+		""" codepoint is the one the line before entries resolved to, if any. """
+		keysymdatabase = self.keysyms.keysymdatabase
+		keysymunicodedatabase = self.keysyms.keysymunicodedatabase
+		for entry in entries:
+			if isinstance(entry, ComposeInclude):
+				yield entry
+				continue
+			raw_sequence = entry.sequence
+			unichar = entry.unichar
+			if len(unichar.decode('utf-8')) > 1:
+				if unichar[0] != '\\': 	# Ignore escaped characters.
+					# No codepoints that are >1 characters yet.
+					# plane1 multiple
+					yield entry
+					continue
+			codepointstr = entry.value
+			if codepointstr is None:
+				codepointstr = 'U' + str(ord(unichar.decode('utf-8')[0]))
+			if raw_sequence[0][0] == 'U' and hexkeysymvalue(raw_sequence[0]) is not None:
+				raw_sequence[0] = '0x' + raw_sequence[0][1:]
+			if codepointstr[0] == 'U' and hexkeysymvalue(codepointstr) is not None:
+				codepoint = hexkeysymvalue(codepointstr)
+			elif keysymunicodedatabase.has_key(codepointstr):
+				try:
+					if keysymdatabase[codepointstr] != keysymunicodedatabase[codepointstr]:
+						if self.warnings:
+							print >> sys.stderr, "DIFFERENCE (nonfatal): 0x%(a)X 0x%(b)X" % { "a": keysymdatabase[codepointstr],
+											"b": keysymunicodedatabase[codepointstr]},
+							print >> sys.stderr, raw_sequence, codepointstr
+						# Keeps the codepoint of the previous line, but each
+						# file is resolved on its own.
+						if codepoint is None:
+							codepoint = keysymunicodedatabase[codepointstr]
+					else:
+						codepoint = keysymunicodedatabase[codepointstr]
+				except KeyError:
+					if self.warnings:
+						print >> sys.stderr, "KEYERROR (nonfatal): ", codepointstr
+					codepoint = keysymunicodedatabase[codepointstr]
+			else:
+				raise ComposeError("Invalid codepoint %(cp)s: %(line)s" % { "cp": codepointstr, "line": entry.line },
+					entry.filename, entry.linenum)
+			yield entry._replace(sequence = rename_combining(raw_sequence), codepoint = codepoint)
+
+	def include_filename(self, include):
+		""" Returns the file named by include, a ComposeInclude, after the """
+		""" substitutions of libX11. Paths under SYSTEM_LOCALEDIR are taken """
+		""" from localedir instead, and a Compose file that is only there as """
+		""" Compose.pre (an nls/ tree that was not built) is read as such. """
+		path = include.path
+		path = path.replace('%H', environ.get('HOME', ''))
+		path = path.replace('%L', self.localefile)
+		path = path.replace('%S', self.localedir)
+		path = path.replace(LOCALEDATADIR_PLACEHOLDER, self.localedir)
+		if path.startswith(SYSTEM_LOCALEDIR + '/'):
+			path = join(self.localedir, path[len(SYSTEM_LOCALEDIR) + 1:])
+		if not isfile(path) and isfile(path + '.pre'):
+			path = path + '.pre'
+		return path
+
+	def read_unit(self, filename):
+		""" Returns the pipeline that yields the entries and include directives """
+		""" of filename, tokenized and resolved """
+		return self.stage('resolve', self.resolve_compose_entries(
+				self.stage('tokenize', self.tokenize_compose_lines(
+					self.stage('read', self.read_compose_files([filename]))))))
+
+	def compose_unit(self, filename):
+		""" Returns the unit of an included file, read_unit() as a list; each """
+		""" file is done once and then kept in units """
+		key = realpath(filename)
+		unit = self.units.get(key)
+		if unit is None:
+			unit = list(self.read_unit(filename))
+			self.units[key] = unit
+		return unit
+
+	def preload_includes(self, filenames):
+		""" Resolves the units of the files that filenames include, directly """
+		""" or not, so that the parsers sharing units find them done """
+		for filename in filenames:
+			composefile = open(filename, 'r')
+			linenum = 0
+			for line in composefile:
+				linenum += 1
+				include = match('^\s*include\s+"([^"]*)"', line)
+				if include:
+					path = self.include_filename(ComposeInclude(filename, linenum,
+							line, include.group(1)))
+					if isfile(path) and not self.units.has_key(realpath(path)):
+						self.compose_unit(path)
+						self.preload_includes([path])
+			composefile.close()
+
+	def expand_compose_files(self, filenames, includers = ()):
+		""" Pipeline stage: yields the entries of filenames, with the units of """
+		""" the files they include in place of the directives. filenames are """
+		""" streamed, unless their units were kept (by preload_includes) """
+		for filename in filenames:
+			if includers or self.units.has_key(realpath(filename)):
+				unit = self.compose_unit(filename)
+				kept = True
+			else:
+				unit = self.read_unit(filename)
+				kept = False
+			for entry in unit:
+				if not isinstance(entry, ComposeInclude):
+					if kept:
+						# Later stages change the sequences; the unit is kept as is.
+						entry = entry._replace(sequence = list(entry.sequence))
+					yield entry
+					continue
+				chain = includers + (realpath(filename),)
+				path = self.follow_include(entry, chain)
+				if path is None:
+					continue
+				for included in self.expand_compose_files([path], chain):
+					yield included
+
+	def follow_include(self, include, chain):
+		""" Returns the file include, a ComposeInclude, names, or None when """
+		""" libX11 would skip it. chain is the realpaths of the files being """
+		""" included, the one with the directive last. """
+		path = self.include_filename(include)
+		if not isfile(path):
+			# libX11 skips the includes it cannot open.
+			if self.warnings:
+				print >> sys.stderr, "WARNING: Cannot include %s at line %d in %s" \
+				% (path, include.linenum, include.filename)
+			return None
+		if realpath(path) in chain:
+			raise ComposeError("Include cycle %s" % " -> ".join(chain + (realpath(path),)),
+				include.filename, include.linenum)
+		return path
+
+	def collect_multisequences(self, entries):
+		""" Pipeline stage: moves the entries that produce more than one """
+		""" character, that is without a codepoint, to multisequences, keyed """
+		""" by their keysyms; a later definition replaces an earlier one """
+		for entry in entries:
+			if entry.codepoint is not None:
+				yield entry
+				continue
+			raw_sequence = entry.sequence
+			unichar = entry.unichar
+			multiseq = []
+			for item in raw_sequence:
+				multiseq.append(item)
+			if self.multisequence_maxseqlen < len(raw_sequence):
+				self.multisequence_maxseqlen = len(raw_sequence)
+			multicodepoint = []
+			for item in unichar.decode('utf-8'):
+				multicodepoint.append("U%04X" % ord(item))
+			if self.multisequence_maxvallen < len(unichar.decode('utf-8')):
+				self.multisequence_maxvallen = len(unichar.decode('utf-8'))
+			self.multisequences[tuple(multiseq)] = [multiseq, multicodepoint]
+
+	def filter_compose_entries(self, entries):
+		""" Pipeline stage: drops the sequences that do not go to GTK+, that is """
+		""" those with dead_currency, with plane 1 keysyms (unless plane1table) """
+		""" or with psili/dasia """
+		for entry in entries:
+			sequence = entry.sequence
+			if "dead_currency" in sequence:
+				continue
+			reject_this = False
+			for i in sequence:
+				if self.keysyms.value(i, entry.filename, entry.linenum) > 0xFFFF:
+					reject_this = not self.plane1table
+					if self.plane1:
+						print 'Plane1:', sequence
+					break
+			if reject_this:
+				self.plane1_dropped += 1
+				continue
+			for i in range(len(sequence)):
+				if sequence[i] == "0x0342":
+					sequence[i] = "dead_tilde"
+			if "U0313" in sequence or "U0314" in sequence or "0x0313" in sequence or "0x0314" in sequence:
+				continue
+			yield entry
+
+	def classify_compose_entries(self, entries):
+		""" Pipeline stage: yields each entry with its algorithmic form, a tuple """
+		""" of the Unicode values of its keysyms followed by the codepoint of """
+		""" the composed character, or with None when it has to go in the table. """
+		for entry in entries:
+			sequence = entry.sequence
+			""" This is temporary filtering, because we need to get an updated Compose file with less sequences """
+			if "Multi_key" in sequence:
+				yield (entry, None)
+				continue
+			""" Past 0xFFFF, there is no normalizing; such sequences go to """
+			""" the 32-bit table with plane1table, and are an error otherwise """
+			if self.plane1table and not (entry.codepoint < 0xFFFF and
+					self.keysyms.value(sequence[-1], entry.filename, entry.linenum) < 0xFFFF):
+				yield (entry, None)
+				continue
+			if not entry.codepoint < 0xFFFF:
+				raise ComposeError("OVER %s" % sequence, entry.filename, entry.linenum)
+			basechar = self.keysyms.value(sequence[-1], entry.filename, entry.linenum)
+			if not basechar < 0xFFFF:
+				raise ComposeError("Error in base char !?!", entry.filename, entry.linenum)
+			unisequence = []
+			for ks in reversed(sequence[:-1]):
+				unisequence.append(unichr(self.keysyms.unicodevalue(ks, entry.filename, entry.linenum)))
+			normalized = self.oracle.compose(unichr(basechar), unisequence)
+			if normalized is None:
+				yield (entry, None)
+			else:
+				stats_sequence_data = tuple(map(self.keysyms.unicodevalue, sequence))
+				yield (entry, stats_sequence_data + (ord(normalized),))
+
+	def entries(self, filenames, filtered = True):
+		""" Returns the pipeline over filenames, yielding (entry, algorithmic) """
+		""" Unless filtered, the sequences GTK+ does not take are kept """
+		entries = self.stage('collect multisequences', self.collect_multisequences(
+				self.stage('expand includes', self.expand_compose_files(filenames))))
+		if filtered:
+			entries = self.stage('filter', self.filter_compose_entries(entries))
+		return self.stage('classify', self.classify_compose_entries(entries))
+
+	def parse(self, filenames, sequences):
+		""" Parses the Compose files into sequences, a SequenceSet """
+		for (entry, algorithmic) in self.entries(filenames):
+			if algorithmic is not None:
+				sequences.add_algorithmic(algorithmic)
+			else:
+				sequences.add(entry.sequence + [entry.codepoint])
+		return sequences
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/perfecthash.py
+#
+# A minimal perfect hash of the table sequences, for --perfect-hash, built
+# with hash and displace (CHD): the sequences are hashed into buckets of a
+# few, and each bucket gets the first displacement, a pair (d0, d1), that
+# sends all of its sequences to free slots. A full sequence is then found
+# in one probe.
+#
+#	bucket = hash(keysyms, 3 * seed) % buckets
+#	d = displacements[bucket]
+#	slot = d < 0 ? -d - 1 : (f1 + d0 * f2 + d1) % slots
+#
+# where d0 = d / slots, d1 = d % slots, f1 = hash(keysyms, 3 * seed + 1) %
+# slots and f2 = hash(keysyms, 3 * seed + 2) % slots; a bucket of one
+# sequence points straight at its slot. Two sequences of a bucket with the
+# same (f1, f2) cannot be told apart by any displacement, so when a bucket
+# cannot be placed, the whole hash is built again with the next seed. The sequence is in the table if keys[slot] holds its keysyms
+# (padded with 0 to WIDTHOFCOMPOSETABLE); values[slot] is then its codepoint.
+#
+# hash() is FNV-1a over the keysym values as 32-bit words, from the offset
+# basis xored with the seed, with the finalizer of MurmurHash3 at the end.
+
+from array		import array
+from time		import time
+
+from composeparse.sequences	import WIDTHOFCOMPOSETABLE
+
+""" Average number of sequences per bucket """
+PERFECTHASH_BUCKETSIZE = 4
+
+""" Values of d0 tried for a bucket before giving up """
+PERFECTHASH_MAXTRIES = 1 << 10
+
+""" Seeds tried before giving up """
+PERFECTHASH_MAXSEEDS = 256
+
+class PerfectHashError(Exception):
+	""" Raised when no perfect hash is found, or when it does not give back """
+	""" the sequences it was built from """
+	def __init__(self, message):
+		Exception.__init__(self, message)
+		self.message = message
+
+	def __str__(self):
+		return self.message
+
+def sequence_hash(keysyms, seed):
+	""" Returns the 32-bit hash of the tuple of keysym values, for seed """
+	h = 0x811C9DC5 ^ seed
+	for keysym in keysyms:
+		h = ((h ^ keysym) * 0x01000193) & 0xFFFFFFFF
+	h ^= h >> 16
+	h = (h * 0x85EBCA6B) & 0xFFFFFFFF
+	h ^= h >> 13
+	h = (h * 0xC2B2AE35) & 0xFFFFFFFF
+	h ^= h >> 16
+	return h
+
+def seed_triple(seed):
+	""" Returns the seeds of sequence_hash() for the bucket, f1 and f2 """
+	return (3 * seed, 3 * seed + 1, 3 * seed + 2)
+
+def smallest_array(typecodes, items):
+	""" Returns items in an array of the first of typecodes that holds them """
+	for typecode in typecodes[:-1]:
+		try:
+			return array(typecode, items)
+		except OverflowError:
+			pass
+	return array(typecodes[-1], items)
+
+class PerfectHash(object):
+	""" The perfect hash of the table of a SequenceSet, keyed by the values """
+	""" of the keysyms (see SequenceSet.values_table) """
+	def __init__(self, sequences):
+		start = time()
+		self.sequences = sequences.values_table()
+		self.slots = len(self.sequences)
+		self.buckets = (self.slots + PERFECTHASH_BUCKETSIZE - 1) // PERFECTHASH_BUCKETSIZE
+		self.tries = 0
+
+		for seed in xrange(PERFECTHASH_MAXSEEDS):
+			built = self.build(seed)
+			if built is not None:
+				break
+		else:
+			raise PerfectHashError("No perfect hash with d0 below %d, for any of %d seeds"
+				% (PERFECTHASH_MAXTRIES, PERFECTHASH_MAXSEEDS))
+		self.seed = seed
+		(displacements, slots) = built
+
+		padding = (0,) * WIDTHOFCOMPOSETABLE
+		self.displacements = smallest_array('hi', displacements)
+		self.keys = smallest_array('HI', [ keysym for keys in slots
+			for keysym in (keys + padding)[:WIDTHOFCOMPOSETABLE] ])
+		self.values = smallest_array('HI', [ self.sequences[keys] for keys in slots ])
+		self.build_time = time() - start
+
+	def build(self, seed):
+		""" Returns the displacements and the sequence of each slot for seed, """
+		""" or None if a bucket cannot be placed """
+		(bucketseed, f1seed, f2seed) = seed_triple(seed)
+		n = self.slots
+		bucketed = [ [] for i in range(self.buckets) ]
+		for keys in self.sequences:
+			bucketed[sequence_hash(keys, bucketseed) % self.buckets].append(keys)
+		""" Place the fuller buckets first, while there is room """
+		order = sorted(range(self.buckets), key = lambda b: (-len(bucketed[b]), b))
+
+		displacements = [ 0 ] * self.buckets
+		slots = [ None ] * n
+		for bucket in order:
+			keysyms = bucketed[bucket]
+			if len(keysyms) <= 1:
+				break
+			f = [ (sequence_hash(keys, f1seed) % n, sequence_hash(keys, f2seed) % n) for keys in keysyms ]
+			d = self.place(f, slots)
+			if d is None:
+				return None
+			displacements[bucket] = d
+			for (keys, (f1, f2)) in zip(keysyms, f):
+				slots[(f1 + d // n * f2 + d % n) % n] = keys
+
+		""" The buckets of one sequence go straight to the slots left """
+		free = [ slot for slot in range(n) if slots[slot] is None ]
+		for bucket in order:
+			keysyms = bucketed[bucket]
+			if len(keysyms) == 1:
+				slot = free.pop()
+				displacements[bucket] = -slot - 1
+				slots[slot] = keysyms[0]
+		return (displacements, slots)
+
+	def place(self, f, slots):
+		""" Returns the first displacement d that sends each (f1, f2) of a """
+		""" bucket to a different free slot, or None """
+		n = self.slots
+		for d0 in xrange(PERFECTHASH_MAXTRIES):
+			base = [ (f1 + d0 * f2) % n for (f1, f2) in f ]
+			if len(set(base)) < len(base):
+				continue
+			for d1 in xrange(n):
+				self.tries += 1
+				for b in base:
+					if slots[(b + d1) % n] is not None:
+						break
+				else:
+					return d0 * n + d1
+		return None
+
+	def size(self):
+		""" Returns the bytes taken by the three arrays """
+		return sum([ len(a) * a.itemsize for a in (self.displacements, self.keys, self.values) ])
+
+	def verify(self):
+		""" Looks up every sequence through PerfectHashLookup. Returns it. """
+		lookup = PerfectHashLookup(self.displacements, self.keys, self.values, self.seed)
+		for (keys, codepoint) in self.sequences.iteritems():
+			found = lookup.lookup(keys)
+			if found != codepoint:
+				raise PerfectHashError("The perfect hash does not give back sequence %s: expected %s, found %s"
+					% (" ".join([ "0x%04X" % k for k in keys ]), codepoint, found))
+		return lookup
+
+class PerfectHashLookup(object):
+	""" Looks up full sequences in the arrays of a PerfectHash, as C would """
+	def __init__(self, displacements, keys, values, seed = 0):
+		self.displacements = displacements
+		self.keys = keys
+		self.values = values
+		self.seeds = seed_triple(seed)
+
+	def lookup(self, keysyms):
+		""" Returns the codepoint the sequence of keysym values composes, or None """
+		if not self.values or len(keysyms) > WIDTHOFCOMPOSETABLE:
+			return None
+		(bucketseed, f1seed, f2seed) = self.seeds
+		n = len(self.values)
+		d = self.displacements[sequence_hash(keysyms, bucketseed) % len(self.displacements)]
+		if d < 0:
+			slot = -d - 1
+		else:
+			f1 = sequence_hash(keysyms, f1seed) % n
+			f2 = sequence_hash(keysyms, f2seed) % n
+			slot = (f1 + d // n * f2 + d % n) % n
+		stored = self.keys[slot * WIDTHOFCOMPOSETABLE:(slot + 1) * WIDTHOFCOMPOSETABLE]
+		if list(stored) != list(keysyms) + [ 0 ] * (WIDTHOFCOMPOSETABLE - len(keysyms)):
+			return None
+		return self.values[slot]
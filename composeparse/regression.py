@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/regression.py
+#
+# Compares the sequences of the old GTK+ table (GTKOLDSEQUENCES.txt) with
+# the ones we produce now, and lists those that went missing. Both sides are
+# keyed by the values of their keysyms, so that the comparison is one pass
+# over each table.
+
+from re			import split
+from string		import atoi
+
+import json
+
+from composeparse.sources	import SourceFiles, SourceError, URL_GTKOLDSEQUENCES
+from composeparse.keysyms	import KeysymError
+from composeparse.composition	import oracle as default_oracle
+
+def parse_gtkoldsequences(filename_gtkoldsequences):
+	""" Parses the GTKOLDSEQUENCES.txt file, the sequences of the old GTK+ table """
+	""" Returns the sequences, indexed by codepoint """
+	gtkoldsequencestxt = open(filename_gtkoldsequences, 'r')
+
+	""" Parse the gtkoldsequences.txt file and place content in gtkoldsequences """
+	gtkoldsequences = {}
+	linenum = 0
+	for line in gtkoldsequencestxt.readlines():
+		linenum += 1
+		line = line.strip()
+		components = split('\s+', line)
+		if len(components) < 6:
+			raise SourceError(filename_gtkoldsequences, linenum, line,
+				"Was expecting 6 items in the line")
+		components[5] = atoi(components[5], 16)
+		sequence = components[0:6]
+		sequence.append(False)
+		if not gtkoldsequences.has_key(components[5]):
+			gtkoldsequences[components[5]] = []
+		gtkoldsequences[components[5]].append(sequence)
+	gtkoldsequencestxt.close()
+	return gtkoldsequences
+
+class OldSequences(object):
+	""" The sequences of the old GTK+ table, loaded on first use. Each is """
+	""" five keysyms (padded with EMPTY), the codepoint, and a matched flag. """
+	""" Normalization is answered by oracle, a CompositionOracle. """
+	def __init__(self, keysyms, sources = None, oracle = None):
+		if sources is None:
+			sources = SourceFiles()
+		if oracle is None:
+			oracle = default_oracle
+		self.keysyms = keysyms
+		self.sources = sources
+		self.oracle = oracle
+		self.gtkoldsequences = None
+
+	def load(self):
+		if self.gtkoldsequences is None:
+			self.gtkoldsequences = self.sources.load(URL_GTKOLDSEQUENCES, parse_gtkoldsequences)
+		return self.gtkoldsequences
+
+	def is_composed(self, seq):
+		unisequence = []
+		for i in range(len(seq[:-1])):
+			if seq[i+1] == 'EMPTY' or i == 4:
+				break
+			try:
+				unisequence.append(unichr(self.keysyms.unicodevalue(seq[i], URL_GTKOLDSEQUENCES)))
+			except KeysymError:
+				return False
+		if i != 0:
+			return self.oracle.compose(u"", unisequence) is not None
+		return False
+
+	def canonical(self, seq):
+		""" Returns the keysyms of an old sequence without the EMPTY padding, """
+		""" and the tuple of their values, or None if one has no value """
+		names = [ s for s in seq[:5] if s != 'EMPTY' ]
+		try:
+			return (names, tuple([ self.keysyms.value(name, URL_GTKOLDSEQUENCES) for name in names ]))
+		except KeysymError:
+			return (names, None)
+
+	def compare(self, sequences):
+		""" Joins the old sequences with the table of sequences, a SequenceSet, """
+		""" on the values of their keysyms, or on their names for the old """
+		""" sequences with a keysym of no value. Returns a RegressionReport. """
+		gtkoldsequences = self.load()
+		store = sequences.store
+		values = store.values
+		codepoints = store.codepoints
+		""" Index the table by the values of the keysyms of each row """
+		table = {}
+		for row in sequences.table():
+			keys = tuple([ values[i] for i in store.row_ids(row) ])
+			table.setdefault(keys, {}).setdefault(codepoints[row], row)
+
+		""" Old sequences with a keysym that has no value join on the names """
+		bynames = None
+
+		result = RegressionReport()
+		joined = set()
+		for cp in sorted(gtkoldsequences.keys()):
+			for seq in gtkoldsequences[cp]:
+				(names, keys) = self.canonical(seq)
+				if keys is None:
+					if bynames is None:
+						bynames = dict([ (tuple(store.row_names(row)), rowkeys)
+							for (rowkeys, rows) in table.iteritems() for row in rows.itervalues() ])
+					keys = bynames.get(tuple(names))
+				rows = table.get(keys)
+				if rows is not None:
+					joined.add(keys)
+					if cp in rows:
+						continue
+				if self.is_composed(seq[:-1]):
+					result.composed += 1
+					continue
+				result.missing.append(seq)
+				if rows is None:
+					result.removed.append((names, cp))
+				else:
+					result.changed.append((names, cp, min(rows)))
+		for keys in sorted(table):
+			if keys not in joined:
+				for (cp, row) in sorted(table[keys].iteritems()):
+					result.added.append((store.row_names(row), cp))
+		return result
+
+	def report(self, sequences, jsonfilename = None):
+		""" Prints the old sequences that are neither in the table of sequences, """
+		""" a SequenceSet, nor produced algorithmically, in Compose file format. """
+		""" With jsonfilename, also writes the whole comparison there as JSON. """
+		result = self.compare(sequences)
+		for seq in result.missing:
+			for s in seq[:-2]:
+				if s == 'EMPTY':
+					print "0",
+				else:
+					print "<%(a)s>" % { 'a': s },
+			print "\t\t\t: \"%(a)c\" U%(b)04X" % { 'a': unichr(seq[-2]), 'b': seq[-2] }
+		print "XCOMM We have", len(result.missing), "sequences"
+		if jsonfilename is not None:
+			result.write_json(jsonfilename)
+		return result
+
+class RegressionReport(object):
+	""" What changed from the old table to the table of sequences: the old """
+	""" sequences no longer there (removed), those there with another """
+	""" codepoint (changed), and the new ones (added). missing holds the old """
+	""" sequences removed or changed, as parsed; composed counts the old """
+	""" sequences that are not in the table but are produced algorithmically. """
+	def __init__(self):
+		self.added = []
+		self.removed = []
+		self.changed = []
+		self.missing = []
+		self.composed = 0
+
+	def as_dict(self):
+		return { 'added': [ { 'keysyms': names, 'codepoint': cp }
+				for (names, cp) in self.added ],
+			 'removed': [ { 'keysyms': names, 'codepoint': cp }
+				for (names, cp) in self.removed ],
+			 'changed': [ { 'keysyms': names, 'old': cp, 'new': new }
+				for (names, cp, new) in self.changed ],
+			 'composed': self.composed }
+
+	def write_json(self, filename):
+		outputfile = open(filename, 'w')
+		json.dump(self.as_dict(), outputfile, indent = 1, sort_keys = True)
+		outputfile.write("\n")
+		outputfile.close()
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/sequences.py
+#
+# The set of compose sequences, sorted and uniqued the way the GTK+ table wants them.
+
+from array		import array
+
+import sys
+
+""" Current max compose sequence length; in case it gets increased. """
+WIDTHOFCOMPOSETABLE = 5
+
+def uniq_sorted(items):
+	""" Yields the sorted items, once each; equal items are adjacent """
+	previous = None
+	for item in items:
+		if item != previous:
+			yield item
+		previous = item
+
+def sequence_algorithmic_key(seq):
+	""" Sorts algorithmic sequences by length, then item by item """
+	return (len(seq), seq)
+
+def is_greek(ch):
+	return ch >= 0x370 and ch <= 0x3ff or ch >= 0x1f00 and ch <= 0x1fff
+
+class SequenceStore(object):
+	""" Compose sequences in columns. Each keysym name is interned once, in """
+	""" names, and a row holds the numbers (ids) of its keysyms: row r has """
+	""" lengths[r] ids from ids[offsets[r]], and produces codepoints[r]. """
+	""" Id 0 is the empty name. The values of the keysyms, once resolved, """
+	""" are kept per id in values and unicodevalues. """
+	def __init__(self):
+		self.names = [ "" ]
+		self.nameids = { "": 0 }
+		self.ids = array('H')
+		self.offsets = array('I')
+		self.lengths = array('B')
+		self.codepoints = array('I')
+		self.values = array('I')
+		self.unicodevalues = array('I')
+
+	def __len__(self):
+		return len(self.codepoints)
+
+	def intern(self, name):
+		""" Returns the id of the keysym name, adding it if new """
+		nameid = self.nameids.get(name)
+		if nameid is None:
+			nameid = self.nameids[name] = len(self.names)
+			self.names.append(name)
+		return nameid
+
+	def append(self, ids, codepoint):
+		""" Adds the row of ids (an array('H')) producing codepoint; returns its number """
+		self.offsets.append(len(self.ids))
+		self.lengths.append(len(ids))
+		self.ids.extend(ids)
+		self.codepoints.append(codepoint)
+		return len(self.codepoints) - 1
+
+	def row_ids(self, row):
+		offset = self.offsets[row]
+		return self.ids[offset:offset + self.lengths[row]]
+
+	def row_names(self, row):
+		names = self.names
+		return [ names[i] for i in self.row_ids(row) ]
+
+	def sequence(self, row):
+		""" Returns the row as a compose sequence: keysym names, then the codepoint """
+		return self.row_names(row) + [ self.codepoints[row] ]
+
+	def resolve(self, keysyms):
+		""" Looks up the values of the names interned since the last call """
+		for name in self.names[len(self.values):]:
+			self.values.append(keysyms.value(name))
+			self.unicodevalues.append(keysyms.unicodevalue(name))
+
+	def row_key(self, row, values):
+		""" Packs the sort key of row into one integer of 32-bit fields: the """
+		""" value of the first keysym, the length of the sequence (keysyms and """
+		""" codepoint), then the values of the other keysyms. Comparing these """
+		""" is comparing the tuples (first, length, rest...) of the GTK+ table. """
+		ids = self.row_ids(row)[:WIDTHOFCOMPOSETABLE]
+		key = values[ids[0]] << 32 | self.lengths[row] + 1
+		for i in ids[1:]:
+			key = key << 32 | values[i]
+		return key << 32 * (WIDTHOFCOMPOSETABLE - len(ids))
+
+	def memory(self):
+		""" Returns the bytes taken by the columns, name table excluded """
+		return sum([ len(column) * column.itemsize for column in
+			(self.ids, self.offsets, self.lengths, self.codepoints,
+			 self.values, self.unicodevalues) ])
+
+class SequenceSet(object):
+	""" The compose sequences that go to the table, in a SequenceStore, and """
+	""" the algorithmic ones, each a tuple of the Unicode values of the """
+	""" keysyms followed by the composed codepoint. """
+	def __init__(self, keysyms, quiet = False, warnings = False):
+		self.keysyms = keysyms
+		self.quiet = quiet
+		self.warnings = warnings
+		self.store = SequenceStore()
+		self.sequenceindex = {}
+		self.duplicates = 0
+		self.conflicts = 0
+		self.algorithmic = []
+		self.sorted = None
+		self.counters = None
+
+	def __len__(self):
+		return len(self.store)
+
+	def check_if_sequence_exists(self, seq):
+		""" Looks up seq (keysyms followed by the codepoint) in the index, """
+		""" a dictionary keyed by the packed ids of the keysyms, and records """
+		""" seq in it. Returns the codepoint previously recorded, or None. """
+		return self.check_ids(array('H', map(self.store.intern, seq[:-1])), seq[-1])
+
+	def check_ids(self, ids, codepoint):
+		key = ids.tostring()
+		previous = self.sequenceindex.get(key)
+		self.sequenceindex[key] = codepoint
+		return previous
+
+	def report_duplicate_sequence(self, seq, previous):
+		""" Counts a sequence found by check_if_sequence_exists(), and with """
+		""" warnings, prints it """
+		if previous != seq[-1]:
+			self.conflicts += 1
+		if self.warnings and not self.quiet:
+			print >> sys.stderr, "WARNING: Got duplicate sequence:", seq
+			if previous != seq[-1]:
+				print >> sys.stderr, "WARNING: Conflicting values 0x%(a)04X and 0x%(b)04X for sequence:" \
+				% { "a": previous, "b": seq[-1] }, seq[:-1]
+
+	def add(self, sequence, keep_duplicate = True):
+		""" Adds a table sequence, warning if its keysyms were seen before. """
+		""" Returns the codepoint they had then, or None. """
+		ids = array('H', map(self.store.intern, sequence[:-1]))
+		previous = self.check_ids(ids, sequence[-1])
+		if previous is not None:
+			self.duplicates += 1
+			self.report_duplicate_sequence(sequence, previous)
+			if not keep_duplicate:
+				return previous
+		self.store.append(ids, sequence[-1])
+		self.sorted = None
+		self.counters = None
+		return previous
+
+	def print_duplicates(self):
+		""" Prints how many duplicate sequences add() found, unless quiet; """
+		""" with warnings, they were listed as they came """
+		if self.duplicates == 0 or self.quiet:
+			return
+		print >> sys.stderr, "WARNING: Got %(a)d duplicate sequences, %(b)d with conflicting values" \
+			% { "a": self.duplicates, "b": self.conflicts }
+		if not self.warnings:
+			print >> sys.stderr, "WARNING: Use --warnings to list them"
+
+	def add_algorithmic(self, sequence):
+		""" Adds a sequence that normalization produces """
+		self.algorithmic.append(sequence)
+
+	def rows(self):
+		""" Returns the rows of the sequences, in the order they were added """
+		return xrange(len(self.store))
+
+	def table(self):
+		""" Returns the rows of the table sequences, sorted and uniqued, as an """
+		""" array. Of the rows whose keysyms have the same Unicode values, the """
+		""" last one added wins, so that the lookaside file overrides the """
+		""" upstream Compose file. """
+		if self.sorted is None:
+			store = self.store
+			store.resolve(self.keysyms)
+			values = store.values
+			keys = [ store.row_key(row, values) for row in self.rows() ]
+			order = sorted(self.rows(), key = keys.__getitem__)
+			del keys
+			self.sorted = self.uniq_rows(order)
+		return self.sorted
+
+	def uniq_rows(self, order):
+		""" Returns the rows of order, sorted as table() sorts them, as an """
+		""" array; of the adjacent rows whose keysyms have the same Unicode """
+		""" values, the last one is kept """
+		store = self.store
+		store.resolve(self.keysyms)
+		unicodevalues = store.unicodevalues
+		rows = array('I')
+		pending = None
+		pending_key = None
+		for row in order:
+			row_key = store.row_key(row, unicodevalues)
+			if pending is not None and row_key != pending_key:
+				rows.append(pending)
+			pending = row
+			pending_key = row_key
+		if pending is not None:
+			rows.append(pending)
+		return rows
+
+	def values_table(self):
+		""" Returns the table sequences as a dictionary from the tuple of the """
+		""" values of their keysyms, as found in gdkkeysyms.h, to the codepoint. """
+		""" Of sequences with the same values, the last one in the table wins, """
+		""" as a lookup in the table would find any of them. """
+		store = self.store
+		table = self.table()
+		values = store.values
+		codepoints = store.codepoints
+		return dict([ (tuple([ values[i] for i in store.row_ids(row) ]), codepoints[row])
+			for row in table ])
+
+	def split_wide(self):
+		""" Returns the table sequences in two SequenceSets: those that fit """
+		""" 16-bit cells, and those with a keysym or a codepoint past 0xFFFF """
+		store = self.store
+		table = self.table()
+		values = store.values
+		narrow = SequenceSet(self.keysyms, quiet = True)
+		wide = SequenceSet(self.keysyms, quiet = True)
+		for row in table:
+			if store.codepoints[row] > 0xFFFF or \
+			   [ i for i in store.row_ids(row) if values[i] > 0xFFFF ]:
+				wide.add(store.sequence(row))
+			else:
+				narrow.add(store.sequence(row))
+		return (narrow, wide)
+
+	def compact_cells(self):
+		""" Returns the number of cells of the compact table: the index, of """
+		""" WIDTHOFCOMPOSETABLE+1 cells per first keysym, then each row of n """
+		""" keysyms in n cells (the keysyms but the first, and the codepoint) """
+		(num_entries, counter_multikey, num_first_keysyms, zeroes) = self.statistics()
+		return num_first_keysyms * (WIDTHOFCOMPOSETABLE + 1) + num_entries * 6 - zeroes
+
+	def statistics(self):
+		""" Walks the sorted, uniqued table sequences once. Returns the number """
+		""" of sequences, of those with Multi_key, of different first keysyms """
+		""" and of the zeroes that pad a flat table of 6 integers per row. """
+		if self.counters is not None:
+			return self.counters
+		store = self.store
+		table = self.table()
+		multikey = [ 'Multi_key' in name for name in store.names ]
+		num_entries = len(table)
+		counter_multikey = 0
+		num_first_keysyms = 0
+		zeroes = 0
+		firstvalue = self.keysyms.value("")
+		for row in table:
+			ids = store.row_ids(row)
+			if firstvalue != store.values[ids[0]]:
+				firstvalue = store.values[ids[0]]
+				num_first_keysyms += 1
+			for i in ids:
+				if multikey[i]:
+					counter_multikey += 1
+					break
+			zeroes += 6 - len(ids)
+		self.counters = (num_entries, counter_multikey, num_first_keysyms, zeroes)
+		return self.counters
+
+	def algorithmic_table(self):
+		""" Returns the algorithmic sequences, sorted and uniqued """
+		self.algorithmic.sort(key = sequence_algorithmic_key)
+		return list(uniq_sorted(self.algorithmic))
+
+	def algorithmic_greek(self, algorithmic_uniqued):
+		""" Counts the algorithmic sequences that produce Greek characters """
+		num_algorithmic_greek = 0
+		for sequence in algorithmic_uniqued:
+			if is_greek(sequence[-1]):
+				num_algorithmic_greek += 1
+		return num_algorithmic_greek
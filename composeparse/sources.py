@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/sources.py
+#
+# The input files: where we get them from, and the cache of their parsed contents.
+
+from os.path		import isfile, join, dirname
+from os			import rename
+from hashlib		import sha1
+from re			import match
+
+import sys
+import marshal
+
+from composeparse.fetch		import Fetcher, FETCH_CACHEDIR, source_filename, ensure_directory
+
+# We grab files off the web, left and right.
+URL_COMPOSE = 'http://gitweb.freedesktop.org/?p=xorg/lib/libX11.git;a=blob_plain;f=nls/en_US.UTF-8/Compose.pre'
+URL_KEYSYMSTXT = 'http://www.cl.cam.ac.uk/~mgk25/ucs/keysyms.txt'
+URL_GDKKEYSYMSH = 'http://svn.gnome.org/svn/gtk%2B/trunk/gdk/gdkkeysyms.h'
+URL_UNICODEDATATXT_VERSION = '5.0.0'
+URL_UNICODEDATATXT = 'http://www.unicode.org/Public/%s/ucd/UnicodeData.txt' % URL_UNICODEDATATXT_VERSION
+URL_GTKOLDSEQUENCES = 'http://simos.info/pub/GTKOLDSEQUENCES.txt'
+FILENAME_COMPOSE_LOOKASIDE = 'gtk-compose-lookaside.txt'
+FILENAME_COMPOSE_WIN32 = 'gtk-win32-sequences.txt'
+
+""" Bump when the layout of the parsed databases changes """
+PARSED_CACHE_VERSION = 1
+
+class SourceError(Exception):
+	""" Raised for a line that cannot be parsed in one of the input files """
+	def __init__(self, filename, linenum, line, expected):
+		Exception.__init__(self, filename, linenum, line, expected)
+		self.filename = filename
+		self.linenum = linenum
+		self.line = line
+		self.expected = expected
+
+	def __str__(self):
+		return "Invalid line %(linenum)d in %(filename)s: %(line)s\n%(expected)s" \
+		% { 'linenum': self.linenum, 'filename': self.filename, 'line': self.line,
+		    'expected': self.expected }
+
+def cached_database(filename, parser, patches = {}, nocache = False, quiet = False,
+		cachefilename = None):
+	""" Returns parser(filename), the database parsed from filename. """
+	""" The result is kept in cachefilename (default: filename.cache) in """
+	""" marshal format, together with a SHA-1 of the file contents and of """
+	""" the patches, and is reused as long as neither changes. """
+	digest = sha1()
+	digest.update(str(PARSED_CACHE_VERSION))
+	digest.update(repr(sorted(patches.items())))
+	sourcefile = open(filename, 'rb')
+	digest.update(sourcefile.read())
+	sourcefile.close()
+	digest = digest.hexdigest()
+
+	if cachefilename is None:
+		cachefilename = filename + '.cache'
+	if not nocache and isfile(cachefilename):
+		try:
+			cachefile = open(cachefilename, 'rb')
+			(cachedigest, database) = marshal.load(cachefile)
+			cachefile.close()
+			if cachedigest == digest:
+				return database
+		except (IOError, EOFError, ValueError, TypeError):
+			pass
+
+	database = parser(filename)
+	if not nocache:
+		try:
+			ensure_directory(dirname(cachefilename) or '.')
+			cachefile = open(cachefilename + '.tmp', 'wb')
+			marshal.dump((digest, database), cachefile)
+			cachefile.close()
+			rename(cachefilename + '.tmp', cachefilename)
+		except (IOError, OSError), (errno, strerror):
+			if not quiet:
+				print >> sys.stderr, "Could not write cache file %s: %s" % (cachefilename, strerror)
+	return database
+
+def read_checksums(filename):
+	""" Parses a file of pinned checksums, lines of a SHA-1 and a URL (or the """
+	""" name of its file), as sha1sum(1) writes them. Returns a dictionary. """
+	checksums = {}
+	linenum = 0
+	checksumsfile = open(filename, 'r')
+	for line in checksumsfile.readlines():
+		linenum += 1
+		line = line.strip()
+		if line == "" or line[0] == '#':
+			continue
+		matched = match('([0-9a-fA-F]{40})\s+\*?(\S+)$', line)
+		if matched is None:
+			raise SourceError(filename, linenum, line,
+				"Was expecting a SHA-1 and a URL or file name")
+		checksums[matched.group(2)] = matched.group(1).lower()
+	checksumsfile.close()
+	return checksums
+
+class SourceFiles(object):
+	""" Fetches the input files, and loads them parsed through the cache. """
+	""" One instance is shared by the databases that read the files. The """
+	""" files are fetched by a Fetcher (see composeparse/fetch.py), into """
+	""" cachedir or, with mirror, from that directory only; the parsed """
+	""" databases are kept in cachedir/parsed. """
+	def __init__(self, quiet = False, nocache = False, cachedir = FETCH_CACHEDIR,
+			mirror = None, refresh = False, checksums = {}):
+		self.quiet = quiet
+		self.nocache = nocache
+		self.cachedir = cachedir
+		self.fetcher = Fetcher(cachedir, mirror, refresh, checksums, quiet)
+
+	def prefetch(self, urls):
+		""" Starts fetching urls in the background, to be loaded later """
+		self.fetcher.start(urls)
+
+	def fetch(self, url):
+		""" Returns the name of the local copy of url """
+		return self.fetcher.fetch(url)
+
+	def load(self, url, parser, patches = {}, cachename = None):
+		""" Returns the database that parser makes of the file at url. A """
+		""" second parser of the same file needs a cachename of its own. """
+		if cachename is None:
+			cachename = source_filename(url)
+		cachefilename = join(self.cachedir, 'parsed', cachename + '.cache')
+		return cached_database(self.fetch(url), parser, patches, self.nocache, self.quiet,
+			cachefilename)
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+#
+# composeparse/unicodedatatxt.py
+#
+# The Unicode character database, and the statistics of the characters that
+# can be produced algorithmically from it. The characters come from the
+# unicodedata module of the interpreter or, to pin a version of Unicode,
+# from UnicodeData.txt as published by unicode.org.
+#
+# The statistics come from the table of the full decompositions of the
+# characters with a canonical decomposition: the decomposition of each,
+# followed down to characters that do not decompose, laid out flat as
+#
+#	characters		the characters, in increasing order
+#	offsets			where the decomposition of each starts in
+#				decompositions, and where the last one ends
+#	decompositions		the decompositions, one after the other
+
+from re			import match, split
+from string		import atoi
+from unicodedata	import category, combining, decomposition, name, unidata_version
+from array		import array
+from bisect		import bisect_left
+
+from composeparse.sources	import URL_UNICODEDATATXT, URL_UNICODEDATATXT_VERSION
+from composeparse.composition	import factorial, oracle as default_oracle
+from composeparse.sequences	import is_greek
+
+def stringtohex(str): return atoi(str, 16)
+
+def is_excluded(codepoint):
+	""" We don't do Plane 1 or CJK blocks. The latter require reading additional files. """
+	return codepoint > 0xFFFF or (codepoint >= 0x4E00 and codepoint <= 0x9FFF) or \
+		(codepoint >= 0xF900 and codepoint <= 0xFAFF)
+
+def parse_unicodedatatxt(filename_unicodedatatxt):
+	""" Parses UnicodeData.txt into a dictionary, indexed by codepoint, """
+	""" of [name, decomposition, combiningclass] """
+	unicodedatatxt = open(filename_unicodedatatxt, 'r')
+	unicodedb = {}
+	for line in unicodedatatxt.readlines():
+		if line[0] == "" or line[0] == '#':
+			continue
+		line = line[:-1]
+		uniproperties = split(';', line)
+		codepoint = stringtohex(uniproperties[0])
+		if is_excluded(codepoint):
+			continue
+		name = uniproperties[1]
+		category = uniproperties[2]
+		combiningclass = uniproperties[3]
+		decomposition = uniproperties[5]
+		unicodedb[codepoint] = [name, split('\s+', decomposition), combiningclass]
+	unicodedatatxt.close()
+	return unicodedb
+
+def parse_unicodedata_module():
+	""" Returns the characters of the unicodedata module, as """
+	""" parse_unicodedatatxt() returns those of UnicodeData.txt. The blocks """
+	""" that UnicodeData.txt gives as a range are there character by character. """
+	unicodedb = {}
+	for codepoint in xrange(0x10000):
+		if is_excluded(codepoint):
+			continue
+		character = unichr(codepoint)
+		if category(character) == 'Cn':
+			continue
+		unicodedb[codepoint] = [name(character, ''), split('\s+', decomposition(character)),
+			str(combining(character))]
+	return unicodedb
+
+def build_decompositions(unicodedb):
+	""" Returns the table of full decompositions of the characters of """
+	""" unicodedb, a dictionary as parse_unicodedatatxt() returns, as the """
+	""" lists (characters, offsets, decompositions). A character within a """
+	""" decomposition is decomposed in turn, through its own decomposition, """
+	""" tagged or not; the decomposition of each character is worked out """
+	""" once, however many decompositions it is found in. """
+	decomposed = {}
+	def decompose(codepoint):
+		result = decomposed.get(codepoint)
+		if result is None:
+			entry = unicodedb.get(codepoint)
+			if entry is None or entry[1][0] == '' or entry[1][0] == '0':
+				result = (codepoint,)
+			else:
+				mapping = entry[1]
+				if match('<\w+>', mapping[0]):
+					mapping = mapping[1:]
+				result = ()
+				for item in mapping:
+					result += decompose(stringtohex(item))
+			decomposed[codepoint] = result
+		return result
+
+	characters = []
+	offsets = []
+	decompositions = []
+	for codepoint in sorted(unicodedb.keys()):
+		decomposition = unicodedb[codepoint][1]
+		if decomposition[0] == '' or match('<\w+>', decomposition[0]):
+			continue
+		characters.append(codepoint)
+		offsets.append(len(decompositions))
+		decompositions.extend(decompose(codepoint))
+	offsets.append(len(decompositions))
+	return (characters, offsets, decompositions)
+
+def parse_decompositions(filename_unicodedatatxt):
+	""" Parses UnicodeData.txt into its table of full decompositions """
+	return build_decompositions(parse_unicodedatatxt(filename_unicodedatatxt))
+
+class DecompositionTable(object):
+	""" The full decompositions of the characters with a canonical """
+	""" decomposition, from the lists build_decompositions() returns """
+	def __init__(self, lists):
+		(characters, offsets, decompositions) = lists
+		self.characters = array('H', characters)
+		self.offsets = array('I', offsets)
+		self.decompositions = array('H', decompositions)
+
+	def __len__(self):
+		return len(self.characters)
+
+	def decomposition(self, codepoint):
+		""" Returns the full decomposition of codepoint, as a list """
+		""" of codepoints, or None if it has no canonical decomposition """
+		i = bisect_left(self.characters, codepoint)
+		if i == len(self.characters) or self.characters[i] != codepoint:
+			return None
+		return self.decompositions[self.offsets[i]:self.offsets[i + 1]].tolist()
+
+	def items(self):
+		""" Yields each character with its full decomposition """
+		characters = self.characters
+		offsets = self.offsets
+		decompositions = self.decompositions
+		for i in xrange(len(characters)):
+			yield (characters[i], decompositions[offsets[i]:offsets[i + 1]])
+
+class UnicodeDataModule(object):
+	""" The characters of the unicodedata module, the version of Unicode """
+	""" that the interpreter normalizes with """
+	def __init__(self):
+		self.version = unidata_version
+		self.description = "unicodedata (Unicode %s)" % unidata_version
+
+	def characters(self):
+		return parse_unicodedata_module()
+
+	def decompositions(self):
+		""" Only the characters that decompose matter to the table, so the """
+		""" others are not looked up beyond their decomposition """
+		unicodedb = {}
+		for codepoint in xrange(0x10000):
+			if not is_excluded(codepoint):
+				mapping = decomposition(unichr(codepoint))
+				if mapping != '':
+					unicodedb[codepoint] = ['', split('\s+', mapping), '']
+		return build_decompositions(unicodedb)
+
+class UnicodeDataFile(object):
+	""" The characters of a UnicodeData.txt, fetched from url through sources """
+	def __init__(self, sources, url = URL_UNICODEDATATXT):
+		self.sources = sources
+		self.url = url
+		self.description = "UnicodeData.txt"
+
+	def characters(self):
+		return self.sources.load(self.url, parse_unicodedatatxt)
+
+	def decompositions(self):
+		""" Kept in the cache of parsed files, so built once per version of the file """
+		return self.sources.load(self.url, parse_decompositions,
+			cachename = 'UnicodeData.txt.decompositions')
+
+def unicodedata_url(version):
+	""" Returns the URL of the UnicodeData.txt of a version of Unicode """
+	return URL_UNICODEDATATXT.replace(URL_UNICODEDATATXT_VERSION, version)
+
+class UnicodeDatabase(object):
+	""" The characters of Unicode, loaded on first use from backend: a """
+	""" UnicodeDataModule (the default) or a UnicodeDataFile. Normalization """
+	""" is answered by oracle, a CompositionOracle. """
+	def __init__(self, backend = None, oracle = None):
+		if backend is None:
+			backend = UnicodeDataModule()
+		if oracle is None:
+			oracle = default_oracle
+		self.backend = backend
+		self.oracle = oracle
+		self.unicodedatabase = None
+		self.decompositiontable = None
+		self.counters = None
+
+	def load(self):
+		""" Returns the characters, as a dictionary indexed by codepoint """
+		""" of [name, decomposition, combiningclass] """
+		if self.unicodedatabase is None:
+			self.unicodedatabase = self.backend.characters()
+		return self.unicodedatabase
+
+	def decompositions(self):
+		""" Returns the DecompositionTable of the characters """
+		if self.decompositiontable is None:
+			self.decompositiontable = DecompositionTable(self.backend.decompositions())
+		return self.decompositiontable
+
+	def statistics(self):
+		""" Counts the characters that can be algorithmically produced, and """
+		""" the compose sequence combinations they require. Returns the tuple """
+		""" (entries, entries for Greek, combinations, combinations for Greek) """
+		if self.counters is not None:
+			return self.counters
+
+		counter_combinations = 0
+		counter_combinations_greek = 0
+		counter_entries = 0
+		counter_entries_greek = 0
+
+		for (codepoint, decomposed) in self.decompositions().items():
+			if len(decomposed) < 2:
+				continue
+			if self.oracle.recompose(decomposed) is not None:
+				counter_entries += 1
+				counter_combinations += factorial(len(decomposed) - 1)
+				if is_greek(codepoint):
+					counter_entries_greek += 1
+					counter_combinations_greek += factorial(len(decomposed) - 1)
+
+		self.counters = (counter_entries, counter_entries_greek,
+				 counter_combinations, counter_combinations_greek)
+		return self.counters
+
+	def print_statistics(self):
+		(counter_entries, counter_entries_greek,
+		 counter_combinations, counter_combinations_greek) = self.statistics()
+		print "Unicode statistics from", self.backend.description
+		print "Number of entries that can be algorithmically produced     :", counter_entries
+		print "  of which are for Greek                                   :", counter_entries_greek
+		print "Number of compose sequence combinations requiring          :", counter_combinations
+		print "  of which are for Greek                                   :", counter_combinations_greek
+		print "Note: We do not include partial compositions, "
+		print "thus the slight discrepancy in the figures"
+		print
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# tests/fixtures.py
+#
+# What the tests share: a KeysymDatabase over the keysyms of data/Compose,
+# given in place of gdkkeysyms.h and keysyms.txt so that nothing is fetched,
+# and that file parsed into a SequenceSet; also SequenceSets of keysyms in
+# hex notation, which need no database.
+
+from os.path		import join, dirname, abspath
+
+from composeparse.keysyms	import KeysymDatabase
+from composeparse.parser	import ComposeParser
+from composeparse.sequences	import SequenceSet
+
+""" The directory of the fixture files """
+DATADIR = join(dirname(abspath(__file__)), 'data')
+
+""" The small Compose file of the tests """
+FILENAME_COMPOSE = join(DATADIR, 'Compose')
+
+""" The keysyms of FILENAME_COMPOSE, with their values in gdkkeysyms.h """
+KEYSYMS = {
+	'Multi_key':		0xFF20,
+	'dead_grave':		0xFE50,
+	'dead_acute':		0xFE51,
+	'dead_diaeresis':	0xFE57,
+	'dead_stroke':		0xFE63,
+	'quotedbl':		0x0022,
+	'apostrophe':		0x0027,
+	'slash':		0x002F,
+	'a':			0x0061,
+	'e':			0x0065,
+	'j':			0x006A,
+	'o':			0x006F,
+	'u':			0x0075,
+	'AE':			0x00C6,
+	'agrave':		0x00E0,
+	'aacute':		0x00E1,
+	'ae':			0x00E6,
+	'eacute':		0x00E9,
+	'odiaeresis':		0x00F6,
+	'oslash':		0x00F8,
+}
+
+""" The same keysyms, with their values in keysyms.txt """
+UNICODE_KEYSYMS = dict(KEYSYMS)
+UNICODE_KEYSYMS.update({
+	'Multi_key':		0x0000,
+	'dead_grave':		0x0300,
+	'dead_acute':		0x0301,
+	'dead_diaeresis':	0x0308,
+	'dead_stroke':		0x0338,
+})
+
+def fixture_keysyms():
+	""" Returns a KeysymDatabase loaded with KEYSYMS and UNICODE_KEYSYMS """
+	keysyms = KeysymDatabase()
+	keysyms.databases = (dict(KEYSYMS), dict(UNICODE_KEYSYMS))
+	return keysyms
+
+def fixture_sequences(keysyms = None):
+	""" Returns FILENAME_COMPOSE parsed into a SequenceSet, and its parser """
+	if keysyms is None:
+		keysyms = fixture_keysyms()
+	parser = ComposeParser(keysyms)
+	sequences = parser.parse([FILENAME_COMPOSE], SequenceSet(keysyms, quiet = True))
+	return (sequences, parser)
+
+def hex_sequences(rows):
+	""" Returns a SequenceSet of rows, each the values of its keysyms, written """
+	""" in hex notation, then its codepoint """
+	keysyms = KeysymDatabase()
+	keysyms.databases = ({}, {})
+	sequences = SequenceSet(keysyms, quiet = True)
+	for row in rows:
+		sequences.add([ "0x%04X" % value for value in row[:-1] ] + [ row[-1] ])
+	return sequences
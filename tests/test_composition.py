@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# tests/test_composition.py
+#
+# compose_marks() without the oracle: the orders of the marks it tries, and
+# that their number stays bounded however many marks come. Then the
+# CompositionOracle, and that it is the one given to the parser.
+
+from tempfile		import mkdtemp
+from shutil		import rmtree
+from os.path		import join
+
+import unittest
+
+import composeparse.composition as composition
+
+from composeparse.composition	import canonical_orders, compose_marks, COMPOSE_MAXORDERS, \
+				   CompositionOracle, FILENAME_ORACLE
+from composeparse.parser	import ComposeParser
+from composeparse.sequences	import SequenceSet
+
+from tests.fixtures		import fixture_keysyms, FILENAME_COMPOSE
+
+GRAVE = unichr(0x0300)
+ACUTE = unichr(0x0301)
+DIAERESIS = unichr(0x0308)
+DOT_BELOW = unichr(0x0323)
+HORN = unichr(0x031B)
+
+class CompositionTest(unittest.TestCase):
+	def test_distinct_classes(self):
+		""" Marks above and below: one canonical ordering """
+		self.assertEqual(list(canonical_orders([ ACUTE, DOT_BELOW ])), [ [ DOT_BELOW, ACUTE ] ])
+		self.assertEqual(compose_marks(u'o', [ ACUTE, HORN ]), unichr(0x1EDB))
+
+	def test_same_class(self):
+		""" Marks of one class keep their order, so each order is tried """
+		orders = list(canonical_orders([ ACUTE, DIAERESIS ]))
+		self.assertEqual(orders, [ [ ACUTE, DIAERESIS ], [ DIAERESIS, ACUTE ] ])
+		self.assertEqual(compose_marks(u'u', [ ACUTE, DIAERESIS ]), unichr(0x01D8))
+
+	def test_repeated_marks(self):
+		""" A mark given twice does not double the orders """
+		orders = list(canonical_orders([ ACUTE, ACUTE, GRAVE ]))
+		self.assertEqual(len(orders), 3)
+		self.assertEqual(len(set(map(tuple, orders))), 3)
+
+	def test_bounded(self):
+		""" Eight marks of one class have 8! orders; at most COMPOSE_MAXORDERS """
+		""" of them are normalized """
+		marks = [ unichr(codepoint) for codepoint in range(0x0300, 0x0308) ]
+		tried = []
+		orders = canonical_orders
+		def counting_orders(marks):
+			for ordered in orders(marks):
+				tried.append(ordered)
+				yield ordered
+		composition.canonical_orders = counting_orders
+		try:
+			self.assertEqual(compose_marks(u'a', marks), None)
+		finally:
+			composition.canonical_orders = orders
+		self.assertEqual(len(tried), COMPOSE_MAXORDERS)
+
+class OracleTest(unittest.TestCase):
+	def setUp(self):
+		self.cachedir = mkdtemp()
+
+	def tearDown(self):
+		rmtree(self.cachedir)
+
+	def test_answered_once(self):
+		oracle = CompositionOracle()
+		self.assertEqual(oracle.compose(u'e', [ ACUTE ]), unichr(0x00E9))
+		self.assertEqual(oracle.compose(u'e', [ ACUTE ]), unichr(0x00E9))
+		self.assertEqual((oracle.misses, oracle.hits, oracle.disk_hits), (1, 1, 0))
+
+	def test_saved(self):
+		filename = join(self.cachedir, FILENAME_ORACLE)
+		oracle = CompositionOracle()
+		oracle.open(filename)
+		oracle.compose(u'e', [ ACUTE ])
+		oracle.recompose([ 0x0061, 0x0300 ])
+		self.assertTrue(oracle.save())
+		reopened = CompositionOracle()
+		reopened.open(filename)
+		self.assertEqual(reopened.compose(u'e', [ ACUTE ]), unichr(0x00E9))
+		self.assertEqual(reopened.recompose([ 0x0061, 0x0300 ]), unichr(0x00E0))
+		self.assertEqual((reopened.misses, reopened.disk_hits), (0, 2))
+
+	def test_parser_oracle(self):
+		""" The parser asks the oracle it is given, not the shared one """
+		keysyms = fixture_keysyms()
+		oracle = CompositionOracle()
+		shared = (composition.oracle.misses, composition.oracle.hits, composition.oracle.disk_hits)
+		parser = ComposeParser(keysyms, oracle = oracle)
+		sequences = parser.parse([FILENAME_COMPOSE], SequenceSet(keysyms, quiet = True))
+		self.assertTrue(oracle.misses > 0)
+		self.assertEqual((composition.oracle.misses, composition.oracle.hits, composition.oracle.disk_hits), shared)
+
+if __name__ == '__main__':
+	unittest.main()
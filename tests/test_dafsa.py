@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+# tests/test_dafsa.py
+#
+# The prefix automaton of --dafsa: built from the table, serialized, and
+# decoded back to the same sequences.
+
+import unittest
+
+from composeparse.dafsa		import Dafsa, DafsaDecoder, DafsaError
+
+from tests.fixtures		import fixture_sequences, hex_sequences, KEYSYMS
+
+class DafsaTest(unittest.TestCase):
+	def test_round_trip(self):
+		(sequences, parser) = fixture_sequences()
+		dafsa = Dafsa(sequences)
+		decoder = dafsa.verify()
+		self.assertEqual(dict(decoder.items()), sequences.values_table())
+
+	def test_lookup(self):
+		(sequences, parser) = fixture_sequences()
+		decoder = DafsaDecoder(Dafsa(sequences).units)
+		multi_key = KEYSYMS['Multi_key']
+		self.assertEqual(decoder.lookup((multi_key, KEYSYMS['a'], KEYSYMS['e'])), 0x00C6)
+		self.assertEqual(decoder.lookup((multi_key, KEYSYMS['a'], KEYSYMS['a'], KEYSYMS['e'])), 0x00E6)
+		self.assertEqual(decoder.lookup((KEYSYMS['dead_stroke'], KEYSYMS['o'])), 0x00F8)
+		""" A prefix is not a sequence """
+		self.assertEqual(decoder.lookup((multi_key, KEYSYMS['a'])), None)
+		self.assertEqual(decoder.lookup((multi_key, KEYSYMS['u'])), None)
+
+	def test_shared_suffixes(self):
+		""" Sequences that end the same way, with the same result, share states """
+		rows = [ (first, 0x0041, 0x0042, 0x00C0) for first in range(0x0100, 0x0110) ]
+		dafsa = Dafsa(hex_sequences(rows))
+		dafsa.verify()
+		self.assertTrue(len(dafsa.states) < dafsa.trie_states)
+
+	def test_wide(self):
+		""" Codepoints and keysyms past 16 bits """
+		rows = [ (0x0061, 0x0062, 0x1F600), (0x0061, 0x10000, 0x00E1), (0x0063, 0x0064, 0x00E2) ]
+		sequences = hex_sequences(rows)
+		dafsa = Dafsa(sequences)
+		decoder = dafsa.verify()
+		self.assertEqual(dafsa.ctype(), 'guint32')
+		self.assertEqual(decoder.lookup((0x0061, 0x0062)), 0x1F600)
+		self.assertEqual(dict(decoder.items()), sequences.values_table())
+
+	def test_corrupted(self):
+		(sequences, parser) = fixture_sequences()
+		dafsa = Dafsa(sequences)
+		dafsa.units[-1] ^= 1
+		self.assertRaises(DafsaError, dafsa.verify)
+
+if __name__ == '__main__':
+	unittest.main()
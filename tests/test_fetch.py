@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+#
+# tests/test_fetch.py
+#
+# The Fetcher, through an opener that answers as a server would: a download,
+# a revalidation answered 304, a checksum that does not match, and a server
+# that cannot be reached, with and without a cached copy to fall back on.
+
+from tempfile		import mkdtemp
+from shutil		import rmtree
+from hashlib		import sha1
+from os.path		import join
+
+import unittest
+import urllib2
+
+from composeparse.fetch		import Fetcher, FetchError, source_filename
+
+URL = 'http://example.org/?p=xorg/lib/libX11.git;a=blob_plain;f=nls/en_US.UTF-8/Compose.pre'
+CONTENTS = '<Multi_key> <a> <e> : "\xc3\xa6" ae\n'
+
+class Headers(object):
+	def __init__(self, headers):
+		self.headers = dict([ (name.lower(), value) for (name, value) in headers.items() ])
+
+	def getheader(self, name, default = None):
+		return self.headers.get(name.lower(), default)
+
+class Response(object):
+	def __init__(self, data, headers):
+		self.data = data
+		self.headers = Headers(headers)
+
+	def read(self):
+		return self.data
+
+	def info(self):
+		return self.headers
+
+	def close(self):
+		pass
+
+class Opener(object):
+	""" Answers each request with the next of answers: a (data, headers) """
+	""" pair for a 200, or an exception to raise; keeps the requests """
+	def __init__(self, *answers):
+		self.answers = list(answers)
+		self.requests = []
+
+	def open(self, request, timeout = None):
+		self.requests.append(request)
+		answer = self.answers.pop(0)
+		if isinstance(answer, Exception):
+			raise answer
+		(data, headers) = answer
+		return Response(data, headers)
+
+def not_modified(url = URL):
+	return urllib2.HTTPError(url, 304, 'Not Modified', None, None)
+
+class FetcherTest(unittest.TestCase):
+	def setUp(self):
+		self.cachedir = mkdtemp()
+
+	def tearDown(self):
+		rmtree(self.cachedir)
+
+	def fetcher(self, opener, **options):
+		return Fetcher(join(self.cachedir, 'cache'), quiet = True, opener = opener, **options)
+
+	def read(self, filename):
+		localfile = open(filename, 'rb')
+		try:
+			return localfile.read()
+		finally:
+			localfile.close()
+
+	def download(self):
+		""" Fetches URL once, answered with CONTENTS and an ETag """
+		opener = Opener((CONTENTS, { 'ETag': '"v1"', 'Content-Length': str(len(CONTENTS)) }))
+		fetcher = self.fetcher(opener)
+		return (fetcher.fetch(URL), fetcher)
+
+	def test_download(self):
+		(filename, fetcher) = self.download()
+		self.assertEqual(self.read(filename), CONTENTS)
+		self.assertEqual(fetcher.requests, 1)
+		entry = fetcher.cache.entry(URL)
+		self.assertEqual(entry['object'], sha1(CONTENTS).hexdigest())
+		self.assertEqual(entry['etag'], '"v1"')
+
+	def test_cached(self):
+		self.download()
+		opener = Opener()
+		fetcher = self.fetcher(opener)
+		self.assertEqual(self.read(fetcher.fetch(URL)), CONTENTS)
+		self.assertEqual(opener.requests, [])
+
+	def test_not_modified(self):
+		self.download()
+		opener = Opener(not_modified())
+		fetcher = self.fetcher(opener, maxage = 0)
+		self.assertEqual(self.read(fetcher.fetch(URL)), CONTENTS)
+		self.assertEqual(fetcher.revalidated, 1)
+		self.assertEqual(opener.requests[0].get_header('If-none-match'), '"v1"')
+
+	def test_modified(self):
+		self.download()
+		opener = Opener(('changed\n', { 'ETag': '"v2"' }))
+		fetcher = self.fetcher(opener, refresh = True)
+		self.assertEqual(self.read(fetcher.fetch(URL)), 'changed\n')
+		self.assertEqual(fetcher.cache.entry(URL)['etag'], '"v2"')
+
+	def test_checksum_mismatch(self):
+		opener = Opener((CONTENTS, {}))
+		fetcher = self.fetcher(opener, checksums = { source_filename(URL): '0' * 40 })
+		self.assertRaises(FetchError, fetcher.fetch, URL)
+		self.assertEqual(fetcher.cache.entry(URL), None)
+
+	def test_checksum_of_cached_object(self):
+		""" With a checksum pinned, a corrupted object is downloaded again """
+		(filename, fetcher) = self.download()
+		corrupted = open(filename, 'wb')
+		corrupted.write('corrupted\n')
+		corrupted.close()
+		opener = Opener((CONTENTS, {}))
+		fetcher = self.fetcher(opener, checksums = { URL: sha1(CONTENTS).hexdigest() })
+		self.assertEqual(self.read(fetcher.fetch(URL)), CONTENTS)
+		self.assertEqual(len(opener.requests), 1)
+
+	def test_truncated(self):
+		opener = Opener((CONTENTS[:5], { 'Content-Length': str(len(CONTENTS)) }))
+		self.assertRaises(FetchError, self.fetcher(opener).fetch, URL)
+
+	def test_unreachable_with_cached_copy(self):
+		self.download()
+		opener = Opener(urllib2.URLError('connection refused'))
+		fetcher = self.fetcher(opener, maxage = 0)
+		self.assertEqual(self.read(fetcher.fetch(URL)), CONTENTS)
+		self.assertEqual(len(opener.requests), 1)
+
+	def test_unreachable(self):
+		opener = Opener(urllib2.URLError('connection refused'))
+		self.assertRaises(FetchError, self.fetcher(opener).fetch, URL)
+
+	def test_concurrent(self):
+		urls = [ 'http://example.org/%d.txt' % i for i in range(4) ]
+		opener = Opener(*[ ('file %d\n' % i, {}) for i in range(4) ])
+		fetcher = self.fetcher(opener)
+		fetcher.start(urls)
+		contents = sorted([ self.read(fetcher.fetch(url)) for url in urls ])
+		self.assertEqual(contents, sorted([ 'file %d\n' % i for i in range(4) ]))
+		self.assertEqual(len(fetcher.cache.read_index()), 4)
+
+	def test_mirror(self):
+		mirrorfile = open(join(self.cachedir, source_filename(URL)), 'wb')
+		mirrorfile.write(CONTENTS)
+		mirrorfile.close()
+		opener = Opener()
+		fetcher = self.fetcher(opener, mirror = self.cachedir)
+		self.assertEqual(self.read(fetcher.fetch(URL)), CONTENTS)
+		self.assertEqual(opener.requests, [])
+		self.assertRaises(FetchError, fetcher.fetch, 'http://example.org/missing.txt')
+
+if __name__ == '__main__':
+	unittest.main()
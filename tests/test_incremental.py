@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+# tests/test_incremental.py
+#
+# --incremental: a copy of data/Compose is parsed, then edited (a codepoint
+# changed, a line deleted, moved, added or repeated) and parsed again from
+# the state of the first run. The table must be the one a full parse makes,
+# and removed, added and changed must tell what happened to it.
+
+from tempfile		import mkdtemp
+from shutil		import rmtree
+from os.path		import join
+
+import unittest
+
+from composeparse.incremental	import IncrementalParser, match_rows, FILENAME_INCREMENTAL
+from composeparse.parser	import ComposeParser
+from composeparse.sequences	import SequenceSet
+
+from tests.fixtures		import fixture_keysyms, FILENAME_COMPOSE
+
+MULTI_KEY_O_SLASH = '<Multi_key> <o> <slash>\t\t: "\xc3\xb8"\toslash\n'
+DEAD_STROKE_O = '<dead_stroke> <o>\t\t\t: "\xc3\xb8"\toslash\n'
+MULTI_KEY_QUOTEDBL_O = '<Multi_key> <quotedbl> <o>\t: "\xc3\xb6"\todiaeresis\n'
+
+class IncrementalTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = mkdtemp()
+		self.filename = join(self.directory, 'Compose')
+		self.statefile = join(self.directory, FILENAME_INCREMENTAL)
+		composefile = open(FILENAME_COMPOSE, 'r')
+		self.lines = composefile.readlines()
+		composefile.close()
+		self.keysyms = fixture_keysyms()
+		self.write(self.lines)
+		self.first = self.parse()
+		self.assertEqual(self.first.state, None)
+		self.assertTrue(self.first.save())
+
+	def tearDown(self):
+		rmtree(self.directory)
+
+	def write(self, lines):
+		composefile = open(self.filename, 'w')
+		composefile.writelines(lines)
+		composefile.close()
+
+	def parse(self):
+		""" Parses the copy from the state file; returns the IncrementalParser """
+		incremental = IncrementalParser(ComposeParser(self.keysyms), self.statefile)
+		incremental.sequences = incremental.parse([self.filename], SequenceSet(self.keysyms, quiet = True))
+		return incremental
+
+	def edit(self, lines):
+		""" Writes lines to the copy and parses it again; checks the table """
+		""" against a full parse. Returns the IncrementalParser. """
+		self.write(lines)
+		incremental = self.parse()
+		self.assertNotEqual(incremental.state, None)
+		sequences = incremental.sequences
+		full = ComposeParser(self.keysyms).parse([self.filename], SequenceSet(self.keysyms, quiet = True))
+		self.assertEqual([ sequences.store.sequence(row) for row in incremental.table ],
+				 [ full.store.sequence(row) for row in full.table() ])
+		self.assertEqual(sorted(sequences.algorithmic_table()), sorted(full.algorithmic_table()))
+		return incremental
+
+	def replace(self, old, new):
+		""" Returns the lines of the copy with line old replaced by the lines new """
+		i = self.lines.index(old)
+		return self.lines[:i] + new + self.lines[i + 1:]
+
+	def test_unchanged(self):
+		incremental = self.edit(self.lines)
+		self.assertEqual(incremental.reparsed, 0)
+		self.assertEqual((incremental.removed, incremental.added, incremental.changed), ([], [], []))
+
+	def test_codepoint_changed(self):
+		incremental = self.edit(self.replace(MULTI_KEY_O_SLASH,
+			[ '<Multi_key> <o> <slash>\t\t: "\xc3\xb6"\todiaeresis\n' ]))
+		self.assertTrue(0 < incremental.reparsed < incremental.lines)
+		self.assertEqual(incremental.changed, [ (['Multi_key', 'o', 'slash', 0x00F6], 0x00F8) ])
+		self.assertEqual((incremental.removed, incremental.added), ([], []))
+
+	def test_deleted(self):
+		incremental = self.edit(self.replace(DEAD_STROKE_O, []))
+		self.assertEqual(incremental.removed, [ ['dead_stroke', 'o', 0x00F8] ])
+		self.assertEqual((incremental.added, incremental.changed), ([], []))
+
+	def test_added(self):
+		incremental = self.edit(self.replace(DEAD_STROKE_O,
+			[ DEAD_STROKE_O, '<Multi_key> <e> <e>\t\t: "\xc3\xa9"\teacute\n' ]))
+		self.assertEqual(incremental.added, [ ['Multi_key', 'e', 'e', 0x00E9] ])
+		self.assertEqual((incremental.removed, incremental.changed), ([], []))
+
+	def test_moved(self):
+		""" A line moved to the end of the file is neither removed nor added """
+		incremental = self.edit(self.replace(MULTI_KEY_QUOTEDBL_O, []) + [ MULTI_KEY_QUOTEDBL_O ])
+		self.assertEqual((incremental.removed, incremental.added, incremental.changed), ([], [], []))
+
+	def test_duplicate(self):
+		incremental = self.edit(self.lines + [ MULTI_KEY_O_SLASH ])
+		self.assertEqual(incremental.sequences.duplicates, self.first.sequences.duplicates + 1)
+		self.assertEqual((incremental.removed, incremental.added, incremental.changed), ([], [], []))
+
+	def test_other_settings(self):
+		""" A state of other settings is not used """
+		self.keysyms.databases[0]['Multi_key'] = 0xFF21
+		incremental = IncrementalParser(ComposeParser(self.keysyms), self.statefile)
+		incremental.parse([self.filename], SequenceSet(self.keysyms, quiet = True))
+		self.assertEqual(incremental.state, None)
+		self.assertEqual(incremental.reparsed, incremental.lines)
+
+class MatchRowsTest(unittest.TestCase):
+	def test_match_rows(self):
+		self.assertEqual(match_rows(list('abcde'), list('abxde')), ([ 0, 1, None, 3, 4 ], [ 2 ]))
+		self.assertEqual(match_rows(list('abc'), list('cab')), ([ 1, 2, None ], [ 0 ]))
+		self.assertEqual(match_rows([], list('ab')), ([], [ 0, 1 ]))
+		self.assertEqual(match_rows(list('ab'), []), ([ None, None ], []))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#
+# tests/test_lookup.py
+#
+# gtk_compose_seqs_compact, as GTKTableEmitter.compact() lays it out, read
+# back through CompactLookup the way gtkimcontextsimple.c reads it.
+
+import unittest
+
+from composeparse.emitters	import GTKTableEmitter
+from composeparse.lookup	import ComposeTableCompact, CompactLookup, table_streams, \
+				   LOOKUP_NONE, LOOKUP_PREFIX, LOOKUP_MATCH
+from composeparse.keysyms	import KeysymDatabase
+from composeparse.sequences	import SequenceSet
+
+from tests.fixtures		import fixture_keysyms, fixture_sequences, KEYSYMS
+
+def compact_lookup(keysyms, sequences, **options):
+	(data, n_index_size) = GTKTableEmitter(keysyms).compact(sequences, **options)
+	return (data, CompactLookup(ComposeTableCompact(data, n_index_size)))
+
+class CompactLookupTest(unittest.TestCase):
+	def test_replay_finds_every_sequence(self):
+		keysyms = fixture_keysyms()
+		(sequences, parser) = fixture_sequences(keysyms)
+		(data, engine) = compact_lookup(keysyms, sequences)
+		expected = sequences.values_table()
+		report = engine.replay(table_streams(expected, 3), expected)
+		self.assertEqual(report.mismatches, [])
+		self.assertEqual(report.streams, 3 * len(expected))
+		self.assertEqual(report.answers[LOOKUP_MATCH], 3 * len(expected))
+
+	def test_answers(self):
+		keysyms = fixture_keysyms()
+		(sequences, parser) = fixture_sequences(keysyms)
+		(data, engine) = compact_lookup(keysyms, sequences)
+		multi_key = KEYSYMS['Multi_key']
+		self.assertEqual(engine.check([ multi_key ]), (LOOKUP_PREFIX, None))
+		self.assertEqual(engine.check([ multi_key, KEYSYMS['a'] ]), (LOOKUP_PREFIX, None))
+		""" The later definition of <Multi_key> <a> <e> is the one kept """
+		self.assertEqual(engine.check([ multi_key, KEYSYMS['a'], KEYSYMS['e'] ]),
+			(LOOKUP_MATCH, 0x00C6))
+		self.assertEqual(engine.check([ multi_key, KEYSYMS['u'] ]), (LOOKUP_NONE, None))
+		self.assertEqual(engine.check([ KEYSYMS['u'] ]), (LOOKUP_NONE, None))
+
+	def test_feed_empties_the_buffer(self):
+		keysyms = fixture_keysyms()
+		(sequences, parser) = fixture_sequences(keysyms)
+		(data, engine) = compact_lookup(keysyms, sequences)
+		self.assertEqual(engine.feed(KEYSYMS['dead_stroke']), (LOOKUP_PREFIX, None))
+		self.assertEqual(engine.feed(KEYSYMS['o']), (LOOKUP_MATCH, 0x00F8))
+		self.assertEqual(engine.compose_buffer, [])
+
+	def test_offsets_past_16_bits(self):
+		""" 100000 sequences of two keysyms take more than 65535 cells: """
+		""" the offsets of the header, in 16 bits, lose some of them """
+		keysyms = KeysymDatabase()
+		keysyms.databases = ({}, {})
+		sequences = SequenceSet(keysyms, quiet = True)
+		for first in range(0x0100, 0x0100 + 250):
+			for second in range(0x1000, 0x1000 + 400):
+				sequences.add([ "0x%04X" % first, "0x%04X" % second, (first + second) & 0xFFFF ])
+		expected = sequences.values_table()
+		self.assertEqual(len(expected), 100000)
+		(data, engine) = compact_lookup(keysyms, sequences)
+		self.assertTrue(len(data) > 0xFFFF)
+		self.assertEqual(data.typecode, 'H')
+		report = engine.replay(table_streams(expected), expected)
+		self.assertNotEqual(report.mismatches, [])
+
+		""" With offsets wide enough, every sequence is found """
+		(data, engine) = compact_lookup(keysyms, sequences, wide_offsets = True)
+		self.assertEqual(data.typecode, 'I')
+		report = engine.replay(table_streams(expected), expected)
+		self.assertEqual(report.mismatches, [])
+		self.assertEqual(report.answers[LOOKUP_MATCH], 100000)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#
+# tests/test_multitable.py
+#
+# The table of --multiple: the sequences that produce more than one
+# character, looked up by length, then by binary search.
+
+import unittest
+
+from collections	import OrderedDict
+
+from composeparse.multitable	import MultiTable, MultiTableLookup, MultiTableError
+
+from tests.fixtures		import fixture_keysyms, fixture_sequences, KEYSYMS
+
+class FakeParser(object):
+	""" What MultiTable reads of a ComposeParser """
+	def __init__(self, multisequences):
+		self.multisequences = OrderedDict()
+		for (names, codepoints) in multisequences:
+			self.multisequences[tuple(names)] = [ names, codepoints ]
+		self.multisequence_maxseqlen = max([ len(names) for (names, codepoints) in multisequences ])
+		self.multisequence_maxvallen = max([ len(codepoints) for (names, codepoints) in multisequences ])
+
+class MultiTableTest(unittest.TestCase):
+	def test_fixture(self):
+		keysyms = fixture_keysyms()
+		(sequences, parser) = fixture_sequences(keysyms)
+		multitable = MultiTable(parser, keysyms)
+		lookup = multitable.verify()
+		self.assertEqual(multitable.groups, 2)
+		self.assertEqual(lookup.lookup((KEYSYMS['dead_acute'], KEYSYMS['j'])), (0x006A, 0x0301))
+		self.assertEqual(lookup.lookup((KEYSYMS['Multi_key'], KEYSYMS['o'], KEYSYMS['o'], KEYSYMS['e'])),
+			(0x00F6, 0x0065))
+		self.assertEqual(lookup.lookup((KEYSYMS['dead_acute'], KEYSYMS['a'])), None)
+		self.assertEqual(lookup.lookup((KEYSYMS['Multi_key'], KEYSYMS['o'], KEYSYMS['o'])), None)
+
+	def test_shared_results(self):
+		""" A result is in the pool once, however many sequences give it """
+		keysyms = fixture_keysyms()
+		parser = FakeParser([ (['Multi_key', 'a', 'e'], ['U0061', 'U0065']),
+				      (['Multi_key', 'e', 'a'], ['U0061', 'U0065']),
+				      (['dead_acute', 'a', 'e', 'o'], ['U0061', 'U0065', 'U006F']) ])
+		multitable = MultiTable(parser, keysyms)
+		multitable.verify()
+		self.assertEqual(multitable.distinct_results, 2)
+		self.assertEqual(list(multitable.results), [ 2, 0x61, 0x65, 3, 0x61, 0x65, 0x6F ])
+		self.assertEqual(multitable.padded_size(), 3 * (4 + 3) * 2)
+
+	def test_wrong_result(self):
+		keysyms = fixture_keysyms()
+		(sequences, parser) = fixture_sequences(keysyms)
+		multitable = MultiTable(parser, keysyms)
+		multitable.results[1] ^= 1
+		self.assertRaises(MultiTableError, multitable.verify)
+
+if __name__ == '__main__':
+	unittest.main()
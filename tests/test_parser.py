@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+#
+# tests/test_parser.py
+#
+# The units of ComposeParser: the included files are kept, for the parsers
+# that share them; the files given to parse() are streamed.
+
+from tempfile		import mkdtemp
+from shutil		import rmtree
+from os.path		import join, realpath
+
+import unittest
+
+from composeparse.parser	import ComposeParser
+from composeparse.sequences	import SequenceSet
+
+from tests.fixtures		import fixture_keysyms, fixture_sequences, FILENAME_COMPOSE
+
+class UnitsTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = mkdtemp()
+		self.filename = join(self.directory, 'Compose')
+		composefile = open(self.filename, 'w')
+		composefile.write('include "%s"\n' % FILENAME_COMPOSE)
+		composefile.write('<Multi_key> <o> <u> : "\xc3\xb6" odiaeresis\n')
+		composefile.close()
+
+	def tearDown(self):
+		rmtree(self.directory)
+
+	def test_only_includes_kept(self):
+		keysyms = fixture_keysyms()
+		parser = ComposeParser(keysyms)
+		sequences = parser.parse([self.filename], SequenceSet(keysyms, quiet = True))
+		self.assertEqual(parser.units.keys(), [ realpath(FILENAME_COMPOSE) ])
+		(included, includedparser) = fixture_sequences(keysyms)
+		self.assertEqual(len(sequences), len(included) + 1)
+
+	def test_kept_units_unchanged(self):
+		""" A second parse over the same units gives the same sequences """
+		keysyms = fixture_keysyms()
+		units = {}
+		parser = ComposeParser(keysyms, units = units)
+		parser.preload_includes([self.filename])
+		first = parser.parse([self.filename], SequenceSet(keysyms, quiet = True))
+		second = ComposeParser(keysyms, units = units).parse([self.filename], SequenceSet(keysyms, quiet = True))
+		self.assertEqual([ first.store.sequence(row) for row in first.table() ],
+				 [ second.store.sequence(row) for row in second.table() ])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# tests/test_perfecthash.py
+#
+# The minimal perfect hash of --perfect-hash: every sequence of the table
+# in one probe, and nothing else.
+
+import unittest
+import random
+
+from composeparse.perfecthash	import PerfectHash, PerfectHashLookup, PerfectHashError, sequence_hash
+from composeparse.sequences	import WIDTHOFCOMPOSETABLE
+
+from tests.fixtures		import fixture_sequences, hex_sequences, KEYSYMS
+
+class PerfectHashTest(unittest.TestCase):
+	def test_verify(self):
+		(sequences, parser) = fixture_sequences()
+		perfecthash = PerfectHash(sequences)
+		perfecthash.verify()
+		self.assertEqual(perfecthash.slots, len(sequences.values_table()))
+		self.assertEqual(len(perfecthash.values), perfecthash.slots)
+
+	def test_lookup(self):
+		(sequences, parser) = fixture_sequences()
+		perfecthash = PerfectHash(sequences)
+		lookup = PerfectHashLookup(perfecthash.displacements, perfecthash.keys, perfecthash.values, perfecthash.seed)
+		multi_key = KEYSYMS['Multi_key']
+		self.assertEqual(lookup.lookup((multi_key, KEYSYMS['a'], KEYSYMS['e'])), 0x00C6)
+		self.assertEqual(lookup.lookup((KEYSYMS['dead_stroke'], KEYSYMS['o'])), 0x00F8)
+		self.assertEqual(lookup.lookup((multi_key, KEYSYMS['a'])), None)
+		self.assertEqual(lookup.lookup((multi_key, KEYSYMS['u'], KEYSYMS['u'])), None)
+		self.assertEqual(lookup.lookup((multi_key,) * (WIDTHOFCOMPOSETABLE + 1)), None)
+
+	def test_many(self):
+		""" Enough sequences for buckets of several, and a slot for each """
+		rows = [ (first, second, (first << 4 | second) & 0xFFFF)
+			 for first in range(0x0100, 0x0140) for second in range(0x0041, 0x005B) ]
+		sequences = hex_sequences(rows)
+		perfecthash = PerfectHash(sequences)
+		lookup = perfecthash.verify()
+		self.assertEqual(perfecthash.slots, len(rows))
+		self.assertEqual(sorted(perfecthash.values), sorted([ row[-1] for row in rows ]))
+		self.assertEqual(lookup.lookup((0x0100, 0x0040)), None)
+
+	def test_small_random(self):
+		""" Small tables often have a bucket that the first seeds cannot """
+		""" place; another seed is tried until one does """
+		generator = random.Random(16)
+		for size in (2, 3, 4, 8, 12, 32):
+			for i in range(40):
+				rows = set()
+				while len(rows) < size:
+					rows.add((KEYSYMS['Multi_key'], generator.randint(0x20, 0x7E), generator.randint(0x20, 0x7E)))
+				rows = [ row + (generator.randint(0x00A0, 0x024F),) for row in rows ]
+				perfecthash = PerfectHash(hex_sequences(rows))
+				lookup = perfecthash.verify()
+				self.assertEqual(lookup.seeds[0], 3 * perfecthash.seed)
+
+	def test_empty(self):
+		perfecthash = PerfectHash(hex_sequences([]))
+		self.assertEqual(perfecthash.slots, 0)
+		self.assertEqual(perfecthash.verify().lookup((0x0041,)), None)
+
+	def test_wrong_value(self):
+		(sequences, parser) = fixture_sequences()
+		perfecthash = PerfectHash(sequences)
+		perfecthash.values[0] ^= 1
+		self.assertRaises(PerfectHashError, perfecthash.verify)
+
+	def test_hash_depends_on_seed(self):
+		self.assertNotEqual(sequence_hash((0x0041, 0x0042), 0), sequence_hash((0x0041, 0x0042), 1))
+		self.assertNotEqual(sequence_hash((0x0041, 0x0042), 0), sequence_hash((0x0042, 0x0041), 0))
+
+if __name__ == '__main__':
+	unittest.main()
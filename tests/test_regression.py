@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+#
+# tests/test_regression.py
+#
+# The comparison of --regression: the old sequences joined with the table,
+# on the values of their keysyms or, for keysyms of no value, their names.
+
+import unittest
+
+from composeparse.regression	import OldSequences
+from composeparse.keysyms	import KeysymDatabase
+
+from tests.fixtures		import fixture_sequences, KEYSYMS, UNICODE_KEYSYMS
+
+def old_sequence(names, codepoint):
+	return names + [ 'EMPTY' ] * (5 - len(names)) + [ codepoint, False ]
+
+def old_sequences(keysyms, rows):
+	""" Returns OldSequences of rows, (names, codepoint) pairs, as if parsed """
+	""" from GTKOLDSEQUENCES.txt """
+	oldsequences = OldSequences(keysyms)
+	oldsequences.gtkoldsequences = {}
+	for (names, codepoint) in rows:
+		oldsequences.gtkoldsequences.setdefault(codepoint, []).append(old_sequence(names, codepoint))
+	return oldsequences
+
+class RegressionTest(unittest.TestCase):
+	def setUp(self):
+		(self.sequences, parser) = fixture_sequences()
+
+	def test_joined_on_values(self):
+		oldsequences = old_sequences(self.sequences.keysyms,
+			[ (['dead_stroke', 'o'], 0x00F8), (['Multi_key', 'a', 'e'], 0x00E6) ])
+		result = oldsequences.compare(self.sequences)
+		self.assertEqual(result.removed, [])
+		self.assertEqual(result.changed, [ (['Multi_key', 'a', 'e'], 0x00E6, 0x00C6) ])
+		self.assertEqual(len(result.missing), 1)
+
+	def test_joined_on_names(self):
+		""" Keysyms the database of the old sequences does not know """
+		keysyms = KeysymDatabase()
+		databases = (dict(KEYSYMS), dict(UNICODE_KEYSYMS))
+		for database in databases:
+			del database['dead_stroke']
+		keysyms.databases = databases
+		oldsequences = old_sequences(keysyms,
+			[ (['dead_stroke', 'o'], 0x00F8), (['dead_stroke', 'u'], 0x0289) ])
+		result = oldsequences.compare(self.sequences)
+		self.assertEqual(result.removed, [ (['dead_stroke', 'u'], 0x0289) ])
+		self.assertEqual(result.changed, [])
+		self.assertFalse(['dead_stroke', 'o'] in [ names for (names, cp) in result.added ])
+
+if __name__ == '__main__':
+	unittest.main()
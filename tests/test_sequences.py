@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+#
+# tests/test_sequences.py
+#
+# The duplicate sequences SequenceSet.add() finds: counted, and listed only
+# with warnings.
+
+import unittest
+import sys
+
+from StringIO		import StringIO
+
+from composeparse.sequences	import SequenceSet
+
+from tests.fixtures		import fixture_keysyms
+
+class DuplicatesTest(unittest.TestCase):
+	def add_duplicates(self, **options):
+		""" Returns the SequenceSet and what it printed to stderr """
+		sequences = SequenceSet(fixture_keysyms(), **options)
+		stderr = sys.stderr
+		sys.stderr = StringIO()
+		try:
+			sequences.add(['Multi_key', 'a', 'e', 0x00E6])
+			sequences.add(['Multi_key', 'a', 'e', 0x00C6])
+			sequences.add(['dead_acute', 'e', 0x00E9])
+			sequences.add(['dead_acute', 'e', 0x00E9])
+			sequences.print_duplicates()
+			return (sequences, sys.stderr.getvalue())
+		finally:
+			sys.stderr = stderr
+
+	def test_counted(self):
+		(sequences, printed) = self.add_duplicates()
+		self.assertEqual(sequences.duplicates, 2)
+		self.assertEqual(sequences.conflicts, 1)
+		self.assertTrue("Got 2 duplicate sequences, 1 with conflicting values" in printed)
+		self.assertFalse("Got duplicate sequence:" in printed)
+
+	def test_listed(self):
+		(sequences, printed) = self.add_duplicates(warnings = True)
+		self.assertEqual(printed.count("Got duplicate sequence:"), 2)
+		self.assertEqual(printed.count("Conflicting values"), 1)
+
+	def test_quiet(self):
+		(sequences, printed) = self.add_duplicates(quiet = True, warnings = True)
+		self.assertEqual(printed, "")
+		self.assertEqual(sequences.duplicates, 2)
+
+if __name__ == '__main__':
+	unittest.main()